@@ -0,0 +1,225 @@
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from .NetworkConfigurationLoader import parse_oran_topology
+from .ScenarioGenerator import generate_utilizations, time_axis
+from .TopologyGenerator import generate_topology
+from .TimeSeriesStore import compact_time_axis
+from .TopologyIndex import compile_topology
+from .NEE.HierarchyPowerCalculator import evaluate_hierarchy
+from .NEE.PowerPipeline import _evaluate, save_results_to_csv, save_results_to_store
+from .NEE.VectorizedPowerModel import (
+    calculate_cu_power_batch, calculate_cu_utilizations_batch, calculate_du_power_batch,
+    calculate_du_utilizations_batch, calculate_ru_power_batch)
+
+logger = logging.getLogger(__name__)
+
+# RUs of o_ran_network_operational.json, the 1x scale
+BASE_NUM_RUS = 21
+
+# A stage is slower than in the previous run of the same case by more than this fraction
+# (and by more than MIN_REGRESSION_SECONDS, so timer noise of tiny stages is ignored)
+REGRESSION_TOLERANCE = 0.2
+MIN_REGRESSION_SECONDS = 0.001
+
+DEFAULT_HISTORY_FILE = "benchmarkHistory.json"
+
+def _time_stage(function, repeat):
+    """
+    Returns (best wall time in seconds, peak traced memory in MB, last result) of a stage.
+    The timed runs are untraced; one extra run under tracemalloc measures the peak memory.
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        seconds = min(seconds, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak / 1e6, result
+
+def _quiet(function):
+    # The sinks log every folder they write
+    def run():
+        logging.disable(logging.INFO)
+        try:
+            return function()
+        finally:
+            logging.disable(logging.NOTSET)
+    return run
+
+def benchmark_case(topology_file, num_timestamps, repeat=3, output_dir=None, seed=0):
+    """
+    Times every stage of the pipeline on one topology file and a generated utilization
+    series of num_timestamps: parsing (json.load and streaming), compiling, each NEE
+    calculator stage, the full evaluation and the CSV and store sinks. Returns
+    {stage: {"seconds", "throughput", "unit", "peak_memory_mb"}}.
+    """
+    stages = {}
+
+    def record(name, function, amount, unit):
+        seconds, peak, result = _time_stage(function, repeat)
+        stages[name] = {"seconds": seconds, "throughput": amount / seconds if seconds else None, "unit": unit,
+                        "peak_memory_mb": peak}
+        return result
+
+    file_mb = os.path.getsize(topology_file) / 1e6
+    record("parse", lambda: parse_oran_topology(topology_file), file_mb, "MB/s")
+    _, network_tree = record("parse_streaming", lambda: parse_oran_topology(topology_file, streaming=True),
+                             file_mb, "MB/s")
+    index = record("compile", lambda: compile_topology(network_tree), len(network_tree), "nodes/s")
+
+    num_rus, num_dus, num_cus = len(index.ru_ids), len(index.du_ids), len(index.cu_ids)
+    timestamps = time_axis(datetime(2024, 1, 1), timedelta(minutes=15), num_timestamps)
+    ru_utilizations = record(
+        "scenario", lambda: generate_utilizations(timestamps, num_rus, np.random.default_rng(seed)),
+        num_timestamps * num_rus, "samples/s")
+
+    ru_power = record("ru_power", lambda: calculate_ru_power_batch(ru_utilizations), ru_utilizations.size, "samples/s")
+    du_utilizations = record("du_utilization", lambda: calculate_du_utilizations_batch(ru_utilizations, index.ru_to_du),
+                             ru_utilizations.size, "samples/s")
+    du_power = record("du_power", lambda: calculate_du_power_batch(du_utilizations, index.ru_to_du),
+                      num_timestamps * num_dus, "samples/s")
+    cu_utilizations = record("cu_utilization", lambda: calculate_cu_utilizations_batch(du_utilizations, index.du_to_cu),
+                             num_timestamps * num_dus, "samples/s")
+    cu_power = record("cu_power", lambda: calculate_cu_power_batch(cu_utilizations), num_timestamps * num_cus,
+                      "samples/s")
+    record("hierarchy", lambda: evaluate_hierarchy(index, ru_power, du_power, cu_power),
+           num_timestamps * (num_rus + num_dus + num_cus), "samples/s")
+    results = record("evaluate", lambda: _evaluate(index, timestamps, ru_utilizations), ru_utilizations.size,
+                     "samples/s")
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as folder:
+        # The CSV readers produce a TimeAxis for regular series
+        results["timestamps"] = compact_time_axis(timestamps)
+        record("csv_sink", _quiet(lambda: save_results_to_csv(results, os.path.join(folder, "csv"))), num_timestamps,
+               "rows/s")
+        record("store_sink", _quiet(lambda: save_results_to_store(results, os.path.join(folder, "store"))),
+               num_timestamps, "rows/s")
+    return stages
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def load_history(history_file):
+    """
+    Returns the list of recorded benchmark runs (oldest first), or [] without a history file.
+    """
+    if not os.path.isfile(history_file):
+        return []
+    with open(history_file, 'r') as file:
+        return json.load(file)
+
+def find_regressions(run, history, tolerance=REGRESSION_TOLERANCE):
+    """
+    Compares every stage of a run with the same case and stage of the most recent earlier
+    run that has it. Returns a list of (case, stage, previous seconds, seconds).
+    """
+    regressions = []
+    for case_name, case in run["cases"].items():
+        for stage, result in case["stages"].items():
+            for previous_run in reversed(history):
+                previous = previous_run["cases"].get(case_name, {}).get("stages", {}).get(stage)
+                if previous is not None:
+                    slowdown = result["seconds"] - previous["seconds"]
+                    if slowdown > previous["seconds"] * tolerance and slowdown > MIN_REGRESSION_SECONDS:
+                        regressions.append((case_name, stage, previous["seconds"], result["seconds"]))
+                    break
+    return regressions
+
+def run_benchmarks(scales=(1, 10, 100), num_timestamps=96, rus_per_du=1, dus_per_cu=147, rus_per_tower=3,
+                   dus_per_o_cloud=21, repeat=3, history_file=DEFAULT_HISTORY_FILE, tolerance=REGRESSION_TOLERANCE,
+                   work_dir=None):
+    """
+    Benchmarks synthetic topologies of scale x BASE_NUM_RUS RUs (see TopologyGenerator)
+    with the given fan-outs. The run (environment, and the stages of every scale) is
+    appended to history_file, and stages more than tolerance slower than in the previous
+    run are reported. Returns (run, regressions).
+    """
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "cases": {},
+    }
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as folder:
+        for scale in scales:
+            num_rus = int(round(scale * BASE_NUM_RUS))
+            name = f"{num_rus}ru-{rus_per_du}ru/du-{dus_per_cu}du/cu-{num_timestamps}t"
+            topology_file = os.path.join(folder, f"{name.replace('/', '_')}.json")
+            counts = generate_topology(topology_file, num_rus, rus_per_du, dus_per_cu, rus_per_tower, dus_per_o_cloud)
+            logger.info("Benchmarking %s (%.1f MB topology)", name, os.path.getsize(topology_file) / 1e6)
+
+            run["cases"][name] = {
+                "scale": scale,
+                "nodes": counts,
+                "num_timestamps": num_timestamps,
+                "stages": benchmark_case(topology_file, num_timestamps, repeat, folder),
+            }
+            os.remove(topology_file)
+
+    history = load_history(history_file) if history_file is not None else []
+    regressions = find_regressions(run, history, tolerance)
+    if history_file is not None:
+        os.makedirs(os.path.dirname(history_file) or ".", exist_ok=True)
+        with open(history_file, mode='w') as file:
+            json.dump(history + [run], file, indent=1)
+        logger.info("Benchmark history saved to %s", history_file)
+    return run, regressions
+
+def format_run(run):
+    """
+    Formats a run as one table per case: time, throughput and peak memory of every stage.
+    """
+    lines = []
+    for name, case in run["cases"].items():
+        lines.append(name)
+        for stage, result in case["stages"].items():
+            throughput = f"{result['throughput']:.4g} {result['unit']}" if result["throughput"] else "-"
+            lines.append(f"  {stage.ljust(16)}{result['seconds'] * 1e3:12.2f} ms  {throughput:>22}"
+                         f"  {result['peak_memory_mb']:10.2f} MB peak")
+    return "\n".join(lines)
+
+def format_scaling(run):
+    """
+    Formats the time per RU of every stage relative to the smallest case, so stages that
+    scale worse than linearly (scaling cliffs) stand out as factors well above 1.
+    """
+    cases = sorted(run["cases"].values(), key=lambda case: case["nodes"]["RU"])
+    if len(cases) < 2:
+        return ""
+    base = cases[0]
+    lines = ["Time per RU relative to " + f"{base['nodes']['RU']} RUs:",
+             "  " + "stage".ljust(16) + "".join(f"{case['nodes']['RU']:>10}" for case in cases)]
+    for stage, result in base["stages"].items():
+        base_per_ru = result["seconds"] / base["nodes"]["RU"]
+        factors = [case["stages"][stage]["seconds"] / case["nodes"]["RU"] / base_per_ru if base_per_ru else 0.0
+                   for case in cases]
+        lines.append("  " + stage.ljust(16) + "".join(f"{factor:>9.2f}x" for factor in factors))
+    return "\n".join(lines)
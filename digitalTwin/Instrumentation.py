@@ -0,0 +1,279 @@
+"""
+Structured timing and counter instrumentation of the pipeline stages.
+
+Instrumentation is off until a sink is enabled. While it is off, stage() returns a shared
+no-op object, so an instrumented stage costs one function call and a truth test:
+
+    with stage("read_topology", file=json_file) as s:
+        ...
+        if s:  # Only gather counters that cost something while instrumentation is on
+            s.add(bytes_read=os.path.getsize(json_file))
+
+Every finished stage is emitted as an event dictionary to the enabled sinks:
+    {"event": "stage", "stage": name, "parent": enclosing stage or None, "start": epoch seconds,
+     "duration_s": seconds, "peak_rss_mb": process peak RSS, <counters...>}
+plus "peak_traced_mb" (peak Python/NumPy allocations during the stage) with track_memory.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource  # Unix only; the peak RSS is left out elsewhere
+except ImportError:
+    resource = None
+
+# Environment variables that enable instrumentation without code changes
+PROFILE_ENV = "DIGITALTWIN_PROFILE"            # JSON lines event file
+METRICS_PORT_ENV = "DIGITALTWIN_METRICS_PORT"  # Local metrics endpoint port
+
+# Event fields that are maxima rather than amounts to sum
+PEAK_KEYS = ("peak_rss_mb", "peak_traced_mb")
+
+_sinks = []
+_track_memory = False
+_local = threading.local()
+
+class _NullStage:
+    """
+    Stage used while instrumentation is off: falsy, and every method does nothing.
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, **counters):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    __slots__ = ("name", "counters", "parent", "start", "start_time", "traced_peak")
+
+    def __init__(self, name, counters):
+        self.name = name
+        self.counters = counters
+
+    def __bool__(self):
+        return True
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        if _track_memory:
+            # Peaks of enclosing stages are kept by folding them in before the reset
+            for enclosing in stack[:-1]:
+                enclosing.traced_peak = max(enclosing.traced_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.traced_peak = 0
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        _stack().pop()
+        event = {"event": "stage", "stage": self.name, "parent": self.parent, "start": self.start_time,
+                 "duration_s": duration}
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+        if resource is not None:
+            # ru_maxrss is in KB on Linux
+            event["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        if _track_memory and tracemalloc.is_tracing():
+            self.traced_peak = max(self.traced_peak, tracemalloc.get_traced_memory()[1])
+            event["peak_traced_mb"] = self.traced_peak / 1e6
+        event.update(self.counters)
+        emit(event)
+        return False
+
+    def add(self, **counters):
+        """
+        Adds to the counters of the stage (numbers are summed, anything else replaced).
+        """
+        for key, value in counters.items():
+            previous = self.counters.get(key)
+            if isinstance(value, (int, float)) and isinstance(previous, (int, float)):
+                self.counters[key] = previous + value
+            else:
+                self.counters[key] = value
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def enabled():
+    """
+    Returns True while at least one sink receives events.
+    """
+    return bool(_sinks)
+
+def stage(name, **counters):
+    """
+    Returns a context manager that times a stage and emits it with its counters.
+    """
+    if not _sinks:
+        return _NULL_STAGE
+    return _Stage(name, dict(counters))
+
+def emit(event):
+    """
+    Sends an event dictionary to every enabled sink.
+    """
+    for sink in _sinks:
+        sink(event)
+
+def enable(sink, track_memory=False):
+    """
+    Starts sending events to sink, any callable taking an event dictionary (e.g. a
+    JsonLinesSink, a MetricsEndpoint or list.append). With track_memory, tracemalloc
+    measures the peak allocations of every stage, which slows the pipeline down noticeably.
+    """
+    global _track_memory
+    _sinks.append(sink)
+    if track_memory and not _track_memory:
+        _track_memory = True
+        tracemalloc.start()
+    return sink
+
+def disable(sink=None):
+    """
+    Stops sending events to sink (all sinks by default) and closes it if it can be closed.
+    """
+    global _track_memory
+    for removed in [sink] if sink is not None else list(_sinks):
+        if removed in _sinks:
+            _sinks.remove(removed)
+            if hasattr(removed, "close"):
+                removed.close()
+    if not _sinks and _track_memory:
+        _track_memory = False
+        tracemalloc.stop()
+
+class JsonLinesSink:
+    """
+    Appends every event as one JSON line to a file.
+    """
+    def __init__(self, filename):
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        self.file = open(filename, mode='a')
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class StageTotals:
+    """
+    Sums the calls, seconds and numeric counters of the stage events per stage, and keeps
+    the highest memory peaks.
+    """
+    def __init__(self):
+        self.totals = {}  # Stage -> {"calls": ..., "seconds": ..., counter: ...}
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        if event.get("event") != "stage":
+            return
+        with self.lock:
+            totals = self.totals.setdefault(event["stage"], {"calls": 0, "seconds": 0.0})
+            totals["calls"] += 1
+            totals["seconds"] += event["duration_s"]
+            for key, value in event.items():
+                if key in ("start", "duration_s") or not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                if key in PEAK_KEYS:
+                    totals[key] = max(totals.get(key, 0), value)
+                else:
+                    totals[key] = totals.get(key, 0) + value
+
+    def snapshot(self):
+        with self.lock:
+            return {stage_name: dict(totals) for stage_name, totals in self.totals.items()}
+
+    def format(self):
+        """
+        Formats the totals as a table, slowest stage first.
+        """
+        lines = []
+        for stage_name, totals in sorted(self.snapshot().items(), key=lambda item: -item[1]["seconds"]):
+            counters = ", ".join(f"{key}={value:g}" for key, value in totals.items() if key not in ("calls", "seconds"))
+            lines.append(f"{stage_name.ljust(24)}{totals['seconds'] * 1e3:12.2f} ms{totals['calls']:8d} calls  {counters}".rstrip())
+        return "\n".join(lines)
+
+    def render_prometheus(self):
+        """
+        Renders the totals in the Prometheus text format:
+            digitaltwin_stage_calls_total{stage="..."}
+            digitaltwin_stage_seconds_total{stage="..."}
+            digitaltwin_stage_<counter>_total{stage="..."}
+            digitaltwin_stage_peak_rss_mb{stage="..."}
+        """
+        lines = []
+        for stage_name, totals in sorted(self.snapshot().items()):
+            for metric, value in totals.items():
+                name = "digitaltwin_stage_" + "".join(c if c.isalnum() else "_" for c in metric)
+                if metric not in PEAK_KEYS:
+                    name += "_total"
+                lines.append(f'{name}{{stage="{stage_name}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+class MetricsEndpoint(StageTotals):
+    """
+    Serves the StageTotals of the stage events on a local HTTP endpoint in the Prometheus
+    text format (http://127.0.0.1:<port>/metrics) from a background thread.
+    """
+    def __init__(self, port=9109, host="127.0.0.1"):
+        super().__init__()
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = endpoint.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def enable_from_environment():
+    """
+    Enables a JsonLinesSink and/or a MetricsEndpoint from the DIGITALTWIN_PROFILE and
+    DIGITALTWIN_METRICS_PORT environment variables, if set.
+    """
+    if os.environ.get(PROFILE_ENV):
+        enable(JsonLinesSink(os.environ[PROFILE_ENV]))
+    if os.environ.get(METRICS_PORT_ENV):
+        enable(MetricsEndpoint(int(os.environ[METRICS_PORT_ENV])))
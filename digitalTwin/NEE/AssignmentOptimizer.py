@@ -0,0 +1,385 @@
+import numpy as np
+
+from ..TopologyIndex import compile_topology
+from .DUpowerCalculator import P_0_DU, K1_DU, K2_DU
+from .CUpowerCalculator import K_CU, P_0_CU
+from .PowerPipeline import load_topology, load_utilization_source
+from .EnergySavingSimulator import PolicySimulator, step_hours
+
+# Moves must improve the cost by more than this to be taken
+MIN_IMPROVEMENT = 1e-6
+
+class AssignmentOptimizer:
+    """
+    Searches RU -> DU and DU -> CU assignments that minimize the energy of the power model
+    over a utilization horizon, subject to DU and CU capacity limits.
+
+    Without the 2-decimal rounding, the summed power of a DU over the horizon only depends
+    on its number of RUs n and the summed utilization A of those RUs:
+        T * P_0_DU + K1_DU * A / n + T * K2_DU * n
+    and a CU's only on the summed mean utilization of its DUs. The optimizer keeps A, n and
+    those sums per node, so the cost change of moving one RU (to every DU at once) or one DU
+    is computed in O(N_DU) without re-evaluating the series; only the capacity check of a
+    chosen move touches the T utilization samples. DUs and CUs left empty are switched off.
+
+    Capacity limits:
+        du_capacity     peak summed RU utilization a DU may carry at any time step
+        max_rus_per_du  number of RUs a DU may support
+        max_dus_per_cu  number of (switched on) DUs a CU may support
+    """
+    def __init__(self, topology_index, ru_utilization_values, du_capacity=None, max_rus_per_du=None,
+                 max_dus_per_cu=None):
+        self.topology_index = topology_index
+        ru_utilizations = np.asarray(ru_utilization_values, dtype=float).reshape(-1, len(topology_index.ru_ids))
+        self.num_steps = len(ru_utilizations)
+        self.ru_totals = ru_utilizations.sum(axis=0)
+        self.ru_loads = np.ascontiguousarray(ru_utilizations.T)
+        self.du_capacity = du_capacity
+        self.max_rus_per_du = max_rus_per_du
+        self.max_dus_per_cu = max_dus_per_cu
+
+        # RUs without a DU are left alone
+        self.rus = np.flatnonzero(topology_index.ru_parent >= 0)
+        self.num_dus = len(topology_index.du_ids)
+        self.num_cus = len(topology_index.cu_ids)
+        self.load_assignment(topology_index.ru_parent, topology_index.du_parent)
+
+    def load_assignment(self, ru_parent, du_parent):
+        """
+        Sets the current assignment (DU column per RU, CU column per DU) and rebuilds the sums.
+        """
+        self.ru_parent = np.array(ru_parent, dtype=np.intp)
+        # DUs without a CU are attached to an extra CU column with no cost
+        self.du_parent = np.where(np.asarray(du_parent) >= 0, du_parent, self.num_cus).astype(np.intp)
+        self.cu_on = np.append(np.ones(self.num_cus), 0.0)
+
+        assigned = self.ru_parent >= 0
+        self.du_sums = np.bincount(self.ru_parent[assigned], self.ru_totals[assigned], minlength=self.num_dus)
+        self.du_counts = np.bincount(self.ru_parent[assigned], minlength=self.num_dus).astype(float)
+        self.du_loads = np.zeros((self.num_dus, self.num_steps))
+        np.add.at(self.du_loads, self.ru_parent[assigned], self.ru_loads[assigned])
+        self._rebuild_cu_sums()
+
+    def _rebuild_cu_sums(self):
+        active = self.du_counts > 0
+        means = self._du_mean(self.du_sums, self.du_counts)
+        self.cu_sums = np.bincount(self.du_parent[active], means[active], minlength=self.num_cus + 1)
+        self.cu_counts = np.bincount(self.du_parent[active], minlength=self.num_cus + 1).astype(float)
+
+    @staticmethod
+    def _du_mean(sums, counts):
+        return np.divide(sums, counts, out=np.zeros_like(np.asarray(sums, dtype=float)), where=np.asarray(counts) > 0)
+
+    def _du_cost(self, sums, counts):
+        T = self.num_steps
+        return np.where(counts > 0, T * P_0_DU + K1_DU * self._du_mean(sums, counts) + T * K2_DU * counts, 0.0)
+
+    def _cu_cost(self, sums, counts, cus):
+        T = self.num_steps
+        return np.where(counts > 0, T * P_0_CU + K_CU * self._du_mean(sums, counts), 0.0) * self.cu_on[cus]
+
+    def cost(self):
+        """
+        Returns the summed DU and CU power of the current assignment over the horizon (RU
+        power does not depend on the assignment).
+        """
+        cus = np.arange(self.num_cus + 1)
+        return float(self._du_cost(self.du_sums, self.du_counts).sum() + self._cu_cost(self.cu_sums, self.cu_counts, cus).sum())
+
+    def move_deltas(self, ru):
+        """
+        Returns the cost change of moving an RU to every DU (inf for its own DU and for DUs
+        or CUs at their limit). An RU without a DU is placed instead of moved.
+        """
+        A, n = self.du_sums, self.du_counts
+        total = self.ru_totals[ru]
+        source = self.ru_parent[ru]
+        cus = self.du_parent
+
+        # Destination DUs and their CUs
+        deltas = self._du_cost(A + total, n + 1) - self._du_cost(A, n)
+        mean_change = self._du_mean(A + total, n + 1) - self._du_mean(A, n)
+        cu_sums = self.cu_sums[cus] + mean_change
+        cu_counts = self.cu_counts[cus] + (n == 0)
+
+        if source >= 0:
+            source_cu = cus[source]
+            source_sum, source_count = A[source] - total, n[source] - 1
+            deltas += self._du_cost(source_sum, source_count) - self._du_cost(A[source], n[source])
+            source_mean_change = self._du_mean(source_sum, source_count) - A[source] / n[source]
+            source_deactivated = float(source_count == 0)
+
+            same_cu = cus == source_cu
+            cu_sums[same_cu] += source_mean_change
+            cu_counts[same_cu] -= source_deactivated
+            # Destinations under another CU also change the source CU
+            other = self._cu_cost(self.cu_sums[source_cu] + source_mean_change,
+                                  self.cu_counts[source_cu] - source_deactivated, source_cu) \
+                - self._cu_cost(self.cu_sums[source_cu], self.cu_counts[source_cu], source_cu)
+            deltas += np.where(same_cu, 0.0, other)
+            deltas[source] = np.inf
+
+        deltas += self._cu_cost(cu_sums, cu_counts, cus) - self._cu_cost(self.cu_sums[cus], self.cu_counts[cus], cus)
+        if self.max_rus_per_du is not None:
+            deltas[n + 1 > self.max_rus_per_du] = np.inf
+        if self.max_dus_per_cu is not None:
+            # Switching on a DU must not exceed its CU's limit
+            deltas[(n == 0) & (self.cu_counts[cus] + 1 > self.max_dus_per_cu) & (cus < self.num_cus)] = np.inf
+        return deltas
+
+    def fits(self, ru, du):
+        """
+        Returns True if the DU can carry the RU's load at every time step.
+        """
+        return self.du_capacity is None or float((self.du_loads[du] + self.ru_loads[ru]).max()) <= self.du_capacity + 1e-9
+
+    def move(self, ru, du):
+        """
+        Moves (or places) an RU to a DU and updates the DU and CU sums.
+        """
+        total = self.ru_totals[ru]
+        for node, sign in ((self.ru_parent[ru], -1), (du, 1)):
+            if node < 0:
+                continue
+            cu = self.du_parent[node]
+            old_mean = self._du_mean(self.du_sums[node], self.du_counts[node])
+            was_active = self.du_counts[node] > 0
+            self.du_sums[node] += sign * total
+            self.du_counts[node] += sign
+            self.du_loads[node] += sign * self.ru_loads[ru]
+            self.cu_sums[cu] += self._du_mean(self.du_sums[node], self.du_counts[node]) - old_mean
+            self.cu_counts[cu] += int(self.du_counts[node] > 0) - int(was_active)
+        self.ru_parent[ru] = du
+
+    def best_move(self, ru, allow_opening=True):
+        """
+        Returns (delta, DU) of the best feasible move of an RU, or (inf, -1) if there is none.
+        """
+        deltas = self.move_deltas(ru)
+        if not allow_opening:
+            deltas[self.du_counts == 0] = np.inf
+        for du in np.argsort(deltas, kind="stable"):
+            if not np.isfinite(deltas[du]):
+                break
+            if self.fits(ru, du):
+                return float(deltas[du]), int(du)
+        return np.inf, -1
+
+    def greedy(self):
+        """
+        Builds an assignment from scratch: RUs in decreasing order of peak utilization are
+        placed on the DU where they add the least cost (first-fit decreasing packing).
+        """
+        ru_parent = np.array(self.ru_parent)
+        ru_parent[self.rus] = -1
+        self.load_assignment(ru_parent, self.du_parent_columns())
+
+        for ru in self.rus[np.argsort(-self.ru_loads[self.rus].max(axis=1), kind="stable")]:
+            _, du = self.best_move(ru)
+            if du < 0:
+                raise ValueError(f"RU {self.topology_index.ru_ids[ru]} does not fit on any DU.")
+            self.move(ru, du)
+
+    def local_search(self, max_passes=20):
+        """
+        Applies improving single-RU moves and closes DUs whose RUs all fit on the other
+        switched on DUs, until no move improves the cost. Returns the number of moves.
+        """
+        moves = 0
+        for _ in range(max_passes):
+            improved = False
+            for ru in self.rus:
+                delta, du = self.best_move(ru)
+                if delta < -MIN_IMPROVEMENT:
+                    self.move(ru, du)
+                    moves += 1
+                    improved = True
+
+            # Try to empty the DUs with the fewest RUs
+            for du in np.argsort(self.du_counts, kind="stable"):
+                if self.du_counts[du] == 0:
+                    continue
+                rus = np.flatnonzero(self.ru_parent == du)
+                undo = []
+                total_delta = 0.0
+                for ru in rus:
+                    deltas = self.move_deltas(ru)
+                    deltas[du] = np.inf
+                    deltas[self.du_counts == 0] = np.inf
+                    target = next((int(b) for b in np.argsort(deltas, kind="stable")
+                                   if np.isfinite(deltas[b]) and self.fits(ru, b)), -1)
+                    if target < 0:
+                        break
+                    total_delta += deltas[target]
+                    self.move(ru, target)
+                    undo.append(ru)
+                if len(undo) == len(rus) and total_delta < -MIN_IMPROVEMENT:
+                    moves += len(undo)
+                    improved = True
+                else:
+                    for ru in reversed(undo):
+                        self.move(ru, du)
+
+            if not improved:
+                break
+        return moves
+
+    def cu_move_delta(self, du, cu):
+        """
+        Returns the cost change of moving a switched on DU to another CU.
+        """
+        source = self.du_parent[du]
+        mean = self.du_sums[du] / self.du_counts[du]
+        return float(
+            self._cu_cost(self.cu_sums[source] - mean, self.cu_counts[source] - 1, source)
+            - self._cu_cost(self.cu_sums[source], self.cu_counts[source], source)
+            + self._cu_cost(self.cu_sums[cu] + mean, self.cu_counts[cu] + 1, cu)
+            - self._cu_cost(self.cu_sums[cu], self.cu_counts[cu], cu))
+
+    def move_du(self, du, cu):
+        """
+        Moves a switched on DU to another CU and updates the CU sums.
+        """
+        mean = self.du_sums[du] / self.du_counts[du]
+        self.cu_sums[self.du_parent[du]] -= mean
+        self.cu_counts[self.du_parent[du]] -= 1
+        self.cu_sums[cu] += mean
+        self.cu_counts[cu] += 1
+        self.du_parent[du] = cu
+
+    def best_du_move(self, du, allow_opening=True):
+        """
+        Returns (delta, CU) of the best move of a switched on DU, or (inf, -1) if there is none.
+        """
+        deltas = [
+            self.cu_move_delta(du, cu) if cu != self.du_parent[du]
+            and (allow_opening or self.cu_counts[cu] > 0)
+            and (self.max_dus_per_cu is None or self.cu_counts[cu] + 1 <= self.max_dus_per_cu) else np.inf
+            for cu in range(self.num_cus)
+        ]
+        cu = int(np.argmin(deltas)) if deltas else -1
+        return (deltas[cu], cu) if cu >= 0 and np.isfinite(deltas[cu]) else (np.inf, -1)
+
+    def optimize_cus(self, max_passes=20):
+        """
+        Re-homes switched on DUs to other CUs and closes CUs whose DUs all fit on the other
+        switched on CUs (within max_dus_per_cu), until no move lowers the cost. Returns the
+        number of moves.
+        """
+        moves = 0
+        for _ in range(max_passes):
+            improved = False
+            for du in np.flatnonzero((self.du_counts > 0) & (self.du_parent < self.num_cus)):
+                delta, cu = self.best_du_move(du)
+                if delta < -MIN_IMPROVEMENT:
+                    self.move_du(du, cu)
+                    moves += 1
+                    improved = True
+
+            # Try to empty the CUs with the fewest DUs
+            for cu in np.argsort(self.cu_counts[:self.num_cus], kind="stable"):
+                if self.cu_counts[cu] == 0:
+                    continue
+                dus = np.flatnonzero((self.du_parent == cu) & (self.du_counts > 0))
+                undo = []
+                total_delta = 0.0
+                for du in dus:
+                    delta, target = self.best_du_move(du, allow_opening=False)
+                    if target < 0:
+                        break
+                    total_delta += delta
+                    self.move_du(du, target)
+                    undo.append(du)
+                if len(undo) == len(dus) and total_delta < -MIN_IMPROVEMENT:
+                    moves += len(undo)
+                    improved = True
+                else:
+                    for du in reversed(undo):
+                        self.move_du(du, cu)
+
+            if not improved:
+                break
+        return moves
+
+    def du_parent_columns(self):
+        """
+        Returns the CU column of every DU, with -1 for DUs without a CU.
+        """
+        return np.where(self.du_parent < self.num_cus, self.du_parent, -1)
+
+    def is_feasible(self):
+        """
+        Returns whether the current assignment respects the capacity limits.
+        """
+        return ((self.du_capacity is None or self.du_loads.max(initial=0) <= self.du_capacity + 1e-9)
+                and (self.max_rus_per_du is None or self.du_counts.max(initial=0) <= self.max_rus_per_du)
+                and (self.max_dus_per_cu is None or self.cu_counts[:self.num_cus].max(initial=0) <= self.max_dus_per_cu))
+
+    def optimize(self, max_passes=20, reassign_cus=True):
+        """
+        Runs the greedy construction and the local search, keeps the better of that and the
+        improved current assignment, and optionally re-homes DUs to CUs. Returns
+        {"ru_to_du", "du_to_cu", "ru_moves", "du_moves", "active_dus", "active_cus"}.
+        The greedy packing can fail on tight capacities; then the improved current
+        assignment is kept, and a ValueError is only raised if that is not feasible either.
+        """
+        original_ru_parent = np.array(self.topology_index.ru_parent)
+
+        # Local search from the current assignment (if it is feasible) ...
+        candidates = []
+        if self.is_feasible():
+            self.local_search(max_passes)
+            candidates.append((self.cost(), self.ru_parent.copy()))
+        # ... and from a greedy packing
+        try:
+            self.greedy()
+        except ValueError as e:
+            if not candidates:
+                raise ValueError(f"{e} The current assignment exceeds the capacity limits as well.")
+        else:
+            self.local_search(max_passes)
+            candidates.append((self.cost(), self.ru_parent.copy()))
+
+        _, ru_parent = min(candidates, key=lambda candidate: candidate[0])
+        self.load_assignment(ru_parent, self.topology_index.du_parent)
+        du_moves = self.optimize_cus(max_passes) if reassign_cus else 0
+
+        return {
+            "ru_to_du": self.ru_parent.copy(),
+            "du_to_cu": self.du_parent_columns(),
+            "ru_moves": int((self.ru_parent != original_ru_parent).sum()),
+            "du_moves": du_moves,
+            "active_dus": int((self.du_counts > 0).sum()),
+            "active_cus": int((self.cu_counts[:self.num_cus] > 0).sum()),
+        }
+
+def optimize_assignment(topology, utilization_source, du_capacity=None, max_rus_per_du=None, max_dus_per_cu=None,
+                        reassign_cus=True, max_passes=20, use_cache=True):
+    """
+    Optimizes the RU -> DU and DU -> CU assignment of a topology for an RU utilization CSV
+    file, store folder or (timestamps, values, ru_node_ids) tuple.
+
+    Returns the result of AssignmentOptimizer.optimize with the assignments as node IDs
+    ("ru_to_du_ids", "du_to_cu_ids") and the exact energy (Wh) of the power model before
+    ("baseline_energy") and after ("energy", "energy_saved").
+    """
+    _, network_tree, topology_index = load_topology(topology, use_cache)
+    timestamps, ru_utilization_values, ru_node_ids = load_utilization_source(utilization_source)
+    if list(topology_index.ru_ids) != list(ru_node_ids):
+        topology_index = compile_topology(network_tree, ru_node_ids)
+
+    optimizer = AssignmentOptimizer(topology_index, ru_utilization_values, du_capacity, max_rus_per_du, max_dus_per_cu)
+    result = optimizer.optimize(max_passes, reassign_cus)
+
+    simulator = PolicySimulator(topology_index, ru_utilization_values, step_hours(timestamps))
+    evaluation = simulator.evaluate({"ru_to_du": result["ru_to_du"], "du_to_cu": result["du_to_cu"]})
+    result.update({
+        "ru_to_du_ids": {topology_index.ru_ids[ru]: topology_index.du_ids[du]
+                         for ru, du in enumerate(result["ru_to_du"].tolist()) if du >= 0},
+        "du_to_cu_ids": {topology_index.du_ids[du]: topology_index.cu_ids[cu]
+                         for du, cu in enumerate(result["du_to_cu"].tolist()) if cu >= 0 and optimizer.du_counts[du] > 0},
+        "baseline_energy": simulator.baseline["energy"],
+        "energy": evaluation["energy"],
+        "energy_saved": evaluation["energy_saved"],
+    })
+    return result
@@ -0,0 +1,171 @@
+import csv
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from ..csvFileGenerator import BASELINE_UTILIZATIONS, get_start_of_day
+from ..ScenarioGenerator import iter_scenario_chunks
+from .PlotRenderer import render_figures, result_figures
+from .PowerPipeline import load_store_outputs, load_topology, run_pipeline_chunked
+
+logger = logging.getLogger(__name__)
+
+# Columns of the comparison table, in order
+COMPARISON_COLUMNS = [
+    "topology", "scenario", "num_rus", "num_dus", "num_cus", "num_timestamps",
+    "energy_wh", "mean_power", "peak_power", "error",
+]
+
+def expand_topologies(patterns):
+    """
+    Expands a list of topology paths and glob patterns (e.g. generatedTopologies/*.json)
+    into a list of files, keeping the given order and dropping duplicates.
+    """
+    topologies = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        topologies += [match for match in matches if match not in topologies]
+    return topologies
+
+def topology_name(topology):
+    """
+    Returns the output namespace of a topology file, e.g. "nt1" for generatedTopologies/nt1.json.
+    """
+    return os.path.splitext(os.path.basename(topology))[0]
+
+def default_scenario(seed=0, num_intervals=24, step=timedelta(hours=1)):
+    """
+    Returns a generated scenario description for run_batch.
+    """
+    return {"name": f"seed-{seed}", "seed": seed, "num_intervals": num_intervals, "step": step}
+
+def _energy_wh(summary, step):
+    if summary["num_timestamps"] == 0:
+        return 0.0
+    if step is None:
+        # Utilization files: take the average spacing of the timestamps as the step
+        if summary["num_timestamps"] < 2:
+            return 0.0
+        step = (summary["end"] - summary["start"]) / (summary["num_timestamps"] - 1)
+    return summary["total_power_sum"] * (step / timedelta(hours=1))
+
+def _run_one(job):
+    """
+    Runs one (topology, scenario) pair through the streaming pipeline and returns its
+    comparison table row. Errors are reported in the row instead of stopping the batch.
+    """
+    topology, scenario, output_dir, store_outputs, chunk_size, use_cache = job
+    row = {"topology": topology_name(topology), "scenario": scenario["name"], "error": None}
+
+    try:
+        _, _, topology_index = load_topology(topology, use_cache)
+        if "utilization" in scenario:
+            utilization_source = scenario["utilization"]
+            step = None
+        else:
+            step = scenario.get("step", timedelta(hours=1))
+            utilization_source = iter_scenario_chunks(
+                topology_index.ru_ids, scenario.get("num_intervals", 24), step, scenario.get("start"),
+                scenario.get("seed"), scenario.get("profile", BASELINE_UTILIZATIONS), chunk_size)
+
+        csv_output_dir = store_output_dir = None
+        if output_dir is not None:
+            namespace = os.path.join(output_dir, row["topology"], scenario["name"])
+            csv_output_dir = os.path.join(namespace, "CSVfileOutputs")
+            if store_outputs:
+                store_output_dir = os.path.join(namespace, "store")
+
+        summary = run_pipeline_chunked(
+            topology, utilization_source, chunk_size=chunk_size, csv_output_dir=csv_output_dir,
+            use_cache=use_cache, store_output_dir=store_output_dir)
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+
+    num_timestamps = summary["num_timestamps"]
+    row.update({
+        "num_rus": len(topology_index.ru_ids),
+        "num_dus": len(topology_index.du_ids),
+        "num_cus": len(topology_index.cu_ids),
+        "num_timestamps": num_timestamps,
+        "energy_wh": round(_energy_wh(summary, step), 2),
+        "mean_power": round(summary["total_power_sum"] / num_timestamps, 2) if num_timestamps else None,
+        "peak_power": summary["peak_total_power"],
+    })
+    return row
+
+def run_batch(topologies, scenarios=None, output_dir=None, workers=None, store_outputs=False, chunk_size=1440,
+              use_cache=True, plots=False):
+    """
+    Runs every topology against every scenario over a pool of workers processes (all cores
+    by default) and returns the comparison table as a list of rows, in input order.
+
+    topologies are JSON files or glob patterns. A scenario is a dictionary with a "name" and
+    either a "utilization" CSV file/store folder or ScenarioGenerator parameters ("seed",
+    "num_intervals", "step", "start", "profile"); the default is default_scenario().
+    With output_dir, every run writes its CSV outputs to <output_dir>/<topology>/<scenario>/
+    (and its store outputs too if store_outputs), and the table is saved to
+    <output_dir>/comparison.csv. With plots, the plots of every run are rendered to
+    <output_dir>/<topology>/<scenario>/plotOutputs from its store outputs once all runs are
+    done, over one pool of workers.
+    """
+    topologies = expand_topologies(topologies)
+    if not topologies:
+        raise ValueError("No topology files given.")
+    if plots and output_dir is None:
+        raise ValueError("Plots need an output directory.")
+    store_outputs = store_outputs or plots
+    if scenarios is None:
+        scenarios = [default_scenario()]
+
+    # All generated scenarios share the same start, even if the batch runs past midnight
+    start = get_start_of_day()
+    scenarios = [scenario if "utilization" in scenario or scenario.get("start") else {**scenario, "start": start}
+                 for scenario in scenarios]
+
+    jobs = [(topology, scenario, output_dir, store_outputs, chunk_size, use_cache)
+            for topology in topologies for scenario in scenarios]
+    if workers == 1:
+        rows = [_run_one(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(_run_one, jobs))
+
+    if output_dir is not None:
+        save_comparison(rows, os.path.join(output_dir, "comparison.csv"))
+    if plots:
+        specs = []
+        for row in rows:
+            if row["error"] is None:
+                namespace = os.path.join(output_dir, row["topology"], row["scenario"])
+                specs += result_figures(load_store_outputs(os.path.join(namespace, "store")),
+                                        os.path.join(namespace, "plotOutputs"))
+        render_figures(specs, workers)
+        logger.info("Rendered %d plots", len(specs))
+    return rows
+
+def save_comparison(rows, filename):
+    """
+    Writes the comparison table to a CSV file.
+    """
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=COMPARISON_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    logger.info("Comparison table saved to %s", filename)
+
+def format_comparison(rows):
+    """
+    Formats the comparison table as aligned text, one line per run. Failed runs are listed
+    with their error after the table.
+    """
+    header = ["Topology", "Scenario", "RUs", "DUs", "CUs", "Timestamps", "Energy (Wh)", "Mean Power (W)", "Peak Power (W)"]
+    lines = [header] + [[str(row[column]) for column in COMPARISON_COLUMNS[:-1]] for row in rows if row["error"] is None]
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+
+    text = ["  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip() for line in lines]
+    text += [f"{row['topology']} / {row['scenario']} failed: {row['error']}" for row in rows if row["error"] is not None]
+    return "\n".join(text)
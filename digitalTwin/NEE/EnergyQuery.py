@@ -0,0 +1,143 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from ..TimeSeriesStore import is_series_store, to_datetime64
+from ..TopologyIndex import compile_topology
+from .EnergyResampler import sample_edges
+from .HierarchyPowerCalculator import aggregate_sum
+from .PowerPipeline import load_store_outputs, load_topology, run_pipeline
+
+# Node kind -> (node IDs key, power key) of the pipeline results
+NODE_KINDS = [
+    ("RU", "ru_node_ids", "ru_power"),
+    ("DU", "du_node_ids", "du_power"),
+    ("CU", "cu_node_ids", "cu_power"),
+    ("Tower", "tower_ids", "tower_power"),
+    ("O-Cloud", "o_cloud_ids", "o_cloud_power"),
+    ("Near-RT-RIC", "near_rt_ric_ids", "near_rt_ric_power"),
+    ("SMO", "smo_ids", "smo_power"),
+]
+
+def _cumulative_energy(power, hours):
+    """
+    Returns the (T+1 x N) running energy (Wh) of a (T x N) power array whose samples last
+    hours (T,) each; row i is the energy of the first i timestamps, so any time window is
+    the difference of two rows.
+    """
+    power = np.asarray(power, dtype=float)
+    cumulative = np.zeros((power.shape[0] + 1,) + power.shape[1:])
+    np.cumsum(power * hours.reshape((-1,) + (1,) * (power.ndim - 1)), axis=0, out=cumulative[1:])
+    return cumulative
+
+class EnergyQuery:
+    """
+    Answers energy queries (node, subtree, site, network) over time windows of computed
+    pipeline results.
+
+    The power series are turned into running energy sums along time once, for every node
+    and for every DU and CU subtree (the node plus everything below it in the RU -> DU -> CU
+    tree), so a query costs a binary search for the window and one subtraction per node,
+    independent of the length of the window or the size of the subtree. Tower and O-Cloud
+    power already includes the hosted nodes, so their energy is the site / O-Cloud energy.
+
+    Every sample counts as constant power until the next timestamp, as in
+    EnergyResampler.integrate, so irregular series are weighted by their spacing. The last
+    sample lasts step hours (by default the series' step, see EnergyResampler.sample_edges).
+    """
+    def __init__(self, topology_index, results, step=None):
+        edges = sample_edges(results["timestamps"], None if step is None else timedelta(hours=step))
+        hours = np.diff(np.asarray(edges, dtype="datetime64[us]").astype(np.int64)) / 3.6e9  # Hours every sample lasts
+        self.elapsed_hours = np.concatenate([[0.0], np.cumsum(hours)])
+        self.timestamps = to_datetime64(results["timestamps"])
+
+        self.node_energy = {}     # Kind -> (T+1 x N) running energy of the nodes themselves
+        self.subtree_energy = {}  # Kind -> (T+1 x N) running energy of the nodes' subtrees
+        self.columns = {}         # Node ID -> (kind, column)
+        for kind, ids_key, power_key in NODE_KINDS:
+            if power_key not in results:
+                continue
+            self.node_energy[kind] = _cumulative_energy(results[power_key], hours)
+            self.columns.update({node_id: (kind, column) for column, node_id in enumerate(results[ids_key])})
+        self.subtree_energy.update(self.node_energy)
+
+        if "DU" in self.node_energy:
+            du_subtree_power = results["du_power"] + aggregate_sum(results["ru_power"], topology_index.ru_to_du)
+            self.subtree_energy["DU"] = _cumulative_energy(du_subtree_power, hours)
+            if "CU" in self.node_energy:
+                cu_subtree_power = results["cu_power"] + aggregate_sum(du_subtree_power, topology_index.du_to_cu)
+                self.subtree_energy["CU"] = _cumulative_energy(cu_subtree_power, hours)
+
+        total_power = sum(results[power_key].sum(axis=1) for _, _, power_key in NODE_KINDS[:3])
+        self.total_energy_sums = _cumulative_energy(total_power, hours)
+        self.network_energy_sums = (_cumulative_energy(results["network_total_power"], hours)
+                                    if "network_total_power" in results else self.total_energy_sums)
+
+    def window(self, start=None, end=None):
+        """
+        Returns the (first, last) rows of the time window [start, end); None is open-ended.
+        """
+        first = 0 if start is None else int(np.searchsorted(self.timestamps, to_datetime64([start])[0], side="left"))
+        last = len(self.timestamps) if end is None else int(np.searchsorted(self.timestamps, to_datetime64([end])[0], side="left"))
+        return first, max(first, last)
+
+    def energy(self, node_id, start=None, end=None, subtree=True):
+        """
+        Returns the energy (Wh) of a node between start and end, including its subtree
+        unless subtree is False.
+        """
+        if node_id not in self.columns:
+            raise ValueError(f"Unknown node: {node_id}")
+        kind, column = self.columns[node_id]
+        cumulative = (self.subtree_energy if subtree else self.node_energy)[kind]
+        first, last = self.window(start, end)
+        return float(cumulative[last, column] - cumulative[first, column])
+
+    def energies(self, kind, start=None, end=None, subtree=True):
+        """
+        Returns {node ID: energy (Wh)} of all nodes of a kind ("RU", "DU", "CU", "Tower",
+        "O-Cloud", ...) between start and end, e.g. the energy per site for "Tower".
+        """
+        if kind not in self.node_energy:
+            raise ValueError(f"No {kind} nodes in the results.")
+        cumulative = (self.subtree_energy if subtree else self.node_energy)[kind]
+        first, last = self.window(start, end)
+        node_ids = [node_id for node_id, (node_kind, _) in self.columns.items() if node_kind == kind]
+        return dict(zip(node_ids, (cumulative[last] - cumulative[first]).tolist()))
+
+    def total_energy(self, start=None, end=None, include_overhead=False):
+        """
+        Returns the RU + DU + CU energy (Wh) between start and end, or the network energy
+        including towers, O-Clouds, Near-RT RIC and SMO if include_overhead.
+        """
+        cumulative = self.network_energy_sums if include_overhead else self.total_energy_sums
+        first, last = self.window(start, end)
+        return float(cumulative[last] - cumulative[first])
+
+    def mean_power(self, node_id, start=None, end=None, subtree=True):
+        """
+        Returns the mean power (W) of a node (and its subtree) between start and end.
+        """
+        first, last = self.window(start, end)
+        if last == first:
+            return 0.0
+        return self.energy(node_id, start, end, subtree) / (self.elapsed_hours[last] - self.elapsed_hours[first])
+
+def load_energy_query(topology, source, use_cache=True, power_models=None):
+    """
+    Returns an EnergyQuery for a topology and either the results of run_pipeline, a
+    store_output_dir written by run_pipeline, or an RU utilization CSV file / store folder
+    (which is run through the pipeline first).
+    """
+    if isinstance(source, dict):
+        results = source
+    elif isinstance(source, (str, os.PathLike)) and is_series_store(os.path.join(source, "ru_power")):
+        results = load_store_outputs(source)
+    else:
+        results = run_pipeline(topology, source, use_cache=use_cache, power_models=power_models)
+
+    _, network_tree, topology_index = load_topology(topology, use_cache)
+    if list(topology_index.ru_ids) != list(results["ru_node_ids"]) or list(topology_index.du_ids) != list(results["du_node_ids"]):
+        topology_index = compile_topology(network_tree, results["ru_node_ids"], results["du_node_ids"])
+    return EnergyQuery(topology_index, results)
@@ -0,0 +1,196 @@
+import re
+
+import numpy as np
+
+from ..ScenarioGenerator import parse_duration
+from ..TimeSeriesStore import TimeAxis, to_datetime64
+
+MONTH_PATTERN = re.compile(r"^\s*(\d+)?\s*(?:month|months|mo)\s*$")
+
+# Result name -> energy column of the aggregated energy output
+ENERGY_COLUMNS = [
+    ("ru_total_power", "RU Energy (kWh)"),
+    ("du_total_power", "DU Energy (kWh)"),
+    ("cu_total_power", "CU Energy (kWh)"),
+    ("total_power", "Total Energy (kWh)"),
+    ("network_total_power", "Network Total Energy (kWh)"),
+]
+
+def parse_resolution(text):
+    """
+    Parses a bucket resolution: a duration such as "15min", "1h" or "1d" (see
+    ScenarioGenerator.parse_duration), or calendar months such as "month" or "3month".
+    Returns (unit, size): ("us", microseconds) or ("M", months).
+    """
+    match = MONTH_PATTERN.match(str(text))
+    if match:
+        return "M", int(match.group(1) or 1)
+    try:
+        microseconds = int(round(parse_duration(text).total_seconds() * 1e6))
+    except ValueError:
+        microseconds = 0
+    if microseconds <= 0:
+        raise ValueError(f"Invalid resolution: {text!r} (expected e.g. 15min, 1h, 1d or month)")
+    return "us", microseconds
+
+def sample_edges(timestamps, step=None):
+    """
+    Returns the (T+1) datetime64[us] edges of the intervals the samples of a series stand
+    for: sample i covers [t_i, t_i+1) and the last sample lasts step (by default the step
+    of a TimeAxis, or the median spacing of the timestamps, or one hour for a single sample).
+    """
+    if isinstance(timestamps, TimeAxis) and step is None:
+        return np.asarray(TimeAxis(timestamps.start, timestamps.step, len(timestamps) + 1))
+    timestamps = to_datetime64(timestamps)
+    if step is None:
+        step = np.median(np.diff(timestamps)) if len(timestamps) > 1 else np.timedelta64(1, "h")
+    step = np.timedelta64(step, "us") if isinstance(step, np.timedelta64) else \
+        np.timedelta64(int(round(step.total_seconds() * 1e6)), "us")
+    return np.append(timestamps, timestamps[-1] + step) if len(timestamps) else timestamps
+
+def bucket_edges(start, end, resolution):
+    """
+    Returns the datetime64[us] edges of the buckets of a resolution that cover [start, end).
+    Buckets are aligned to the epoch in UTC, so hours start on the hour and days at midnight;
+    month buckets start on the first of a month.
+    """
+    unit, size = parse_resolution(resolution) if isinstance(resolution, str) else resolution
+    start, end = np.datetime64(start, "us"), np.datetime64(end, "us")
+    if unit == "M":
+        first = start.astype("datetime64[M]").astype(np.int64) // size * size
+        last = (end - np.timedelta64(1, "us")).astype("datetime64[M]").astype(np.int64) // size * size + size
+        return np.arange(first, last + 1, size).astype("datetime64[M]").astype("datetime64[us]")
+    first = start.astype(np.int64) // size * size
+    last = -(-end.astype(np.int64) // size) * size
+    return np.arange(first, max(last, first + size) + 1, size).astype("datetime64[us]")
+
+def integrate(timestamps, values, resolution, step=None):
+    """
+    Integrates a (T x N) series over time buckets, taking every sample as constant over its
+    interval (see sample_edges). Buckets smaller than a sample get their share of it, so a
+    series can be both down- and upsampled. Returns (bucket starts, (B x N) integrals in
+    value-hours, (B,) hours of every bucket covered by samples).
+    """
+    values = np.asarray(values, dtype=float).reshape(len(timestamps), -1)
+    if len(timestamps) == 0:
+        return np.array([], dtype="datetime64[us]"), np.zeros((0, values.shape[1])), np.zeros(0)
+    return integrate_intervals(sample_edges(timestamps, step), values, resolution)
+
+def integrate_intervals(edges, values, resolution):
+    """
+    Integrates (T x N) values over time buckets, where sample i is constant over
+    [edges[i], edges[i+1]) for (T+1) datetime64 edges. Returns the same as integrate.
+    """
+    buckets = bucket_edges(edges[0], edges[-1], resolution)
+    edges = np.asarray(edges, dtype="datetime64[us]").astype(np.int64)
+
+    # Running integral at the sample edges; it is linear in between, so it is interpolated at the bucket edges
+    cumulative = np.zeros((len(edges), values.shape[1]))
+    np.cumsum(values * (np.diff(edges) / 3.6e9)[:, None], axis=0, out=cumulative[1:])
+    times = np.clip(buckets.astype(np.int64), edges[0], edges[-1])
+    sample = np.clip(np.searchsorted(edges, times, side="right") - 1, 0, len(edges) - 2)
+    fraction = (times - edges[sample]) / (edges[sample + 1] - edges[sample])
+    at_edges = cumulative[sample] + fraction[:, None] * (cumulative[sample + 1] - cumulative[sample])
+    return buckets[:-1], np.diff(at_edges, axis=0), np.diff(times) / 3.6e9
+
+def _bucket_axis(bucket_starts, resolution):
+    unit, size = parse_resolution(resolution) if isinstance(resolution, str) else resolution
+    if unit == "us" and len(bucket_starts):
+        return TimeAxis(bucket_starts[0], np.timedelta64(size, "us"), len(bucket_starts))
+    return bucket_starts
+
+def energy_series(timestamps, power, resolution, step=None):
+    """
+    Returns (bucket timestamps, (B x N) energy in Wh) of a (T x N) power series in W,
+    e.g. hourly, daily or monthly energy from 15 min power samples.
+    """
+    bucket_starts, energy, _ = integrate(timestamps, power, resolution, step)
+    return _bucket_axis(bucket_starts, resolution), energy
+
+def resample(timestamps, values, resolution, step=None):
+    """
+    Returns (bucket timestamps, (B x N) time-weighted means) of a (T x N) series such as
+    RU utilizations or power. Downsampling averages the samples of each bucket weighted by
+    their overlap; upsampling repeats the covering sample. Power resampled this way keeps
+    its energy. Buckets only partly covered by the series average over the covered part.
+    """
+    bucket_starts, integrals, hours = integrate(timestamps, values, resolution, step)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = integrals / hours[:, None]
+    return _bucket_axis(bucket_starts, resolution), means
+
+def _merge_buckets(bucket_starts, energy, columns, new_bucket_starts, new_energy):
+    # Adds buckets to the bucket_starts/energy lists, summing buckets split between blocks by their start
+    for bucket_start, bucket_energy in zip(new_bucket_starts.tolist(), new_energy):
+        if bucket_start in columns:
+            energy[columns[bucket_start]] = energy[columns[bucket_start]] + bucket_energy
+        else:
+            columns[bucket_start] = len(bucket_starts)
+            bucket_starts.append(bucket_start)
+            energy.append(bucket_energy)
+
+class EnergyAccumulator:
+    """
+    Integrates blocks of a power series (e.g. the blocks of run_pipeline_chunked) into
+    energy buckets, with the same result as energy_series over the whole series whatever
+    the block sizes. Blocks must arrive in time order. The last sample of a block lasts
+    until the first timestamp of the next block, so it is only integrated once that block
+    arrives; the last sample of the series lasts step (by default the step of a TimeAxis
+    or the median spacing of the last block, like sample_edges; for a one-sample block the
+    spacing to the previous sample). Memory is one row per bucket.
+    """
+    def __init__(self, resolution, column_names):
+        self.resolution = parse_resolution(resolution)
+        self.column_names = list(column_names)
+        self.bucket_starts = []
+        self.energy = []
+        self.columns = {}  # Bucket start -> index in bucket_starts
+        self.last_timestamp = None
+        self.last_power = None
+        self.step = None
+
+    def append(self, timestamps, power, step=None):
+        if len(timestamps) == 0:
+            return
+        power = np.asarray(power, dtype=float).reshape(len(timestamps), -1)
+        axis_step = timestamps.step if isinstance(timestamps, TimeAxis) else None
+        timestamps = to_datetime64(timestamps)
+        if step is not None or axis_step is not None:
+            self.step = step if step is not None else axis_step
+        elif len(timestamps) > 1:
+            self.step = np.median(np.diff(timestamps))
+        elif self.last_timestamp is not None:
+            self.step = timestamps[0] - self.last_timestamp
+        if self.last_timestamp is not None:
+            # The pending last sample of the previous block lasts until this block starts
+            timestamps = np.concatenate([[self.last_timestamp], timestamps])
+            power = np.concatenate([self.last_power, power])
+
+        if len(timestamps) > 1:
+            bucket_starts, energy, _ = integrate_intervals(timestamps, power[:-1], self.resolution)
+            _merge_buckets(self.bucket_starts, self.energy, self.columns, bucket_starts, energy)
+        self.last_timestamp = timestamps[-1]
+        self.last_power = power[-1:]
+
+    def result(self):
+        """
+        Returns (bucket timestamps, (B x N) energy in Wh), with the pending last sample
+        integrated over step.
+        """
+        bucket_starts, energy = list(self.bucket_starts), list(self.energy)
+        if self.last_timestamp is not None:
+            last_bucket_starts, last_energy, _ = integrate(
+                self.last_timestamp[None], self.last_power, self.resolution, self.step)
+            _merge_buckets(bucket_starts, energy, dict(self.columns), last_bucket_starts, last_energy)
+        bucket_starts = np.array(bucket_starts, dtype="datetime64[us]")
+        energy = np.array(energy).reshape(len(bucket_starts), len(self.column_names))
+        return _bucket_axis(bucket_starts, self.resolution), energy
+
+def energy_totals(results, resolution):
+    """
+    Returns (bucket timestamps, (B x 5) energy in kWh) of the RU, DU, CU, total and network
+    total power of pipeline results, in the columns of ENERGY_COLUMNS.
+    """
+    power = np.column_stack([results[name] for name, _ in ENERGY_COLUMNS])
+    bucket_timestamps, energy = energy_series(results["timestamps"], power, resolution)
+    return bucket_timestamps, energy / 1e3
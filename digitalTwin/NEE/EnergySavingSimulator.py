@@ -0,0 +1,190 @@
+from datetime import timedelta
+
+import numpy as np
+
+from ..TimeSeriesStore import TimeAxis
+from ..TopologyIndex import aggregation_from_parents, compile_topology
+from .PowerPipeline import load_topology, load_utilization_source
+from .VectorizedPowerModel import (
+    aggregate_mean, calculate_cu_power_batch, calculate_cu_utilizations_batch, calculate_du_power_batch,
+    calculate_du_utilizations_batch, calculate_ru_power_batch)
+
+# Filler constants for sleep mode power consumption
+P_sleep_ru = 20
+P_sleep_DU = 20
+
+def step_hours(timestamps):
+    """
+    Returns the spacing of a series' timestamps in hours (the median difference), used to
+    turn power sums into energy. A single timestamp counts as one hour.
+    """
+    if len(timestamps) < 2:
+        return 1.0
+    if isinstance(timestamps, TimeAxis):
+        return timestamps.step_hours
+    if isinstance(timestamps, np.ndarray):
+        differences = np.diff(timestamps.astype("datetime64[us]")).astype(np.int64) / 3.6e9
+    else:
+        differences = np.array([(b - a) / timedelta(hours=1) for a, b in zip(timestamps[:-1], timestamps[1:])])
+    return float(np.median(differences))
+
+def consolidate_dus(topology_index, max_rus_per_du):
+    """
+    Returns an RU -> DU assignment (DU column per RU) that re-homes the RUs under every CU
+    onto as few of that CU's DUs as possible, with at most max_rus_per_du RUs per DU.
+    RUs of DUs without a CU keep their DU.
+    """
+    ru_parent = np.array(topology_index.ru_parent)
+    for dus in topology_index.cu_children:
+        rus = np.concatenate([topology_index.du_children[du] for du in dus.tolist()] + [np.empty(0, dtype=np.intp)])
+        if -(-len(rus) // max_rus_per_du) > len(dus):
+            raise ValueError(f"{len(rus)} RUs do not fit on {len(dus)} DUs with {max_rus_per_du} RUs per DU.")
+        if len(rus):
+            ru_parent[rus] = dus[np.arange(len(rus)) // max_rus_per_du]
+    return ru_parent
+
+def pool_cus(topology_index, max_dus_per_cu):
+    """
+    Returns a DU -> CU assignment (CU column per DU) that pools all DUs with a CU onto as
+    few CUs as possible, with at most max_dus_per_cu DUs per CU.
+    """
+    du_parent = np.array(topology_index.du_parent)
+    dus = np.flatnonzero(du_parent >= 0)
+    num_cus = -(-len(dus) // max_dus_per_cu)
+    if num_cus > len(topology_index.cu_ids):
+        raise ValueError(f"{len(dus)} DUs do not fit on {len(topology_index.cu_ids)} CUs with {max_dus_per_cu} DUs per CU.")
+    du_parent[dus] = np.arange(len(dus)) // max_dus_per_cu
+    return du_parent
+
+class PolicySimulator:
+    """
+    Scores energy-saving policies against one RU utilization series on a compiled topology.
+
+    A policy is a dictionary with any of:
+        "ru_sleep_threshold"  RUs at or below this utilization sleep and draw P_sleep_ru
+        "du_sleep"            DUs whose RUs all sleep draw P_sleep_DU
+        "ru_to_du"            DU column of every RU (-1 for none), e.g. from consolidate_dus
+        "du_to_cu"            CU column of every DU (-1 for none), e.g. from pool_cus
+        "max_rus_per_du"      shorthand for "ru_to_du": consolidate_dus(topology_index, value)
+        "max_dus_per_cu"      shorthand for "du_to_cu": pool_cus(topology_index, value)
+    DUs and CUs left without children by a re-homing are switched off; ones that had no
+    children to begin with are left as in the baseline, so they are not counted as savings.
+    Sleeping RUs keep their (low) utilization in the DU and CU averages.
+
+    The baseline and the sorted per-sample savings of the original tree are precomputed, so
+    sleep_savings scores any number of thresholds with one binary search each.
+    """
+    def __init__(self, topology_index, ru_utilization_values, step=1.0):
+        self.topology_index = topology_index
+        self.ru_utilizations = np.asarray(ru_utilization_values, dtype=float).reshape(-1, len(topology_index.ru_ids))
+        self.step = step  # Hours between timestamps
+
+        baseline = self._evaluate(topology_index.ru_to_du, topology_index.du_to_cu)
+        self.ru_power = baseline["ru_power"]
+        self.du_power = baseline["du_power"]
+        self.baseline = self._energies(baseline)
+
+        # RU sleep: saving of every sample, sorted by utilization
+        order = np.argsort(self.ru_utilizations, axis=None)
+        self.ru_sorted_utilizations = self.ru_utilizations.ravel()[order]
+        self.ru_cumulative_savings = np.concatenate([[0.0], np.cumsum((self.ru_power.ravel() - P_sleep_ru)[order])])
+
+        # DU sleep: a DU sleeps when its busiest RU sleeps, so sort by the busiest RU
+        ru_to_du = topology_index.ru_to_du
+        has_rus = np.diff(ru_to_du["indptr"]) > 0
+        busiest_ru = np.full(self.du_power.shape, np.inf)
+        if has_rus.any():
+            busiest_ru[:, has_rus] = np.maximum.reduceat(
+                self.ru_utilizations[:, ru_to_du["indices"]], ru_to_du["indptr"][:-1][has_rus], axis=1)
+        order = np.argsort(busiest_ru, axis=None)
+        self.du_sorted_utilizations = busiest_ru.ravel()[order]
+        self.du_cumulative_savings = np.concatenate([[0.0], np.cumsum((self.du_power.ravel() - P_sleep_DU)[order])])
+
+    def _evaluate(self, ru_to_du, du_to_cu, ru_sleep_threshold=None, du_sleep=False):
+        """
+        Returns the (T x N) RU, DU and CU power of a policy.
+        """
+        ru_power = calculate_ru_power_batch(self.ru_utilizations)
+        du_utilizations = calculate_du_utilizations_batch(self.ru_utilizations, ru_to_du)
+        du_power = calculate_du_power_batch(du_utilizations, ru_to_du)
+        cu_utilizations = calculate_cu_utilizations_batch(du_utilizations, du_to_cu)
+        cu_power = calculate_cu_power_batch(cu_utilizations)
+
+        if ru_sleep_threshold is not None:
+            sleeping = self.ru_utilizations <= ru_sleep_threshold
+            ru_power = np.where(sleeping, P_sleep_ru, ru_power)
+            if du_sleep:
+                all_sleeping = aggregate_mean(sleeping.astype(float), ru_to_du) == 1.0
+                du_power = np.where(all_sleeping, P_sleep_DU, du_power)
+
+        return {"ru_power": ru_power, "du_power": du_power, "cu_power": cu_power}
+
+    def _energies(self, power):
+        energies = {f"{name[:2]}_energy": float(power[name].sum()) * self.step for name in ("ru_power", "du_power", "cu_power")}
+        energies["energy"] = energies["ru_energy"] + energies["du_energy"] + energies["cu_energy"]
+        return energies
+
+    def evaluate(self, policy):
+        """
+        Returns the RU, DU, CU and total energy (Wh) of a policy, the energy saved against
+        the baseline and the number of DUs and CUs left switched on.
+        """
+        index = self.topology_index
+        ru_to_du = index.ru_to_du
+        du_to_cu = index.du_to_cu
+        active_dus = np.ones(len(index.du_ids), dtype=bool)
+        active_cus = np.ones(len(index.cu_ids), dtype=bool)
+
+        ru_parent = policy.get("ru_to_du")
+        if ru_parent is None and policy.get("max_rus_per_du"):
+            ru_parent = consolidate_dus(index, policy["max_rus_per_du"])
+        du_parent = policy.get("du_to_cu")
+        if du_parent is None and policy.get("max_dus_per_cu"):
+            du_parent = pool_cus(index, policy["max_dus_per_cu"])
+
+        if ru_parent is not None:
+            ru_to_du = aggregation_from_parents(ru_parent, len(index.du_ids))
+            active_dus = (ru_to_du["num_supported"] > 0) | (index.ru_to_du["num_supported"] == 0)
+        if ru_parent is not None or du_parent is not None:
+            du_parent = np.array(index.du_parent if du_parent is None else du_parent)
+            # Switched-off DUs are not averaged into their CU
+            du_parent[~active_dus] = -1
+            du_to_cu = aggregation_from_parents(du_parent, len(index.cu_ids))
+            active_cus = (du_to_cu["num_supported"] > 0) | (index.du_to_cu["num_supported"] == 0)
+
+        power = self._evaluate(ru_to_du, du_to_cu, policy.get("ru_sleep_threshold"), policy.get("du_sleep", False))
+        power["du_power"] = power["du_power"] * active_dus
+        power["cu_power"] = power["cu_power"] * active_cus
+
+        result = self._energies(power)
+        result["energy_saved"] = self.baseline["energy"] - result["energy"]
+        result["saving_ratio"] = result["energy_saved"] / self.baseline["energy"] if self.baseline["energy"] else 0.0
+        result["active_dus"] = int(active_dus.sum())
+        result["active_cus"] = int(active_cus.sum())
+        return result
+
+    def sleep_savings(self, thresholds, du_sleep=False):
+        """
+        Returns the energy saved (Wh) by RU sleep (and DU sleep) for every threshold on the
+        original tree, equal to evaluate({"ru_sleep_threshold": threshold, ...})["energy_saved"].
+        """
+        thresholds = np.asarray(thresholds, dtype=float)
+        savings = self.ru_cumulative_savings[np.searchsorted(self.ru_sorted_utilizations, thresholds, side="right")]
+        if du_sleep:
+            savings = savings + self.du_cumulative_savings[
+                np.searchsorted(self.du_sorted_utilizations, thresholds, side="right")]
+        return savings * self.step
+
+def simulate_policies(topology, utilization_source, policies, use_cache=True):
+    """
+    Evaluates {policy name: policy} against an RU utilization CSV file, store folder or
+    (timestamps, values, ru_node_ids) tuple and returns {policy name: result} (see
+    PolicySimulator.evaluate). Energy uses the spacing of the series' timestamps.
+    """
+    _, network_tree, topology_index = load_topology(topology, use_cache)
+    timestamps, ru_utilization_values, ru_node_ids = load_utilization_source(utilization_source)
+    if list(topology_index.ru_ids) != list(ru_node_ids):
+        topology_index = compile_topology(network_tree, ru_node_ids)
+
+    simulator = PolicySimulator(topology_index, ru_utilization_values, step_hours(timestamps))
+    return {name: simulator.evaluate(policy) for name, policy in policies.items()}
@@ -0,0 +1,68 @@
+import numpy as np
+
+# Filler constants for the shared infrastructure power consumption
+P_0_TOWER = 300      # Site overhead (rectifiers, climate control, backhaul) in W
+K_TOWER = 0.1        # Site overhead per W of hosted RU power
+P_0_O_CLOUD = 400    # O-Cloud overhead (switching, management) in W
+K_O_CLOUD = 0.3      # O-Cloud cooling overhead per W of hosted DU/CU power
+P_NEAR_RT_RIC = 300
+P_SMO = 500
+
+def aggregate_sum(values, aggregation):
+    """
+    Sums the child columns of a (T x N_child) array for every parent in one pass.
+    Parents without any children get 0.0.
+    """
+    indptr = aggregation["indptr"]
+    counts = np.diff(indptr)
+    nonempty = counts > 0
+
+    sums = np.zeros((values.shape[0], len(counts)))
+    if nonempty.any():
+        # Empty rows are dropped so that every reduceat segment is non-empty
+        sums[:, nonempty] = np.add.reduceat(values[:, aggregation["indices"]], indptr[:-1][nonempty], axis=1)
+    return sums
+
+def calculate_tower_power_batch(ru_power, ru_to_tower):
+    """
+    Returns the (T x N_tower) hosted RU power and site overhead power of every tower.
+    """
+    hosted_power = aggregate_sum(ru_power, ru_to_tower)
+    return hosted_power, P_0_TOWER + K_TOWER * hosted_power
+
+def calculate_o_cloud_power_batch(du_power, cu_power, du_to_o_cloud, cu_to_o_cloud):
+    """
+    Returns the (T x N_O-Cloud) hosted DU/CU power and overhead power of every O-Cloud.
+    """
+    hosted_power = aggregate_sum(du_power, du_to_o_cloud) + aggregate_sum(cu_power, cu_to_o_cloud)
+    return hosted_power, P_0_O_CLOUD + K_O_CLOUD * hosted_power
+
+def evaluate_hierarchy(topology_index, ru_power, du_power, cu_power):
+    """
+    Rolls the RU, DU and CU power up to the towers (sites) and O-Clouds that host them and
+    adds the Near-RT RIC and SMO power. Returns a dictionary of node IDs and (T x N) arrays;
+    tower and O-Cloud power include the hosted nodes' power and the overhead.
+    """
+    num_timestamps = ru_power.shape[0]
+    tower_hosted, tower_overhead = calculate_tower_power_batch(ru_power, topology_index.ru_to_tower)
+    o_cloud_hosted, o_cloud_overhead = calculate_o_cloud_power_batch(
+        du_power, cu_power, topology_index.du_to_o_cloud, topology_index.cu_to_o_cloud)
+    near_rt_ric_power = np.full((num_timestamps, len(topology_index.near_rt_ric_ids)), float(P_NEAR_RT_RIC))
+    smo_power = np.full((num_timestamps, len(topology_index.smo_ids)), float(P_SMO))
+
+    results = {
+        "tower_ids": list(topology_index.tower_ids),
+        "tower_overhead_power": tower_overhead,
+        "tower_power": tower_hosted + tower_overhead,
+        "o_cloud_ids": list(topology_index.o_cloud_ids),
+        "o_cloud_overhead_power": o_cloud_overhead,
+        "o_cloud_power": o_cloud_hosted + o_cloud_overhead,
+        "near_rt_ric_ids": list(topology_index.near_rt_ric_ids),
+        "near_rt_ric_power": near_rt_ric_power,
+        "smo_ids": list(topology_index.smo_ids),
+        "smo_power": smo_power,
+    }
+    results["overhead_total_power"] = (
+        tower_overhead.sum(axis=1) + o_cloud_overhead.sum(axis=1)
+        + near_rt_ric_power.sum(axis=1) + smo_power.sum(axis=1))
+    return results
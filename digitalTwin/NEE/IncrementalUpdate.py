@@ -0,0 +1,132 @@
+import logging
+import os
+
+import numpy as np
+
+from ..Instrumentation import stage
+from ..TopologyDiff import affected_nodes, diff_topologies, is_empty
+from ..TopologyIndex import compile_topology, patch_topology, subtree_index
+from .PowerPipeline import (
+    add_totals, compile_power_models, load_store_outputs, load_topology, load_utilization_source, save_results_to_csv,
+    save_results_to_store)
+from .VectorizedPowerModel import assemble_results, evaluate_power_model
+
+logger = logging.getLogger(__name__)
+
+# (results key, node IDs key) of the per-node series an update patches
+NODE_SERIES = [
+    ("ru_power", "ru_node_ids"),
+    ("du_utilization", "du_node_ids"),
+    ("du_power", "du_node_ids"),
+    ("cu_utilization", "cu_node_ids"),
+    ("cu_power", "cu_node_ids"),
+]
+
+def _patched_series(previous, node_ids, recomputed, recomputed_ids):
+    """
+    Returns a (T x N) array over node_ids with the columns of recomputed_ids taken from
+    recomputed and all other columns copied from the previous series.
+    """
+    values, previous_ids = previous
+    previous_columns = {node_id: column for column, node_id in enumerate(previous_ids)}
+    series = np.empty((recomputed.shape[0], len(node_ids)))
+    recomputed_set = set(recomputed_ids)
+    kept = [(column, previous_columns[node_id]) for column, node_id in enumerate(node_ids) if node_id not in recomputed_set]
+    if kept:
+        columns, previous_columns_kept = map(list, zip(*kept))
+        series[:, columns] = np.asarray(values)[:, previous_columns_kept]
+    columns = {node_id: column for column, node_id in enumerate(node_ids)}
+    series[:, [columns[node_id] for node_id in recomputed_ids]] = recomputed
+    return series
+
+def update_results(results, topology_index, diff, ru_utilization_values, ru_node_ids, power_models=None):
+    """
+    Updates pipeline results for a topology change without evaluating the whole network.
+
+    results were computed for the topology compiled as topology_index (any column order;
+    series are matched by node ID) and the RU utilizations ru_utilization_values, whose
+    columns are ru_node_ids. The diff (see TopologyDiff.diff_topologies) is patched into the
+    index, only the subtrees of the affected CUs and the affected unsupported DUs and RUs
+    (see TopologyDiff.affected_nodes) are evaluated, and every other per-node series is
+    copied. Totals and the tower/O-Cloud rollups are summed again over the patched index.
+    As in a full run on the new topology, removed RUs that still have a utilization series
+    are kept as unsupported RUs. power_models is a PowerModelRegistry, a power model config
+    file or None. Returns (new results, patched index, sub index of the recomputed nodes).
+    """
+    source_columns = {node_id: column for column, node_id in enumerate(ru_node_ids)}
+    # Like compile_topology, removed RUs keep their columns (unsupported) while the utilization series has them
+    diff = {**diff, "removed_nodes": {node_id: kind for node_id, kind in diff["removed_nodes"].items()
+                                      if kind != "RU" or node_id not in source_columns}}
+    patched_index = patch_topology(topology_index, diff)
+    affected = affected_nodes(patched_index, diff)
+    sub_index = subtree_index(
+        patched_index, affected["cu_columns"], affected["du_columns"], affected["ru_columns"])[0]
+
+    missing = [node_id for node_id in patched_index.ru_ids if node_id not in source_columns]
+    if missing:
+        raise ValueError(f"No utilization series for RUs {', '.join(missing[:5])}{' ...' if len(missing) > 5 else ''}")
+    ru_utilization_values = np.asarray(ru_utilization_values)
+    if ru_utilization_values.shape[0] != len(results["timestamps"]):
+        raise ValueError(f"The utilization series has {ru_utilization_values.shape[0]} timestamps, the results "
+                         f"{len(results['timestamps'])}.")
+
+    with stage("incremental_update", rus=len(sub_index.ru_ids), dus=len(sub_index.du_ids), cus=len(sub_index.cu_ids)):
+        if len(sub_index.ru_ids) or len(sub_index.du_ids) or len(sub_index.cu_ids):
+            sub_utilizations = ru_utilization_values[:, [source_columns[node_id] for node_id in sub_index.ru_ids]]
+            sub_results = evaluate_power_model(sub_index, sub_utilizations, compile_power_models(power_models, sub_index))
+        else:
+            # Only unsupported nodes were removed: every remaining series is copied
+            sub_results = {ids_key: [] for _, ids_key in NODE_SERIES}
+            sub_results.update({name: np.empty((len(results["timestamps"]), 0)) for name, _ in NODE_SERIES})
+
+        node_ids = {"ru_node_ids": patched_index.ru_ids, "du_node_ids": patched_index.du_ids,
+                    "cu_node_ids": patched_index.cu_ids}
+        series = {
+            name: _patched_series((results[name], results[ids_key]), node_ids[ids_key], sub_results[name],
+                                  sub_results[ids_key])
+            for name, ids_key in NODE_SERIES
+        }
+        ru_utilizations = ru_utilization_values[:, [source_columns[node_id] for node_id in patched_index.ru_ids]] \
+            if "ru_utilization" in results else None
+        updated = assemble_results(patched_index, ru_utilizations, series["ru_power"], series["du_utilization"],
+                                   series["du_power"], series["cu_utilization"], series["cu_power"])
+        add_totals(updated, results["timestamps"])
+    return updated, patched_index, sub_index
+
+def _load_previous(previous):
+    if isinstance(previous, (str, os.PathLike)):
+        return load_store_outputs(previous)
+    return previous
+
+def update_pipeline(old_topology, new_topology, utilization_source, previous, csv_output_dir=None,
+                    store_output_dir=None, use_cache=True, power_models=None):
+    """
+    Re-runs the pipeline for a new topology version by patching previous results: previous
+    is the results dictionary of run_pipeline or the store output folder it wrote for
+    old_topology and utilization_source. Only the DU/CU subtrees the change touches are
+    evaluated (see update_results). The updated results are written like run_pipeline's
+    and returned together with the diff.
+    """
+    previous = _load_previous(previous)
+    _, old_tree, _ = load_topology(old_topology, use_cache)
+    _, new_tree, _ = load_topology(new_topology, use_cache)
+    timestamps, ru_utilization_values, ru_node_ids = load_utilization_source(utilization_source)
+
+    diff = diff_topologies(old_tree, new_tree)
+    # The old index in the column order of the previous results
+    topology_index = compile_topology(old_tree, previous["ru_node_ids"], previous["du_node_ids"])
+    # An empty diff copies every series, so the requested outputs are still written
+    results, patched_index, sub_index = update_results(
+        previous, topology_index, diff, ru_utilization_values, ru_node_ids, power_models)
+    if is_empty(diff):
+        logger.info("The topologies have the same nodes and links; the previous results are kept.")
+    else:
+        logger.info("Recomputed %d of %d RUs, %d of %d DUs and %d of %d CUs", len(sub_index.ru_ids),
+                    len(patched_index.ru_ids), len(sub_index.du_ids), len(patched_index.du_ids), len(sub_index.cu_ids),
+                    len(patched_index.cu_ids))
+
+    if csv_output_dir is not None:
+        save_results_to_csv(results, csv_output_dir)
+    if store_output_dir is not None:
+        save_results_to_store(results, store_output_dir)
+    return results, diff
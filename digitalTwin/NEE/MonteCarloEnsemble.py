@@ -0,0 +1,150 @@
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+
+import numpy as np
+
+from ..csvFileGenerator import BASELINE_UTILIZATIONS, get_start_of_day
+from ..ScenarioGenerator import generate_utilizations, time_axis
+from ..TimeSeriesStore import CsvSeriesWriter
+from ..TopologyIndex import index_from_arrays, index_to_arrays
+from .PowerPipeline import load_topology
+from .VectorizedPowerModel import evaluate_power_model
+
+logger = logging.getLogger(__name__)
+
+NODE_OUTPUTS = ["ru_power", "du_power", "cu_power"]
+TOTAL_OUTPUTS = ["ru_total_power", "du_total_power", "cu_total_power", "total_power"]
+
+# Memory the realizations of a block of columns may take while its bands are computed
+BAND_BLOCK_BYTES = 64 << 20
+
+def _run_batch(topology_index, seeds, timestamps, profile, per_node):
+    """
+    Generates and evaluates one batch of realizations as a single (B*T x N_RU) array.
+    Returns {output name: (B x T [x N]) array}.
+    """
+    if isinstance(topology_index, dict):
+        # Process pool workers receive the index as plain arrays
+        topology_index = index_from_arrays(topology_index)
+
+    num_rus = len(topology_index.ru_ids)
+    ru_utilizations = np.stack([
+        generate_utilizations(timestamps, num_rus, np.random.default_rng(seed), profile) for seed in seeds])
+
+    results = evaluate_power_model(topology_index, ru_utilizations.reshape(-1, num_rus))
+    results["total_power"] = results["ru_total_power"] + results["du_total_power"] + results["cu_total_power"]
+
+    names = TOTAL_OUTPUTS + (NODE_OUTPUTS if per_node else [])
+    return {name: results[name].reshape((len(seeds), len(timestamps)) + results[name].shape[1:]) for name in names}
+
+def _bands(values, percentiles):
+    """
+    Returns the mean and percentiles of values over the realizations (first axis). The
+    bands are computed for blocks of columns of at most BAND_BLOCK_BYTES, so a memory-mapped
+    array is read one block at a time.
+    """
+    columns = values.reshape(len(values), -1)
+    bands = {name: np.empty(columns.shape[1]) for name in ["mean"] + [f"p{percentile:g}" for percentile in percentiles]}
+    block_size = max(1, BAND_BLOCK_BYTES // (8 * max(1, len(values))))
+    for start in range(0, columns.shape[1], block_size):
+        block = np.asarray(columns[:, start:start + block_size])
+        bands["mean"][start:start + block_size] = block.mean(axis=0)
+        for percentile, band in zip(percentiles, np.percentile(block, percentiles, axis=0)):
+            bands[f"p{percentile:g}"][start:start + block_size] = band
+    # [()] turns the bands of one value per realization (the energy) into scalars
+    return {name: band.reshape(values.shape[1:])[()] for name, band in bands.items()}
+
+def _realization_arrays(batch, num_realizations, spill_dir):
+    """
+    Returns an array per output for all realizations, shaped like the batch's arrays: the
+    per-node outputs are memory-mapped files in spill_dir, the network totals stay in memory.
+    """
+    arrays = {}
+    for name, values in batch.items():
+        shape = (num_realizations,) + values.shape[1:]
+        if name in NODE_OUTPUTS:
+            arrays[name] = np.lib.format.open_memmap(os.path.join(spill_dir, f"{name}.npy"), mode='w+', shape=shape)
+        else:
+            arrays[name] = np.empty(shape)
+    return arrays
+
+def run_ensemble(topology, num_realizations, num_intervals=24, step=timedelta(hours=1), start=None, seed=None,
+                 profile=BASELINE_UTILIZATIONS, percentiles=(5, 50, 95), per_node=False, batch_size=100,
+                 workers=1, use_cache=True, csv_output_dir=None):
+    """
+    Runs num_realizations seeded utilization scenarios (see ScenarioGenerator) through the
+    power model and returns mean/percentile bands instead of the individual realizations.
+
+    Realizations are evaluated in batches of batch_size as one (batch_size*T x N_RU) array,
+    optionally spread over a pool of workers processes. Every realization has its own seed
+    spawned from seed, so the results do not depend on batch_size or workers.
+
+    The percentiles need every realization of every value. The network totals are kept in
+    memory (num_realizations x T floats). With per_node, the per-node outputs are written to
+    temporary memory-mapped files batch by batch instead, which take num_realizations x T x
+    (N_RU + N_DU + N_CU) x 8 bytes of disk (e.g. 7 GB for 1000 daily 15 min realizations of
+    6000 RUs) while memory stays bounded by batch_size and BAND_BLOCK_BYTES.
+
+    The returned dictionary holds, for every output (ru/du/cu_power per node if per_node,
+    ru/du/cu_total_power and total_power), a dictionary of (T [x N]) bands {"mean", "p5", ...},
+    plus the energy (Wh) of every realization and its bands. With csv_output_dir, the network
+    total power bands are written to ensemble_total_power.csv.
+    """
+    _, _, topology_index = load_topology(topology, use_cache)
+    if start is None:
+        start = get_start_of_day()
+    timestamps = time_axis(start, step, num_intervals)
+    seeds = np.random.SeedSequence(seed).spawn(num_realizations)
+    batches = [seeds[first:first + batch_size] for first in range(0, num_realizations, batch_size)]
+
+    results = {
+        "timestamps": timestamps,
+        "num_realizations": num_realizations,
+        "ru_node_ids": list(topology_index.ru_ids),
+        "du_node_ids": list(topology_index.du_ids),
+        "cu_node_ids": list(topology_index.cu_ids),
+    }
+    with tempfile.TemporaryDirectory(prefix="digitalTwin-ensemble-") as spill_dir:
+        with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as executor:
+            if executor is not None:
+                index_arrays = index_to_arrays(topology_index)
+                batch_results = executor.map(
+                    _run_batch, [index_arrays] * len(batches), batches,
+                    [timestamps] * len(batches), [profile] * len(batches), [per_node] * len(batches))
+            else:
+                batch_results = (_run_batch(topology_index, batch, timestamps, profile, per_node) for batch in batches)
+
+            # Every batch is stored as soon as it arrives instead of keeping all batches until the end
+            realizations = None
+            for first, batch_result in zip(range(0, num_realizations, batch_size), batch_results):
+                if realizations is None:
+                    realizations = _realization_arrays(batch_result, num_realizations, spill_dir)
+                for name, values in batch_result.items():
+                    realizations[name][first:first + len(values)] = values
+
+        for name, values in realizations.items():
+            results[name] = _bands(values, percentiles)
+        # Energy of every realization: total power integrated over the scenario
+        results["energy"] = realizations["total_power"].sum(axis=1) * (step / timedelta(hours=1))
+        results["energy_bands"] = _bands(results["energy"], percentiles)
+        # The memory maps have to be closed before their folder is removed
+        del realizations, values
+
+    if csv_output_dir is not None:
+        save_total_power_bands(results, os.path.join(csv_output_dir, "ensemble_total_power.csv"))
+
+    return results
+
+def save_total_power_bands(results, filename):
+    """
+    Writes the network total power bands to a CSV file, one row per timestamp.
+    """
+    bands = results["total_power"]
+    column_names = [name.capitalize() if name == "mean" else name.upper() for name in bands]
+    with CsvSeriesWriter(filename, column_names, decimals=2) as writer:
+        writer.append(results["timestamps"], np.column_stack(list(bands.values())))
+    logger.info("Ensemble total power bands saved to %s", filename)
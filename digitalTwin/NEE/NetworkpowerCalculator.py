@@ -1,103 +1,219 @@
-import csv
-import os
-import matplotlib.pyplot as plt
-
-def read_csv_file(file_path):
-    """
-    Reads a CSV file and returns a list of rows.
-    """
-    try:
-        with open(file_path, mode='r') as file:
-            reader = csv.reader(file)
-            header = next(reader)
-            data = [row for row in reader]
-        return header, data
-    except FileNotFoundError:
-        print(f"File not found: {file_path}")
-        return None, None
-
-def aggregate_power_consumption(ru_data, du_data, cu_data):
-    """
-    Aggregates power consumption from RU, DU, and CU power consumption data.
-    """
-    aggregated_data = []
-
-    for i, ru_row in enumerate(ru_data):
-        timestamp = ru_row[0]
-        ru_power = sum(map(float, ru_row[1:]))
-        du_power = sum(map(float, du_data[i][1:]))
-        cu_power = sum(map(float, cu_data[i][1:]))
-        total_power = ru_power + du_power + cu_power
-        aggregated_data.append([timestamp, round(ru_power, 2), round(du_power, 2), round(cu_power, 2), round(total_power, 2)])
-
-    return aggregated_data
-
-def save_aggregated_data_to_csv(filename, data):
-    """
-    Saves aggregated power consumption data to a CSV file.
-    """
-    headers = ["Timestamp", "RU Power", "DU Power", "CU Power", "Total Power"]
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(headers)
-        writer.writerows(data)
-    print(f"Aggregated data saved to {filename}")
-
-def plot_aggregated_power(data, output_file, show_figure=False):
-    """
-    Plots the aggregated power consumption data.
-    """
-    timestamps = [row[0] for row in data]
-    ru_power = [row[1] for row in data]
-    du_power = [row[2] for row in data]
-    cu_power = [row[3] for row in data]
-    total_power = [row[4] for row in data]
-
-    plt.figure(figsize=(10, 6))
-    plt.plot(timestamps, ru_power, label="RU Power")
-    plt.plot(timestamps, du_power, label="DU Power")
-    plt.plot(timestamps, cu_power, label="CU Power")
-    plt.plot(timestamps, total_power, label="Total Power", linestyle="--", linewidth=2, color="black")
-
-    plt.title("Aggregated Power Consumption Over Time")
-    plt.xlabel("Timestamp")
-    plt.ylabel("Power Consumption (W)")
-    plt.xticks(rotation=45)
-    plt.legend()
-    plt.tight_layout()
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    plt.savefig(output_file)
-    print(f"Aggregated power plot saved to {output_file}")
-    if show_figure:
-        plt.show()
-    plt.close()
-
-def main():
-    # Prompt user for input file paths
-    ru_file = input("Enter the CSV file path for RU power consumption: ").strip()
-    du_file = input("Enter the CSV file path for DU power consumption: ").strip()
-    cu_file = input("Enter the CSV file path for CU power consumption: ").strip()
-
-    # Read data from the input files
-    ru_header, ru_data = read_csv_file(ru_file)
-    du_header, du_data = read_csv_file(du_file)
-    cu_header, cu_data = read_csv_file(cu_file)
-
-    if not (ru_data and du_data and cu_data):
-        print("Failed to read one or more input files.")
-        return
-
-    # Aggregate power consumption data
-    aggregated_data = aggregate_power_consumption(ru_data, du_data, cu_data)
-
-    # Save aggregated data to a CSV file
-    output_csv = "CSVfileOutputs/aggregated_power_consumption.csv"
-    save_aggregated_data_to_csv(output_csv, aggregated_data)
-
-    # Plot aggregated power consumption and display
-    output_plot = "plotOutputs/aggregated_power_consumption_plot.png"
-    plot_aggregated_power(aggregated_data, output_plot, show_figure=True)
-
-if __name__ == "__main__":
-    main()
+import csv
+import heapq
+import itertools
+import math
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from ..TimeSeriesStore import format_timestamps, iter_csv_chunks, parse_timestamps
+
+# How a series without a sample at a merged timestamp is filled (see merge_join)
+FILL_METHODS = ["previous", "interpolate", "zero", "none"]
+
+# Rows parsed, merged and formatted at a time; memory is bounded by this, not the length of the files
+BLOCK_SIZE = 4096
+
+def read_csv_file(file_path):
+    """
+    Reads a CSV file and returns a list of rows.
+    """
+    try:
+        with open(file_path, mode='r') as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            data = [row for row in reader]
+        return header, data
+    except FileNotFoundError:
+        print(f"File not found: {file_path}")
+        return None, None
+
+def _row_sums(values):
+    # cumsum adds the columns left to right like sum(map(float, row)), so totals round the same way
+    return np.cumsum(values, axis=1)[:, -1] if values.shape[1] else np.zeros(len(values))
+
+def iter_power_sums(source, block_size=BLOCK_SIZE):
+    """
+    Yields (timestamp in microseconds since the epoch (UTC), summed power) for every row of
+    a wide "Timestamp,<nodes...>" power CSV file, or of rows as read_csv_file returns them.
+    Rows are parsed in blocks of block_size, so files are never read fully into memory.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        blocks = ((timestamps, values) for timestamps, values, _ in iter_csv_chunks(source, block_size))
+    else:
+        rows = iter(source)
+        blocks = ((parse_timestamps([row[0] for row in block]), np.array([row[1:] for row in block], dtype=float))
+                  for block in iter(lambda: list(itertools.islice(rows, block_size)), []))
+
+    for timestamps, values in blocks:
+        timestamps = np.asarray(timestamps).astype("datetime64[us]").astype(np.int64)
+        yield from zip(timestamps.tolist(), _row_sums(values.reshape(len(timestamps), -1)).tolist())
+
+def _fill(previous, following, timestamp, fill, max_gap):
+    """
+    Returns the value of a series at a timestamp given its last sample at or before the
+    timestamp and its next sample after it (None outside the series).
+    """
+    if previous is not None and previous[0] == timestamp:
+        return previous[1]
+    if fill == "zero":
+        return 0.0
+    if fill == "none" or previous is None or following is None:
+        return math.nan  # Missing, or outside the time span of the series
+    if max_gap is not None and following[0] - previous[0] > max_gap:
+        return math.nan
+    if fill == "previous":
+        return previous[1]
+    return previous[1] + (following[1] - previous[1]) * ((timestamp - previous[0]) / (following[0] - previous[0]))
+
+def merge_join(series, fill="previous", max_gap=None):
+    """
+    Joins any number of time-ordered (timestamp, value) series on their timestamps in one
+    streaming pass (a k-way merge) and yields (timestamp, [value of every series]) for the
+    union of their timestamps, so series of different lengths, gaps and resolutions line up
+    by time instead of by row.
+
+    A series without a sample at a timestamp is filled with fill:
+        "previous"     its last value (sample and hold)
+        "interpolate"  linear between its previous and next samples
+        "zero"         0.0
+        "none"         NaN
+    "previous" and "interpolate" only fill within the time span of a series and across
+    gaps of at most max_gap (in the unit of the timestamps); elsewhere the value is NaN.
+    If a series repeats a timestamp, its last value counts. Memory is one pending sample
+    per series.
+    """
+    if fill not in FILL_METHODS:
+        raise ValueError(f"Unknown fill method: {fill} (expected one of {', '.join(FILL_METHODS)})")
+    iterators = [iter(samples) for samples in series]
+    following = [next(iterator, None) for iterator in iterators]  # Next unconsumed sample of every series
+    previous = [None] * len(iterators)                             # Last consumed sample of every series
+    heap = [(sample[0], index) for index, sample in enumerate(following) if sample is not None]
+    heapq.heapify(heap)
+
+    while heap:
+        timestamp = heap[0][0]
+        while heap and heap[0][0] == timestamp:
+            _, index = heapq.heappop(heap)
+            previous[index] = following[index]
+            following[index] = next(iterators[index], None)
+            if following[index] is not None:
+                if following[index][0] < timestamp:
+                    raise ValueError(f"Series {index} is not sorted by timestamp.")
+                heapq.heappush(heap, (following[index][0], index))
+        yield timestamp, [_fill(previous[index], following[index], timestamp, fill, max_gap)
+                          for index in range(len(iterators))]
+
+def iter_aggregated_rows(sources, fill="previous", max_gap=None, block_size=BLOCK_SIZE):
+    """
+    Merge-joins the summed power of several sources (power CSV files or row lists, see
+    iter_power_sums) on their timestamps and yields [timestamp, power of every source...,
+    total] rows, rounded to 2 decimals. max_gap is a timedelta. Timestamps where a source
+    has no value (see merge_join) are left out.
+    """
+    if isinstance(max_gap, timedelta):
+        max_gap = max_gap // timedelta(microseconds=1)
+    merged = merge_join([iter_power_sums(source, block_size) for source in sources], fill, max_gap)
+
+    for block in iter(lambda: list(itertools.islice(merged, block_size)), []):
+        complete = [(timestamp, values) for timestamp, values in block if not any(map(math.isnan, values))]
+        timestamps = format_timestamps(np.array([timestamp for timestamp, _ in complete], dtype="datetime64[us]"))
+        for timestamp, (_, values) in zip(timestamps, complete):
+            yield [timestamp] + [round(value, 2) for value in values] + [round(sum(values), 2)]
+
+def aggregate_power_consumption(ru_data, du_data, cu_data, fill="previous", max_gap=None):
+    """
+    Aggregates power consumption from RU, DU, and CU power consumption data (files or rows).
+    Rows are matched by timestamp, not by position (see iter_aggregated_rows).
+    """
+    return list(iter_aggregated_rows([ru_data, du_data, cu_data], fill, max_gap))
+
+def aggregate_power_files(files, output_file, column_names=None, fill="previous", max_gap=None):
+    """
+    Streams the merge-join of any number of power CSV files to output_file with one summed
+    power column per file (named after the files by default) and a total. Returns the
+    number of rows written.
+    """
+    if column_names is None:
+        column_names = [os.path.splitext(os.path.basename(file))[0] for file in files]
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    num_rows = 0
+    with open(output_file, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Timestamp"] + list(column_names) + ["Total Power"])
+        for row in iter_aggregated_rows(files, fill, max_gap):
+            writer.writerow(row)
+            num_rows += 1
+    return num_rows
+
+def save_aggregated_data_to_csv(filename, data):
+    """
+    Saves aggregated power consumption data to a CSV file.
+    """
+    headers = ["Timestamp", "RU Power", "DU Power", "CU Power", "Total Power"]
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        writer.writerows(data)
+    print(f"Aggregated data saved to {filename}")
+
+def plot_aggregated_power(data, output_file, show_figure=False):
+    """
+    Plots the aggregated power consumption data.
+    """
+    import matplotlib.pyplot as plt
+
+    timestamps = [row[0] for row in data]
+    ru_power = [row[1] for row in data]
+    du_power = [row[2] for row in data]
+    cu_power = [row[3] for row in data]
+    total_power = [row[4] for row in data]
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(timestamps, ru_power, label="RU Power")
+    plt.plot(timestamps, du_power, label="DU Power")
+    plt.plot(timestamps, cu_power, label="CU Power")
+    plt.plot(timestamps, total_power, label="Total Power", linestyle="--", linewidth=2, color="black")
+
+    plt.title("Aggregated Power Consumption Over Time")
+    plt.xlabel("Timestamp")
+    plt.ylabel("Power Consumption (W)")
+    plt.xticks(rotation=45)
+    plt.legend()
+    plt.tight_layout()
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    plt.savefig(output_file)
+    print(f"Aggregated power plot saved to {output_file}")
+    if show_figure:
+        plt.show()
+    plt.close()
+
+def main():
+    # Prompt user for input file paths
+    ru_file = input("Enter the CSV file path for RU power consumption: ").strip()
+    du_file = input("Enter the CSV file path for DU power consumption: ").strip()
+    cu_file = input("Enter the CSV file path for CU power consumption: ").strip()
+
+    # Aggregate power consumption data, matching the rows of the files by timestamp
+    try:
+        aggregated_data = aggregate_power_consumption(ru_file, du_file, cu_file)
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
+        return
+
+    if not aggregated_data:
+        print("The input files have no timestamps in common.")
+        return
+
+    # Save aggregated data to a CSV file
+    output_csv = "CSVfileOutputs/aggregated_power_consumption.csv"
+    save_aggregated_data_to_csv(output_csv, aggregated_data)
+
+    # Plot aggregated power consumption and display
+    output_plot = "plotOutputs/aggregated_power_consumption_plot.png"
+    plot_aggregated_power(aggregated_data, output_plot, show_figure=True)
+
+if __name__ == "__main__":
+    main()
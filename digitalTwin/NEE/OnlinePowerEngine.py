@@ -0,0 +1,248 @@
+import os
+
+import numpy as np
+
+from .HierarchyPowerCalculator import K_O_CLOUD, K_TOWER, P_0_O_CLOUD, P_0_TOWER, aggregate_sum
+from .PowerModelRegistry import LinearPowerModel, default_power_models, load_power_models
+from .VectorizedPowerModel import evaluate_power_model
+
+def _round(value, decimals):
+    # np.round's rounding (scale, round half to even, unscale), so values match the vectorized model
+    scale = 10.0 ** decimals
+    return round(value * scale) / scale
+
+def _mean_utilization(values):
+    # DUpowerCalculator.round_utilization of the mean of a non-empty list, without the NumPy call overhead
+    return _round(_round(sum(values) / len(values), 9), 2)
+
+def _parent_lists(aggregation, num_children):
+    # Host columns of every child column of a CSR aggregation
+    parents = [[] for _ in range(num_children)]
+    indptr, indices = aggregation["indptr"].tolist(), aggregation["indices"].tolist()
+    for parent in range(len(indptr) - 1):
+        for child in indices[indptr[parent]:indptr[parent + 1]]:
+            parents[child].append(parent)
+    return parents
+
+def _node_power_functions(models, num_supported):
+    """
+    Returns a function utilization -> power for every node, with the node's power model
+    and number of supported children. Linear models are evaluated in plain Python, others
+    through their (T x N) array interface.
+    """
+    functions = []
+    for model, children in zip(models, num_supported):
+        if type(model) is LinearPowerModel:
+            p0, k, k_children, decimals = model.p0, model.k, model.k_children, model.decimals
+            offset = k_children * children if k_children else 0
+            if decimals is None:
+                functions.append(lambda utilization, p0=p0, k=k, offset=offset: p0 + k * utilization + offset)
+            else:
+                functions.append(lambda utilization, p0=p0, k=k, offset=offset, decimals=decimals:
+                                 _round(p0 + k * utilization + offset, decimals))
+        else:
+            functions.append(lambda utilization, model=model, children=children:
+                             float(model(np.array([[utilization]]), np.array([children]))[0, 0]))
+    return functions
+
+class OnlinePowerEngine:
+    """
+    Holds the latest RU/DU/CU utilization and power of a network and updates them per
+    telemetry tick.
+
+    A tick that changes k RUs only recomputes the DUs supporting those RUs, the CUs
+    supporting those DUs and the running totals, so its cost is O(changed nodes) instead
+    of O(network size). State is kept in plain lists because single-element updates are
+    much cheaper on lists than on NumPy arrays.
+
+    power_models is a PowerModelRegistry, a power model config file or None for the
+    calculators' constants. The towers and O-Clouds hosting the changed nodes are updated
+    as well, so network_total_power includes the tower, O-Cloud, Near-RT RIC and SMO power
+    like the network_total_power of run_pipeline; total_power is the RAN (RU + DU + CU) power.
+    """
+    def __init__(self, topology_index, ru_utilizations=None, resync_interval=10000, power_models=None):
+        self.topology_index = topology_index
+        self.du_children = [children.tolist() for children in topology_index.du_children]
+        self.cu_children = [children.tolist() for children in topology_index.cu_children]
+        self.ru_parent = topology_index.ru_parent.tolist()
+        self.du_parent = topology_index.du_parent.tolist()
+
+        if isinstance(power_models, (str, os.PathLike)):
+            power_models = load_power_models(power_models)
+        self.compiled_models = power_models.compile(topology_index) if power_models is not None else None
+        registry = power_models if power_models is not None else default_power_models()
+        self.ru_power_functions = _node_power_functions(
+            registry.models_for("RU", topology_index.ru_ids), [0.0] * len(topology_index.ru_ids))
+        self.du_power_functions = _node_power_functions(
+            registry.models_for("DU", topology_index.du_ids), topology_index.ru_to_du["num_supported"].tolist())
+        self.cu_power_functions = _node_power_functions(
+            registry.models_for("CU", topology_index.cu_ids), topology_index.du_to_cu["num_supported"].tolist())
+
+        # Hosts of every node; a change of hosted power changes the host's overhead by K times as much
+        self.ru_towers = _parent_lists(topology_index.ru_to_tower, len(topology_index.ru_ids))
+        self.du_o_clouds = _parent_lists(topology_index.du_to_o_cloud, len(topology_index.du_ids))
+        self.cu_o_clouds = _parent_lists(topology_index.cu_to_o_cloud, len(topology_index.cu_ids))
+        self.tower_columns = {node_id: column for column, node_id in enumerate(topology_index.tower_ids)}
+        self.o_cloud_columns = {node_id: column for column, node_id in enumerate(topology_index.o_cloud_ids)}
+
+        # Incremental totals accumulate rounding error, so they are recomputed from
+        # scratch every resync_interval ticks
+        self.resync_interval = resync_interval
+        self.ticks_since_resync = 0
+        self.timestamp = None
+
+        if ru_utilizations is None:
+            ru_utilizations = np.zeros(len(topology_index.ru_ids))
+        self.set_utilizations(ru_utilizations)
+
+    def set_utilizations(self, ru_utilizations, timestamp=None):
+        """
+        Replaces the whole RU utilization vector (columns follow topology_index.ru_ids)
+        and recomputes every DU and CU with the vectorized model.
+        """
+        index = self.topology_index
+        results = evaluate_power_model(index, np.asarray(ru_utilizations, dtype=float)[None, :], self.compiled_models)
+
+        self.ru_utilization = results["ru_utilization"][0].tolist()
+        self.ru_power = results["ru_power"][0].tolist()
+        self.du_utilization = results["du_utilization"][0].tolist()
+        self.du_power = results["du_power"][0].tolist()
+        self.cu_utilization = results["cu_utilization"][0].tolist()
+        self.cu_power = results["cu_power"][0].tolist()
+
+        self.ru_total_power = sum(self.ru_power)
+        self.du_total_power = sum(self.du_power)
+        self.cu_total_power = sum(self.cu_power)
+
+        self.tower_hosted_power = aggregate_sum(results["ru_power"], index.ru_to_tower)[0].tolist()
+        self.o_cloud_hosted_power = (aggregate_sum(results["du_power"], index.du_to_o_cloud)
+                                     + aggregate_sum(results["cu_power"], index.cu_to_o_cloud))[0].tolist()
+        self.overhead_total_power = float(results["overhead_total_power"][0])
+
+        self.ticks_since_resync = 0
+        if timestamp is not None:
+            self.timestamp = timestamp
+        return self.total_power
+
+    def resync(self):
+        """
+        Recomputes all derived values from the current RU utilizations.
+        """
+        return self.set_utilizations(self.ru_utilization)
+
+    def update(self, changes, timestamp=None):
+        """
+        Applies a tick of RU utilization changes, given as {RU node ID or column: utilization},
+        and returns the new RAN total power (see network_total_power for the whole network).
+        """
+        ru_columns = self.topology_index.ru_columns
+        changed_dus = set()
+
+        # RU stage
+        for ru, utilization in changes.items():
+            column = ru if isinstance(ru, (int, np.integer)) else ru_columns[ru]
+            if utilization == self.ru_utilization[column]:
+                continue
+            power = self.ru_power_functions[column](utilization)
+            delta = power - self.ru_power[column]
+            self.ru_total_power += delta
+            for tower in self.ru_towers[column]:
+                self.tower_hosted_power[tower] += delta
+                self.overhead_total_power += K_TOWER * delta
+            self.ru_utilization[column] = utilization
+            self.ru_power[column] = power
+            if self.ru_parent[column] >= 0:
+                changed_dus.add(self.ru_parent[column])
+
+        # DU stage, recomputed exactly from the (few) RUs each changed DU supports
+        changed_cus = set()
+        for du in changed_dus:
+            children = self.du_children[du]
+            utilization = _mean_utilization([self.ru_utilization[i] for i in children])
+            if utilization == self.du_utilization[du]:
+                continue
+            power = self.du_power_functions[du](utilization)
+            delta = power - self.du_power[du]
+            self.du_total_power += delta
+            for o_cloud in self.du_o_clouds[du]:
+                self.o_cloud_hosted_power[o_cloud] += delta
+                self.overhead_total_power += K_O_CLOUD * delta
+            self.du_utilization[du] = utilization
+            self.du_power[du] = power
+
+            cu = self.du_parent[du]
+            if cu >= 0:
+                changed_cus.add(cu)
+
+        # CU stage, recomputed from its DUs like the DU stage: a running sum would drift
+        for cu in changed_cus:
+            children = self.cu_children[cu]
+            utilization = _mean_utilization([self.du_utilization[i] for i in children])
+            power = self.cu_power_functions[cu](utilization)
+            delta = power - self.cu_power[cu]
+            self.cu_total_power += delta
+            for o_cloud in self.cu_o_clouds[cu]:
+                self.o_cloud_hosted_power[o_cloud] += delta
+                self.overhead_total_power += K_O_CLOUD * delta
+            self.cu_utilization[cu] = utilization
+            self.cu_power[cu] = power
+
+        if timestamp is not None:
+            self.timestamp = timestamp
+
+        self.ticks_since_resync += 1
+        if self.ticks_since_resync >= self.resync_interval:
+            self.resync()
+        return self.total_power
+
+    @property
+    def total_power(self):
+        return self.ru_total_power + self.du_total_power + self.cu_total_power
+
+    @property
+    def network_total_power(self):
+        return self.total_power + self.overhead_total_power
+
+    @property
+    def tower_power(self):
+        return [P_0_TOWER + (1 + K_TOWER) * hosted for hosted in self.tower_hosted_power]
+
+    @property
+    def o_cloud_power(self):
+        return [P_0_O_CLOUD + (1 + K_O_CLOUD) * hosted for hosted in self.o_cloud_hosted_power]
+
+    def node_power(self, node_id):
+        """
+        Returns the current power consumption of an RU, DU, CU, tower or O-Cloud (hosted
+        nodes' power and overhead).
+        """
+        index = self.topology_index
+        if node_id in index.ru_columns:
+            return self.ru_power[index.ru_columns[node_id]]
+        if node_id in index.du_columns:
+            return self.du_power[index.du_columns[node_id]]
+        if node_id in index.cu_columns:
+            return self.cu_power[index.cu_columns[node_id]]
+        if node_id in self.tower_columns:
+            return P_0_TOWER + (1 + K_TOWER) * self.tower_hosted_power[self.tower_columns[node_id]]
+        if node_id in self.o_cloud_columns:
+            return P_0_O_CLOUD + (1 + K_O_CLOUD) * self.o_cloud_hosted_power[self.o_cloud_columns[node_id]]
+        raise KeyError(f"Unknown node: {node_id}")
+
+    def snapshot(self):
+        """
+        Returns the current per-node values and totals as a dictionary of plain Python values.
+        """
+        index = self.topology_index
+        return {
+            "timestamp": self.timestamp,
+            "ru_power": dict(zip(index.ru_ids, self.ru_power)),
+            "du_power": dict(zip(index.du_ids, self.du_power)),
+            "cu_power": dict(zip(index.cu_ids, self.cu_power)),
+            "ru_total_power": self.ru_total_power,
+            "du_total_power": self.du_total_power,
+            "cu_total_power": self.cu_total_power,
+            "total_power": self.total_power,
+            "overhead_total_power": self.overhead_total_power,
+            "network_total_power": self.network_total_power,
+        }
@@ -0,0 +1,180 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..TimeSeriesStore import to_datetime64
+
+MAX_POINTS = 1000     # About one point per pixel column of a 10 in figure at 100 dpi
+MAX_LINES = 20        # Figures with more nodes show percentile bands and a heatmap instead of lines
+BAND_PERCENTILES = (5, 50, 95)
+
+# (result name, labels (node IDs key or fixed names), plot file, title, y label, line styles)
+FIGURES = [
+    ("ru_utilization", "ru_node_ids", "ru_utilization_plot.png", "Network Utilization Over Time", "Utilization", None),
+    ("ru_power", "ru_node_ids", "ru_power_consumption_plot.png", "Power Consumption of Individual RUs",
+     "Power Consumption (W)", None),
+    ("ru_total_power", ["Total Power"], "ru_total_power_consumption_plot.png", "Total Power Consumption Over Time",
+     "Total Power Consumption (W)", [{"color": "black", "linestyle": "--", "linewidth": 2}]),
+    ("du_utilization", "du_node_ids", "du_utilizations_plot.png", "DU Utilizations Over Time", "Utilization", None),
+    ("du_power", "du_node_ids", "du_power_consumption_plot.png", "DU Power Consumption Over Time",
+     "Power Consumption (W)", None),
+    ("du_total_power", ["Total Power"], "du_total_power_consumption_plot.png", "Total DU Power Consumption Over Time",
+     "Total Power Consumption (W)", [{"color": "red", "linestyle": "--"}]),
+    ("cu_utilization", "cu_node_ids", "cu_utilizations_plot.png", "CU Utilizations Over Time", "Utilization (%)", None),
+    ("cu_power", "cu_node_ids", "cu_power_consumption_plot.png", "CU Power Consumption Over Time",
+     "Power Consumption (W)", None),
+    ("aggregated_power", ["RU Power", "DU Power", "CU Power", "Total Power"], "aggregated_power_consumption_plot.png",
+     "Aggregated Power Consumption Over Time", "Power Consumption (W)",
+     [{}, {}, {}, {"color": "black", "linestyle": "--", "linewidth": 2}]),
+    ("tower_power", "tower_ids", "tower_power_consumption_plot.png", "Tower Power Consumption Over Time",
+     "Power Consumption (W)", None),
+    ("o_cloud_power", "o_cloud_ids", "o_cloud_power_consumption_plot.png", "O-Cloud Power Consumption Over Time",
+     "Power Consumption (W)", None),
+]
+
+def _buckets(num_timestamps, num_buckets):
+    return np.linspace(0, num_timestamps, num_buckets + 1).astype(np.intp)[:-1]
+
+def decimate_minmax(timestamps, values, max_points=MAX_POINTS):
+    """
+    Reduces a (T x N) series to at most max_points rows by keeping the minimum and maximum
+    of every bucket of timestamps, so peaks and dips stay visible. Returns (timestamps, values).
+    """
+    values = np.asarray(values, dtype=float).reshape(len(timestamps), -1)
+    if len(timestamps) <= max_points:
+        return timestamps, values
+
+    starts = _buckets(len(timestamps), max_points // 2)
+    ends = np.append(starts[1:], len(timestamps)) - 1
+    minimums = np.minimum.reduceat(values, starts, axis=0)
+    maximums = np.maximum.reduceat(values, starts, axis=0)
+    decimated_timestamps = np.column_stack([timestamps[starts], timestamps[ends]]).ravel()
+    return decimated_timestamps, np.stack([minimums, maximums], axis=1).reshape(-1, values.shape[1])
+
+def decimate_mean(timestamps, values, max_points=MAX_POINTS):
+    """
+    Reduces a (T x N) series to at most max_points rows of bucket means (for heatmaps).
+    Returns (bucket start timestamps, values).
+    """
+    if len(timestamps) <= max_points:
+        return timestamps, values
+    starts = _buckets(len(timestamps), max_points)
+    counts = np.diff(np.append(starts, len(timestamps)))
+    return timestamps[starts], np.add.reduceat(values, starts, axis=0) / counts[:, None]
+
+def prepare_figure(spec, max_points=MAX_POINTS, max_lines=MAX_LINES):
+    """
+    Reduces a figure spec {"filename", "title", "ylabel", "timestamps", "values" (T x N),
+    "labels", "styles"} to what is drawn: decimated lines for up to max_lines nodes,
+    otherwise percentile bands across the nodes and a node x time heatmap. The result is
+    small, so it is cheap to send to a rendering worker.
+    """
+    timestamps = to_datetime64(spec["timestamps"])
+    values = np.asarray(spec["values"], dtype=float).reshape(len(timestamps), -1)
+    figure = {key: spec[key] for key in ("filename", "title", "ylabel")}
+
+    if values.shape[1] <= max_lines:
+        figure["view"] = "lines"
+        figure["timestamps"], figure["values"] = decimate_minmax(timestamps, values, max_points)
+        figure["labels"] = list(spec["labels"])
+        figure["styles"] = spec.get("styles") or [{}] * values.shape[1]
+        return figure
+
+    # Bands across the nodes; decimation keeps the lowest lower band and highest upper band of every bucket
+    lower = np.column_stack([values.min(axis=1), np.percentile(values, BAND_PERCENTILES[0], axis=1)])
+    median = np.percentile(values, BAND_PERCENTILES[1], axis=1)[:, None]
+    upper = np.column_stack([np.percentile(values, BAND_PERCENTILES[2], axis=1), values.max(axis=1)])
+    figure["view"] = "bands"
+    figure["timestamps"] = timestamps
+    if len(timestamps) > max_points:
+        starts = _buckets(len(timestamps), max_points)
+        figure["timestamps"] = timestamps[starts]
+        lower = np.minimum.reduceat(lower, starts, axis=0)
+        median = decimate_mean(timestamps, median, max_points)[1]
+        upper = np.maximum.reduceat(upper, starts, axis=0)
+    figure["bands"] = {
+        "min": lower[:, 0], f"p{BAND_PERCENTILES[0]}": lower[:, 1], f"p{BAND_PERCENTILES[1]}": median[:, 0],
+        f"p{BAND_PERCENTILES[2]}": upper[:, 0], "max": upper[:, 1],
+    }
+    figure["heatmap_timestamps"], figure["heatmap"] = decimate_mean(timestamps, values, max_points)
+    figure["num_nodes"] = values.shape[1]
+    return figure
+
+def render_figure(figure):
+    """
+    Draws a prepared figure and saves it. Uses matplotlib's Figure directly (Agg canvas),
+    so no GUI backend or pyplot state is involved and nothing blocks on a window.
+    """
+    from matplotlib.figure import Figure
+    import matplotlib.dates as mdates
+
+    os.makedirs(os.path.dirname(figure["filename"]) or ".", exist_ok=True)
+    timestamps = figure["timestamps"].astype("datetime64[us]").astype(object)
+
+    if figure["view"] == "lines":
+        fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot()
+        for column, (label, style) in enumerate(zip(figure["labels"], figure["styles"])):
+            ax.plot(timestamps, figure["values"][:, column], label=label, **style)
+        ax.legend()
+        axes = [ax]
+    else:
+        fig = Figure(figsize=(10, 8), constrained_layout=True)
+        ax, heatmap_ax = fig.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios": [1, 1]})
+        bands = figure["bands"]
+        names = list(bands)
+        ax.fill_between(timestamps, bands[names[0]], bands[names[-1]], alpha=0.2, color="tab:blue", label="min - max")
+        ax.fill_between(timestamps, bands[names[1]], bands[names[3]], alpha=0.4, color="tab:blue",
+                        label=f"{names[1].upper()} - {names[3].upper()}")
+        ax.plot(timestamps, bands[names[2]], color="tab:blue", label=names[2].upper())
+        ax.legend()
+
+        heatmap_timestamps = mdates.date2num(figure["heatmap_timestamps"].astype("datetime64[us]").astype(object))
+        last = heatmap_timestamps[-1] + (heatmap_timestamps[-1] - heatmap_timestamps[-2] if len(heatmap_timestamps) > 1 else 1)
+        image = heatmap_ax.imshow(
+            figure["heatmap"].T, aspect="auto", interpolation="nearest", origin="lower",
+            extent=(heatmap_timestamps[0], last, 0, figure["num_nodes"]))
+        heatmap_ax.xaxis_date()
+        heatmap_ax.set_ylabel("Node")
+        fig.colorbar(image, ax=[ax, heatmap_ax], label=figure["ylabel"])
+        axes = [ax, heatmap_ax]
+
+    axes[0].set_title(figure["title"])
+    axes[0].set_ylabel(figure["ylabel"])
+    axes[-1].set_xlabel("Time")
+    for axis in axes:
+        axis.tick_params(axis="x", labelrotation=45)
+    if figure["view"] == "lines":
+        fig.tight_layout()
+    fig.savefig(figure["filename"])
+    return figure["filename"]
+
+def result_figures(results, plot_output_dir):
+    """
+    Returns the figure specs of the pipeline results that are present and not empty.
+    """
+    specs = []
+    for name, labels, filename, title, ylabel, styles in FIGURES:
+        if name not in results or (isinstance(labels, str) and not results.get(labels)):
+            continue
+        specs.append({
+            "filename": os.path.join(plot_output_dir, filename), "title": title, "ylabel": ylabel,
+            "timestamps": results["timestamps"], "values": results[name],
+            "labels": results[labels] if isinstance(labels, str) else labels, "styles": styles,
+        })
+    return specs
+
+def render_figures(specs, workers=None, max_points=MAX_POINTS, max_lines=MAX_LINES):
+    """
+    Prepares the figures (decimation and reductions are NumPy operations in this process)
+    and renders them over a pool of worker processes; workers=1 renders in this process.
+    Returns the plot files.
+    """
+    figures = [prepare_figure(spec, max_points, max_lines) for spec in specs]
+    if workers is None:
+        workers = min(len(figures), os.cpu_count() or 1)
+    if workers <= 1 or len(figures) < 2:
+        return [render_figure(figure) for figure in figures]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_figure, figures))
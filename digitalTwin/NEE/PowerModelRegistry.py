@@ -0,0 +1,258 @@
+import abc
+import fnmatch
+import json
+from typing import NamedTuple
+
+import numpy as np
+
+from .RUpowerCalculator import K1, P_0_ru
+from .DUpowerCalculator import P_0_DU, K1_DU, K2_DU
+from .CUpowerCalculator import K_CU, P_0_CU
+
+class PowerModel(abc.ABC):
+    """
+    Power consumption of one hardware class as a function of utilization:
+        P = curve(u) + k_children * num_supported
+    rounded to decimals if given. Subclasses must implement curve for (T x N) utilization
+    arrays; a subclass without it cannot be instantiated.
+    """
+    def __init__(self, k_children=0, decimals=None):
+        self.k_children = k_children
+        self.decimals = decimals
+
+    @abc.abstractmethod
+    def curve(self, utilizations):
+        ...
+
+    def __call__(self, utilizations, num_supported=0.0):
+        power = self.curve(utilizations)
+        if self.k_children:
+            power = power + self.k_children * num_supported
+        return power if self.decimals is None else np.round(power, self.decimals)
+
+class LinearPowerModel(PowerModel):
+    """
+    P = p0 + k * u, the model of the RU, DU and CU calculators.
+    """
+    def __init__(self, p0, k, k_children=0, decimals=None):
+        super().__init__(k_children, decimals)
+        self.p0 = p0
+        self.k = k
+
+    def curve(self, utilizations):
+        return self.p0 + self.k * utilizations
+
+class PiecewisePowerModel(PowerModel):
+    """
+    Piecewise linear curve through (utilization, power) points.
+    """
+    def __init__(self, points, k_children=0, decimals=None):
+        super().__init__(k_children, decimals)
+        points = np.asarray(points, dtype=float)
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 2 or np.any(np.diff(points[:, 0]) <= 0):
+            raise ValueError("A piecewise model needs at least two [utilization, power] points with increasing utilization.")
+        self.utilizations = points[:, 0]
+        self.powers = points[:, 1]
+
+    def curve(self, utilizations):
+        return np.interp(utilizations, self.utilizations, self.powers)
+
+class PolynomialPowerModel(PowerModel):
+    """
+    P = c0 + c1 * u + c2 * u^2 + ...
+    """
+    def __init__(self, coefficients, k_children=0, decimals=None):
+        super().__init__(k_children, decimals)
+        self.coefficients = list(coefficients)
+
+    def curve(self, utilizations):
+        return np.polynomial.polynomial.polyval(utilizations, self.coefficients)
+
+class PaEfficiencyPowerModel(PowerModel):
+    """
+    P = p0 + p_out_max * u / efficiency(u): a fixed part plus the power amplifier input
+    power, with the PA efficiency interpolated from (utilization, efficiency) points.
+    """
+    def __init__(self, p0, p_out_max, efficiency, k_children=0, decimals=None):
+        super().__init__(k_children, decimals)
+        efficiency = np.asarray(efficiency, dtype=float)
+        if efficiency.ndim != 2 or efficiency.shape[1] != 2 or np.any(efficiency[:, 1] <= 0):
+            raise ValueError("PA efficiency points must be [utilization, efficiency] pairs with efficiency > 0.")
+        self.p0 = p0
+        self.p_out_max = p_out_max
+        self.efficiency_utilizations = efficiency[:, 0]
+        self.efficiencies = efficiency[:, 1]
+
+    def curve(self, utilizations):
+        efficiency = np.interp(utilizations, self.efficiency_utilizations, self.efficiencies)
+        return self.p0 + self.p_out_max * utilizations / efficiency
+
+# Model kind in the config file -> class; extend with register_model_kind
+MODEL_KINDS = {
+    "linear": LinearPowerModel,
+    "piecewise": PiecewisePowerModel,
+    "polynomial": PolynomialPowerModel,
+    "pa_efficiency": PaEfficiencyPowerModel,
+}
+
+def register_model_kind(kind, factory):
+    """
+    Makes a PowerModel subclass (or any factory taking the config parameters) available
+    as "kind" in power model config files.
+    """
+    if getattr(factory, "__abstractmethods__", None):
+        raise ValueError(f"The {kind} power model does not implement {', '.join(sorted(factory.__abstractmethods__))}.")
+    MODEL_KINDS[kind] = factory
+
+def create_model(config):
+    """
+    Creates a power model from its config dictionary {"kind": ..., parameters...}.
+    """
+    config = dict(config)
+    kind = config.pop("kind", "linear")
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown power model kind: {kind} (known: {', '.join(sorted(MODEL_KINDS))})")
+    try:
+        return MODEL_KINDS[kind](**config)
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for a {kind} power model: {e}")
+
+class NodeTypeEvaluator:
+    """
+    Evaluates the power of all nodes of one type for a (T x N) utilization array.
+
+    Columns are grouped by model, so the cost is one array operation per model instead of
+    per node. Linear models are merged into per-column coefficient arrays, so any number of
+    linear hardware classes costs the same as one.
+    """
+    def __init__(self, models):
+        self.num_columns = len(models)
+        self.linear_groups = []
+        self.model_groups = []
+
+        columns_by_model = {}
+        for column, model in enumerate(models):
+            columns_by_model.setdefault(id(model), (model, []))[1].append(column)
+
+        linear_by_decimals = {}
+        for model, columns in columns_by_model.values():
+            if type(model) is LinearPowerModel:
+                linear_by_decimals.setdefault(model.decimals, []).extend((column, model) for column in columns)
+            else:
+                self.model_groups.append((model, np.asarray(columns, dtype=np.intp)))
+
+        for decimals, entries in linear_by_decimals.items():
+            entries.sort(key=lambda entry: entry[0])
+            columns = np.asarray([column for column, _ in entries], dtype=np.intp)
+            p0 = np.asarray([model.p0 for _, model in entries], dtype=float)
+            k = np.asarray([model.k for _, model in entries], dtype=float)
+            k_children = np.asarray([model.k_children for _, model in entries], dtype=float)
+            # A single model for all columns keeps scalar coefficients and skips the column gather
+            if len(columns) == self.num_columns and len(set(id(model) for _, model in entries)) == 1:
+                model = entries[0][1]
+                self.linear_groups.append((None, model.p0, model.k, model.k_children, decimals))
+            else:
+                self.linear_groups.append((columns, p0, k, k_children, decimals))
+
+    def __call__(self, utilizations, num_supported=0.0):
+        num_supported = np.broadcast_to(np.asarray(num_supported, dtype=float), (self.num_columns,))
+        if len(self.linear_groups) == 1 and self.linear_groups[0][0] is None:
+            _, p0, k, k_children, decimals = self.linear_groups[0]
+            return _linear(utilizations, num_supported, p0, k, k_children, decimals)
+
+        power = np.empty(utilizations.shape)
+        for columns, p0, k, k_children, decimals in self.linear_groups:
+            power[:, columns] = _linear(utilizations[:, columns], num_supported[columns], p0, k, k_children, decimals)
+        for model, columns in self.model_groups:
+            power[:, columns] = model(utilizations[:, columns], num_supported[columns])
+        return power
+
+def _linear(utilizations, num_supported, p0, k, k_children, decimals):
+    power = p0 + k * utilizations
+    if np.any(k_children):
+        power = power + k_children * num_supported
+    return power if decimals is None else np.round(power, decimals)
+
+class CompiledPowerModels(NamedTuple):
+    """
+    Power evaluators of the RU, DU and CU columns of one TopologyIndex.
+    """
+    ru: NodeTypeEvaluator
+    du: NodeTypeEvaluator
+    cu: NodeTypeEvaluator
+
+class PowerModelRegistry:
+    """
+    Named power models, the default model of every node type and the models assigned to
+    individual nodes by node ID or glob pattern (later assignments win).
+    """
+    def __init__(self, models=None, defaults=None, assignments=None):
+        self.models = dict(models or {})
+        self.defaults = dict(defaults or {})
+        self.assignments = list(assignments or [])
+        for name in list(self.defaults.values()) + [model for _, model in self.assignments]:
+            if name not in self.models:
+                raise ValueError(f"Unknown power model: {name}")
+
+    def models_for(self, node_type, node_ids):
+        """
+        Returns the power model of every node ID of one type.
+        """
+        if node_type not in self.defaults:
+            raise ValueError(f"No default power model for {node_type} nodes.")
+        names = {node_id: self.defaults[node_type] for node_id in node_ids}
+        for patterns, model in self.assignments:
+            for pattern in patterns:
+                for node_id in fnmatch.filter(names, pattern) if any(c in pattern for c in "*?[") else [pattern]:
+                    if node_id in names:
+                        names[node_id] = model
+        return [self.models[names[node_id]] for node_id in node_ids]
+
+    def compile(self, topology_index):
+        """
+        Compiles the registry for the columns of a TopologyIndex.
+        """
+        return CompiledPowerModels(
+            ru=NodeTypeEvaluator(self.models_for("RU", topology_index.ru_ids)),
+            du=NodeTypeEvaluator(self.models_for("DU", topology_index.du_ids)),
+            cu=NodeTypeEvaluator(self.models_for("CU", topology_index.cu_ids)),
+        )
+
+def default_power_models():
+    """
+    Returns the registry of the RU, DU and CU calculators' constants.
+    """
+    return PowerModelRegistry(
+        models={
+            "ru-default": LinearPowerModel(P_0_ru, K1),
+            "du-default": LinearPowerModel(P_0_DU, K1_DU, k_children=K2_DU, decimals=2),
+            "cu-default": LinearPowerModel(P_0_CU, K_CU, decimals=2),
+        },
+        defaults={"RU": "ru-default", "DU": "du-default", "CU": "cu-default"},
+    )
+
+def load_power_models(config_file):
+    """
+    Loads a power model registry from a JSON config file:
+        {
+          "models": {"<name>": {"kind": "linear" | "piecewise" | ..., <parameters>}, ...},
+          "defaults": {"RU": "<name>", "DU": "<name>", "CU": "<name>"},
+          "assignments": [{"nodes": ["<node ID or glob pattern>", ...], "model": "<name>"}, ...]
+        }
+    Node types without a default keep the calculators' model.
+    """
+    with open(config_file, 'r') as file:
+        config = json.load(file)
+
+    registry = default_power_models()
+    models = dict(registry.models)
+    models.update({name: create_model(model_config) for name, model_config in config.get("models", {}).items()})
+    defaults = dict(registry.defaults)
+    defaults.update(config.get("defaults", {}))
+
+    assignments = []
+    for assignment in config.get("assignments", []):
+        nodes = assignment["nodes"]
+        assignments.append(([nodes] if isinstance(nodes, str) else list(nodes), assignment["model"]))
+
+    return PowerModelRegistry(models, defaults, assignments)
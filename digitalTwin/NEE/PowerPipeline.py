@@ -0,0 +1,387 @@
+import logging
+import os
+
+import numpy as np
+
+from ..Instrumentation import stage
+from ..NetworkConfigurationLoader import parse_oran_topology
+from ..TopologyIndex import compile_topology
+from ..TopologyCache import load_topology_cached
+from ..TimeSeriesStore import (
+    CsvSeriesWriter, SeriesWriter, compact_time_axis, format_timestamps, is_series_store, iter_series_chunks,
+    open_series, read_csv_series, save_series)
+from .EnergyResampler import ENERGY_COLUMNS, EnergyAccumulator, energy_totals
+from .VectorizedPowerModel import evaluate_power_model
+from .PowerModelRegistry import load_power_models
+from .ShardedEvaluator import evaluate_sharded
+from .PlotRenderer import render_figures, result_figures
+
+logger = logging.getLogger(__name__)
+
+def load_topology(topology, use_cache=True):
+    """
+    Returns (nodes, network_tree, topology_index) for a JSON topology path or an already
+    parsed (nodes, network_tree) topology. Topology files go through the compiled topology cache.
+    """
+    if isinstance(topology, (str, os.PathLike)):
+        if use_cache:
+            return load_topology_cached(topology)
+        nodes, network_tree = parse_oran_topology(topology)
+    else:
+        nodes, network_tree = topology
+    with stage("compile_topology", nodes=len(network_tree)):
+        return nodes, network_tree, compile_topology(network_tree)
+
+def load_utilization_source(utilization_source):
+    """
+    Returns (timestamps, utilization_values, ru_node_ids) for an RU utilization CSV path,
+    a time series store folder (memory-mapped, see TimeSeriesStore) or an in-memory
+    (timestamps, utilization_values, ru_node_ids) tuple. The timestamps of files are a
+    TimeAxis for regular series and a datetime64[us] array otherwise.
+    """
+    if not isinstance(utilization_source, (str, os.PathLike)):
+        return utilization_source
+
+    with stage("read_utilization", source=str(utilization_source)) as s:
+        if is_series_store(utilization_source):
+            timestamps, utilization_values, ru_node_ids = open_series(utilization_source)
+            timestamps = compact_time_axis(np.asarray(timestamps))
+        else:
+            timestamps, utilization_values, ru_node_ids = read_csv_series(utilization_source)
+        if s:
+            s.add(rows=len(timestamps), columns=len(ru_node_ids), bytes_read=_size(utilization_source))
+    return timestamps, utilization_values, ru_node_ids
+
+def _size(path):
+    """
+    Returns the size in bytes of a file or of all files in a folder.
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(folder, filename))
+               for folder, _, filenames in os.walk(path) for filename in filenames)
+
+def compile_power_models(power_models, topology_index):
+    """
+    Compiles a PowerModelRegistry or a power model config file for a TopologyIndex.
+    None keeps the calculators' constants.
+    """
+    if power_models is None:
+        return None
+    if isinstance(power_models, (str, os.PathLike)):
+        power_models = load_power_models(power_models)
+    return power_models.compile(topology_index)
+
+# Columns of the network-level power rollup
+HIERARCHY_COLUMNS = ["Tower Overhead", "O-Cloud Overhead", "Near-RT RIC Power", "SMO Power", "Network Total Power"]
+
+# (result name, CSV file, CSV columns (node IDs key or fixed names), CSV decimals)
+CSV_OUTPUTS = [
+    ("ru_power", "ru_power_consumption.csv", "ru_node_ids", None),
+    ("ru_total_power", "ru_total_power_consumption.csv", ["Total Power Consumption"], None),
+    ("du_utilization", "du_utilization_data.csv", "du_node_ids", None),
+    ("du_power", "du_power_consumption_data.csv", "du_node_ids", None),
+    ("du_total_power", "du_total_power_consumption_data.csv", ["Total Power Consumption (W)"], None),
+    ("cu_utilization", "cu_utilizations_data.csv", "cu_node_ids", None),
+    ("cu_power", "cu_power_consumption.csv", "cu_node_ids", None),
+    ("cu_total_power", "cu_total_power_consumption.csv", ["Total Power"], None),
+    ("aggregated_power", "aggregated_power_consumption.csv", ["RU Power", "DU Power", "CU Power", "Total Power"], 2),
+    ("tower_power", "tower_power_consumption.csv", "tower_ids", 2),
+    ("o_cloud_power", "o_cloud_power_consumption.csv", "o_cloud_ids", 2),
+    ("hierarchy_power", "network_power_consumption.csv", HIERARCHY_COLUMNS, 2),
+]
+
+# (result name, store folder, columns (node IDs key or fixed names))
+STORE_OUTPUTS = [
+    ("ru_power", "ru_power", "ru_node_ids"),
+    ("du_utilization", "du_utilization", "du_node_ids"),
+    ("du_power", "du_power", "du_node_ids"),
+    ("cu_utilization", "cu_utilization", "cu_node_ids"),
+    ("cu_power", "cu_power", "cu_node_ids"),
+    ("aggregated_power", "aggregated_power", ["RU Power", "DU Power", "CU Power", "Total Power"]),
+    ("tower_power", "tower_power", "tower_ids"),
+    ("o_cloud_power", "o_cloud_power", "o_cloud_ids"),
+    ("hierarchy_power", "network_power", HIERARCHY_COLUMNS),
+]
+
+def _columns(results, columns):
+    return results[columns] if isinstance(columns, str) else columns
+
+def _evaluate(topology_index, timestamps, ru_utilization_values, compiled_models=None, power_models=None,
+              workers=None, shard_by="cu"):
+    with stage("evaluate", rows=len(timestamps)):
+        if workers is not None and workers > 1:
+            # The shards compile the power models for their own subtrees
+            return add_totals(evaluate_sharded(topology_index, ru_utilization_values, power_models, workers,
+                                               by=shard_by), timestamps)
+        return _evaluate_rows(topology_index, timestamps, ru_utilization_values, compiled_models)
+
+def _evaluate_rows(topology_index, timestamps, ru_utilization_values, compiled_models):
+    return add_totals(evaluate_power_model(topology_index, ru_utilization_values, compiled_models), timestamps)
+
+def add_totals(results, timestamps):
+    """
+    Adds the timestamps and the aggregated and network totals to the results of
+    evaluate_power_model.
+    """
+    results["timestamps"] = timestamps
+    results["total_power"] = results["ru_total_power"] + results["du_total_power"] + results["cu_total_power"]
+    results["aggregated_power"] = np.column_stack([
+        results["ru_total_power"], results["du_total_power"], results["cu_total_power"], results["total_power"]])
+    results["network_total_power"] = results["total_power"] + results["overhead_total_power"]
+    results["hierarchy_power"] = np.column_stack([
+        results["tower_overhead_power"].sum(axis=1), results["o_cloud_overhead_power"].sum(axis=1),
+        results["near_rt_ric_power"].sum(axis=1), results["smo_power"].sum(axis=1), results["network_total_power"]])
+    return results
+
+def run_pipeline(topology, utilization_source, csv_output_dir=None, plot_output_dir=None, use_cache=True,
+                 store_output_dir=None, power_models=None, plot_workers=None, energy_resolution=None, workers=None,
+                 shard_by="cu"):
+    """
+    Computes RU, DU, CU and aggregated power consumption in memory in a single pass.
+    Utilization and power values are returned as (T x N) NumPy arrays.
+
+    The topology is parsed once and every stage consumes the previous stage's values
+    directly instead of re-reading the intermediate CSV files. CSV files, time series
+    store folders and plots are only written when an output directory is given.
+    power_models is an optional PowerModelRegistry or power model config file; plot_workers
+    is the number of processes rendering the plots (see plot_results). With an
+    energy_resolution such as "1h", "1d" or "month", the energy per bucket is written to
+    the CSV and store outputs as well (see save_energy). With workers > 1, the power model is
+    evaluated over that many processes, one shard of CU (shard_by="cu") or O-Cloud
+    (shard_by="o_cloud") subtrees each (see ShardedEvaluator.evaluate_sharded).
+    """
+    with stage("run_pipeline"):
+        return _run_pipeline(topology, utilization_source, csv_output_dir, plot_output_dir, use_cache,
+                             store_output_dir, power_models, plot_workers, energy_resolution, workers, shard_by)
+
+def _run_pipeline(topology, utilization_source, csv_output_dir, plot_output_dir, use_cache, store_output_dir,
+                  power_models, plot_workers, energy_resolution, workers, shard_by):
+    _, network_tree, topology_index = load_topology(topology, use_cache)
+    timestamps, ru_utilization_values, ru_node_ids = load_utilization_source(utilization_source)
+
+    # The static tree is compiled once and all timestamps are evaluated as whole-array operations
+    if list(topology_index.ru_ids) != list(ru_node_ids):
+        topology_index = compile_topology(network_tree, ru_node_ids)
+    if workers is not None and workers > 1:
+        results = _evaluate(topology_index, timestamps, ru_utilization_values, power_models=power_models,
+                            workers=workers, shard_by=shard_by)
+    else:
+        results = _evaluate(topology_index, timestamps, ru_utilization_values,
+                            compile_power_models(power_models, topology_index))
+
+    if csv_output_dir is not None:
+        save_results_to_csv(results, csv_output_dir)
+    if store_output_dir is not None:
+        save_results_to_store(results, store_output_dir)
+    if energy_resolution is not None and (csv_output_dir is not None or store_output_dir is not None):
+        save_energy(*energy_totals(results, energy_resolution), energy_resolution, csv_output_dir, store_output_dir)
+    if plot_output_dir is not None:
+        plot_results(results, plot_output_dir, plot_workers)
+
+    return results
+
+def run_pipeline_chunked(topology, utilization_source, chunk_size=1440, csv_output_dir=None, use_cache=True,
+                         store_output_dir=None, power_models=None, energy_resolution=None, workers=None,
+                         shard_by="cu"):
+    """
+    Streams the RU utilization series through the power model in blocks of chunk_size
+    timestamps and appends every block's results to the CSV and store outputs.
+
+    Memory use depends on chunk_size and the network size, not on the length of the history.
+    utilization_source is anything TimeSeriesStore.iter_series_chunks accepts and
+    power_models, energy_resolution, workers and shard_by are as in run_pipeline; the energy
+    buckets are accumulated block by block and every block is sharded over the workers.
+    Returns a summary of the run instead of the full series.
+    """
+    with stage("run_pipeline_chunked", chunk_size=chunk_size) as s:
+        summary = _run_pipeline_chunked(topology, utilization_source, chunk_size, csv_output_dir, use_cache,
+                                        store_output_dir, power_models, energy_resolution, workers, shard_by)
+        if s:
+            s.add(rows=summary["num_timestamps"])
+            s.add(bytes_written=sum(_size(folder) for folder in (csv_output_dir, store_output_dir)
+                                    if folder is not None and os.path.isdir(folder)))
+        return summary
+
+def _read_chunks(chunks):
+    # Times reading every block; iteration is lazy, so reads happen inside next()
+    chunks = iter(chunks)
+    while True:
+        with stage("read_utilization_chunk") as s:
+            chunk = next(chunks, None)
+            if s and chunk is not None:
+                s.add(rows=len(chunk[0]))
+        if chunk is None:
+            return
+        yield chunk
+
+def _run_pipeline_chunked(topology, utilization_source, chunk_size, csv_output_dir, use_cache, store_output_dir,
+                          power_models, energy_resolution, workers, shard_by):
+    _, network_tree, topology_index = load_topology(topology, use_cache)
+    if isinstance(power_models, (str, os.PathLike)):
+        power_models = load_power_models(power_models)
+    compiled_models = compile_power_models(power_models, topology_index)
+
+    writers = []
+    energy = EnergyAccumulator(energy_resolution, [column for _, column in ENERGY_COLUMNS]) \
+        if energy_resolution is not None else None
+    summary = {"num_timestamps": 0, "start": None, "end": None, "total_power_sum": 0.0, "peak_total_power": None,
+               "network_total_power_sum": 0.0}
+
+    try:
+        for timestamps, ru_utilization_values, ru_node_ids in _read_chunks(iter_series_chunks(utilization_source, chunk_size)):
+            if list(topology_index.ru_ids) != list(ru_node_ids):
+                topology_index = compile_topology(network_tree, ru_node_ids)
+                compiled_models = compile_power_models(power_models, topology_index)
+            results = _evaluate(topology_index, timestamps, ru_utilization_values, compiled_models, power_models,
+                                workers, shard_by)
+
+            # Open the sinks once the node IDs of the first block are known
+            if not writers:
+                if csv_output_dir is not None:
+                    writers += [
+                        (name, CsvSeriesWriter(os.path.join(csv_output_dir, filename), _columns(results, columns), decimals))
+                        for name, filename, columns, decimals in CSV_OUTPUTS if _columns(results, columns)
+                    ]
+                if store_output_dir is not None:
+                    writers += [
+                        (name, SeriesWriter(os.path.join(store_output_dir, folder), _columns(results, columns)))
+                        for name, folder, columns in STORE_OUTPUTS if _columns(results, columns)
+                    ]
+                summary.update({key: results[key] for key in ("ru_node_ids", "du_node_ids", "cu_node_ids")})
+                summary["start"] = timestamps[0]
+
+            with stage("write_outputs", rows=len(timestamps), outputs=len(writers)):
+                for name, writer in writers:
+                    writer.append(timestamps, results[name])
+
+            summary["num_timestamps"] += len(timestamps)
+            summary["end"] = timestamps[-1]
+            summary["total_power_sum"] += float(results["total_power"].sum())
+            summary["network_total_power_sum"] += float(results["network_total_power"].sum())
+            if energy is not None:
+                energy.append(timestamps, np.column_stack([results[name] for name, _ in ENERGY_COLUMNS]))
+            block_peak = float(results["total_power"].max())
+            if summary["peak_total_power"] is None or block_peak > summary["peak_total_power"]:
+                summary["peak_total_power"] = block_peak
+    finally:
+        for _, writer in writers:
+            writer.close()
+
+    if energy is not None and summary["num_timestamps"] and (csv_output_dir is not None or store_output_dir is not None):
+        bucket_timestamps, energy_wh = energy.result()
+        save_energy(bucket_timestamps, energy_wh / 1e3, energy_resolution, csv_output_dir, store_output_dir)
+    if csv_output_dir is not None:
+        logger.info("CSV outputs saved to %s", csv_output_dir)
+    if store_output_dir is not None:
+        logger.info("Time series store outputs saved to %s", store_output_dir)
+
+    return summary
+
+def aggregated_rows(results):
+    """
+    Returns the aggregated power rows in the layout written by NetworkpowerCalculator.
+    """
+    return [
+        [timestamp, round(ru_power, 2), round(du_power, 2), round(cu_power, 2), round(total_power, 2)]
+        for timestamp, ru_power, du_power, cu_power, total_power in zip(
+            format_timestamps(results["timestamps"]), results["ru_total_power"].tolist(), results["du_total_power"].tolist(),
+            results["cu_total_power"].tolist(), results["total_power"].tolist())
+    ]
+
+def save_results_to_csv(results, csv_output_dir):
+    """
+    Writes the pipeline results to the same CSV files the individual calculators produce.
+    """
+    for name, filename, columns, decimals in CSV_OUTPUTS:
+        if not _columns(results, columns):
+            continue  # e.g. no towers or O-Clouds in the topology
+        with stage("write_csv", output=filename, rows=len(results["timestamps"])) as s:
+            with CsvSeriesWriter(os.path.join(csv_output_dir, filename), _columns(results, columns), decimals) as writer:
+                writer.append(results["timestamps"], results[name])
+            if s:
+                s.add(bytes_written=os.path.getsize(os.path.join(csv_output_dir, filename)))
+    logger.info("CSV outputs saved to %s", csv_output_dir)
+
+def save_results_to_store(results, store_output_dir):
+    """
+    Writes the pipeline results as time series store folders (one per output) in store_output_dir.
+    """
+    for name, folder, columns in STORE_OUTPUTS:
+        if not _columns(results, columns):
+            continue
+        with stage("write_store", output=folder, rows=len(results["timestamps"])) as s:
+            save_series(os.path.join(store_output_dir, folder), results["timestamps"], results[name], _columns(results, columns))
+            if s:
+                s.add(bytes_written=_size(os.path.join(store_output_dir, folder)))
+    logger.info("Time series store outputs saved to %s", store_output_dir)
+
+def save_energy(timestamps, energy, resolution, csv_output_dir=None, store_output_dir=None):
+    """
+    Writes energy buckets (kWh in the columns of ENERGY_COLUMNS, see
+    EnergyResampler.energy_totals) to energy_<resolution>.csv in csv_output_dir and to the
+    energy_<resolution> store folder in store_output_dir.
+    """
+    columns = [column for _, column in ENERGY_COLUMNS]
+    if csv_output_dir is not None:
+        with CsvSeriesWriter(os.path.join(csv_output_dir, f"energy_{resolution}.csv"), columns, 6) as writer:
+            writer.append(timestamps, energy)
+    if store_output_dir is not None:
+        save_series(os.path.join(store_output_dir, f"energy_{resolution}"), timestamps, energy, columns)
+    logger.info("Energy per %s saved as energy_%s", resolution, resolution)
+
+def load_store_outputs(store_output_dir):
+    """
+    Reads the store folders written by save_results_to_store (or run_pipeline_chunked) back
+    into a results dictionary with memory-mapped values.
+    """
+    results = {}
+    for name, folder, columns in STORE_OUTPUTS:
+        if not is_series_store(os.path.join(store_output_dir, folder)):
+            continue
+        timestamps, values, node_ids = open_series(os.path.join(store_output_dir, folder))
+        if "timestamps" not in results:
+            results["timestamps"] = compact_time_axis(np.asarray(timestamps))
+        results[name] = values
+        if isinstance(columns, str):
+            results[columns] = node_ids
+    if "ru_power" not in results:
+        raise ValueError(f"{store_output_dir} has no time series store outputs.")
+
+    if "aggregated_power" in results:
+        for column, name in enumerate(["ru_total_power", "du_total_power", "cu_total_power", "total_power"]):
+            results[name] = results["aggregated_power"][:, column]
+    if "hierarchy_power" in results:
+        results["network_total_power"] = results["hierarchy_power"][:, -1]
+    return results
+
+def plot_results(results, plot_output_dir, workers=None):
+    """
+    Saves the RU, DU, CU, aggregated, tower and O-Cloud plots with PlotRenderer: long
+    series are decimated, many nodes are shown as percentile bands and a heatmap, and the
+    figures are rendered by a pool of worker processes without any interactive window.
+    """
+    with stage("render_plots") as s:
+        filenames = render_figures(result_figures(results, plot_output_dir), workers)
+        if s:
+            s.add(figures=len(filenames), bytes_written=sum(os.path.getsize(filename) for filename in filenames))
+    for filename in filenames:
+        logger.info("Plot saved to %s", filename)
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    json_file = input("Enter the JSON topology file path: ").strip()
+    ru_csv_file = input("Enter the RU utilization CSV file path: ").strip()
+
+    try:
+        results = run_pipeline(json_file, ru_csv_file, csv_output_dir="CSVfileOutputs", plot_output_dir="plotOutputs")
+        print(f"Computed power consumption for {len(results['ru_node_ids'])} RUs, "
+              f"{len(results['du_node_ids'])} DUs and {len(results['cu_node_ids'])} CUs "
+              f"over {len(results['timestamps'])} timestamps.")
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
+    except ValueError as e:
+        print(f"Error: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import heapq
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+
+import numpy as np
+
+from ..Instrumentation import stage
+from ..TopologyIndex import index_from_arrays, index_to_arrays, select_aggregation, subtree_index
+from .HierarchyPowerCalculator import P_NEAR_RT_RIC, P_SMO, calculate_o_cloud_power_batch, calculate_tower_power_batch
+from .PowerModelRegistry import load_power_models
+from .VectorizedPowerModel import evaluate_power_model
+
+# (results key, node kind) of the per-node arrays the shards write
+SHARD_OUTPUTS = [
+    ("ru_power", "ru"),
+    ("du_utilization", "du"),
+    ("du_power", "du"),
+    ("cu_utilization", "cu"),
+    ("cu_power", "cu"),
+    ("tower_overhead_power", "tower"),
+    ("tower_power", "tower"),
+    ("o_cloud_overhead_power", "o_cloud"),
+    ("o_cloud_power", "o_cloud"),
+]
+
+# Totals every shard sums over its own nodes; the network totals are their sums over the shards
+SHARD_TOTALS = ["ru_total_power", "du_total_power", "cu_total_power", "overhead_total_power"]
+
+# Input and output arrays of the running evaluation, inherited by the forked workers
+_shared = {}
+
+def _units(topology_index, by):
+    """
+    Returns the independent units of a topology as (RU count, CU columns, DU columns, RU
+    columns): one per CU subtree, or per O-Cloud with the subtrees of all the CUs it hosts,
+    plus one per DU without a CU and one for all RUs without a DU.
+    """
+    ru_counts = np.array([len(children) for children in topology_index.du_children])
+    cu_weights = [int(ru_counts[children].sum()) + len(children) + 1 for children in topology_index.cu_children]
+
+    if by == "cu":
+        groups = [[column] for column in range(len(topology_index.cu_ids))]
+    elif by == "o_cloud":
+        indptr, indices = topology_index.cu_to_o_cloud["indptr"], topology_index.cu_to_o_cloud["indices"]
+        groups, hosted = [], set()
+        for start, end in zip(indptr[:-1].tolist(), indptr[1:].tolist()):
+            group = [column for column in indices[start:end].tolist() if column not in hosted]
+            hosted.update(group)
+            if group:
+                groups.append(group)
+        groups += [[column] for column in range(len(topology_index.cu_ids)) if column not in hosted]
+    else:
+        raise ValueError(f"Unknown partitioning: {by!r} (expected cu or o_cloud)")
+
+    units = [(sum(cu_weights[column] for column in group), group, [], []) for group in groups]
+    units += [(int(ru_counts[column]) + 1, [], [column], [])
+              for column in np.flatnonzero(topology_index.du_parent < 0).tolist()]
+    orphan_rus = np.flatnonzero(topology_index.ru_parent < 0).tolist()
+    if orphan_rus:
+        units.append((len(orphan_rus), [], [], orphan_rus))
+    return units
+
+def partition_topology(topology_index, num_shards, by="cu"):
+    """
+    Splits a TopologyIndex into at most num_shards shards of whole CU subtrees (by="cu") or
+    whole O-Clouds (by="o_cloud"), balanced by their number of RUs: the largest units are
+    assigned first, each to the shard with the fewest RUs so far. Returns a list of
+    (cu_columns, du_columns, ru_columns) for TopologyIndex.subtree_index.
+    """
+    units = sorted(_units(topology_index, by), key=lambda unit: -unit[0])
+    num_shards = max(1, min(num_shards, len(units)))
+    shards = [([], [], []) for _ in range(num_shards)]
+    loads = [(0, shard) for shard in range(num_shards)]
+    for weight, cu_columns, du_columns, ru_columns in units:
+        load, shard = heapq.heappop(loads)
+        for columns, unit_columns in zip(shards[shard], (cu_columns, du_columns, ru_columns)):
+            columns.extend(unit_columns)
+        heapq.heappush(loads, (load + weight, shard))
+    return [shard for shard in shards if any(shard)]
+
+def _selector(columns):
+    """
+    Returns a slice for a sorted run of consecutive columns (the usual case for shards of
+    generated or well-ordered topologies), which reads and writes much faster than an
+    index array, or the columns themselves otherwise.
+    """
+    if len(columns) and columns[-1] - columns[0] + 1 == len(columns):
+        return slice(int(columns[0]), int(columns[-1]) + 1)
+    return columns
+
+def _shared_array(shape):
+    """
+    Returns a zeroed float array on anonymous shared memory. Processes forked after it was
+    created write to the same memory, and it is freed with the array.
+    """
+    size = int(np.prod(shape))
+    return np.frombuffer(mmap.mmap(-1, max(1, size * 8)), dtype=float, count=size).reshape(shape)
+
+def _evaluate_shard(job):
+    """
+    Evaluates one shard in a worker process: reads its RU columns from the inherited input
+    array, writes its per-node outputs to the shared output arrays and its totals to its
+    row of the shared total arrays.
+    """
+    index_arrays, columns, shard, power_models = job
+    sub_index = index_from_arrays(index_arrays)
+    compiled_models = power_models.compile(sub_index) if power_models is not None else None
+    results = evaluate_power_model(sub_index, _shared["ru_utilization"][:, columns["ru"]], compiled_models)
+    for name, kind in SHARD_OUTPUTS:
+        _shared[name][:, columns[kind]] = results[name]
+    for name in SHARD_TOTALS:
+        _shared[name][shard] = results[name]
+    return len(sub_index.ru_ids)
+
+def _child_shard_range(aggregation, child_shards, num_shards):
+    """
+    Returns the lowest and highest shard of the children of every parent (num_shards and
+    -1 for parents without children).
+    """
+    indptr = aggregation["indptr"]
+    lowest = np.full(len(indptr) - 1, num_shards, dtype=np.intp)
+    highest = np.full(len(indptr) - 1, -1, dtype=np.intp)
+    nonempty = np.diff(indptr) > 0
+    if nonempty.any():
+        shards = child_shards[aggregation["indices"]]
+        lowest[nonempty] = np.minimum.reduceat(shards, indptr[:-1][nonempty])
+        highest[nonempty] = np.maximum.reduceat(shards, indptr[:-1][nonempty])
+    return lowest, highest
+
+def _host_shards(topology_index, shard_columns, num_shards):
+    """
+    Returns the shard of every tower and O-Cloud whose hosted nodes are all in one shard
+    (-1 for hosts split between shards or hosting nothing).
+    """
+    shards = {}
+    for kind, size in (("ru", len(topology_index.ru_ids)), ("du", len(topology_index.du_ids)),
+                       ("cu", len(topology_index.cu_ids))):
+        shards[kind] = np.full(size, -1, dtype=np.intp)
+        for shard, columns in enumerate(shard_columns):
+            shards[kind][columns[kind]] = shard
+
+    lowest, highest = _child_shard_range(topology_index.ru_to_tower, shards["ru"], num_shards)
+    tower_shards = np.where(lowest == highest, lowest, -1)
+    du_lowest, du_highest = _child_shard_range(topology_index.du_to_o_cloud, shards["du"], num_shards)
+    cu_lowest, cu_highest = _child_shard_range(topology_index.cu_to_o_cloud, shards["cu"], num_shards)
+    lowest, highest = np.minimum(du_lowest, cu_lowest), np.maximum(du_highest, cu_highest)
+    return tower_shards, np.where(lowest == highest, lowest, -1)
+
+def evaluate_sharded(topology_index, ru_utilization_values, power_models=None, workers=None, num_shards=None, by="cu"):
+    """
+    Evaluates the power model like evaluate_power_model, but over a pool of workers
+    processes (all cores by default), one task per shard of whole CU (or O-Cloud) subtrees
+    (see partition_topology; num_shards defaults to workers).
+
+    The workers are forked, so they read the RU utilizations directly and write the per-node
+    outputs and per-shard totals to shared memory that becomes the results: only the small
+    shard indexes are pickled and nothing is copied. Without fork (Windows), or with a single
+    worker or shard, the evaluation runs in this process instead. Every shard also
+    rolls up the towers and O-Clouds that host only its own nodes; the parent sums the
+    shard totals and rolls up the few hosts split between shards. power_models is a
+    PowerModelRegistry (compiled per shard), a power model config file or None. The
+    per-node series are the same as evaluate_power_model's; the totals are summed in a
+    different order, so they can differ in the last bits.
+    """
+    workers = workers or os.cpu_count() or 1
+    if isinstance(power_models, (str, os.PathLike)):
+        power_models = load_power_models(power_models)
+    ru_utilization_values = np.asarray(ru_utilization_values, dtype=float).reshape(-1, len(topology_index.ru_ids))
+    num_timestamps = ru_utilization_values.shape[0]
+    shards = partition_topology(topology_index, num_shards or workers, by)
+    if workers == 1 or len(shards) <= 1 or "fork" not in get_all_start_methods():
+        return evaluate_power_model(topology_index, ru_utilization_values,
+                                    power_models.compile(topology_index) if power_models is not None else None)
+
+    shard_columns = []
+    for cu_columns, du_columns, ru_columns in shards:
+        _, ru_columns, du_columns, cu_columns = subtree_index(topology_index, cu_columns, du_columns, ru_columns)
+        shard_columns.append({"ru": ru_columns, "du": du_columns, "cu": cu_columns})
+    tower_shards, o_cloud_shards = _host_shards(topology_index, shard_columns, len(shards))
+
+    jobs = []
+    for shard, columns in enumerate(shard_columns):
+        columns["tower"] = np.flatnonzero(tower_shards == shard)
+        columns["o_cloud"] = np.flatnonzero(o_cloud_shards == shard)
+        sub_index = subtree_index(topology_index, columns["cu"], columns["du"], columns["ru"], columns["tower"],
+                                  columns["o_cloud"])[0]
+        jobs.append((index_to_arrays(sub_index), {kind: _selector(kind_columns) for kind, kind_columns in columns.items()}))
+
+    sizes = {"ru": len(topology_index.ru_ids), "du": len(topology_index.du_ids), "cu": len(topology_index.cu_ids),
+             "tower": len(topology_index.tower_ids), "o_cloud": len(topology_index.o_cloud_ids)}
+    with stage("evaluate_sharded", shards=len(jobs), workers=workers, samples=ru_utilization_values.size):
+        # Set before the pool forks its workers, which inherit the arrays instead of receiving pickled copies
+        _shared["ru_utilization"] = ru_utilization_values
+        _shared.update({output: _shared_array((num_timestamps, sizes[kind])) for output, kind in SHARD_OUTPUTS})
+        _shared.update({total: _shared_array((len(jobs), num_timestamps)) for total in SHARD_TOTALS})
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=get_context("fork")) as executor:
+                list(executor.map(_evaluate_shard, [(index_arrays, columns, shard, power_models)
+                                                    for shard, (index_arrays, columns) in enumerate(jobs)]))
+            series = {output: _shared[output] for output, _ in SHARD_OUTPUTS}
+            series.update({total: _shared[total].sum(axis=0) for total in SHARD_TOTALS})
+        finally:
+            _shared.clear()
+
+    with stage("reduce_shards"):
+        return _reduce(topology_index, ru_utilization_values, series, tower_shards < 0, o_cloud_shards < 0)
+
+def _reduce(topology_index, ru_utilizations, series, split_towers, split_o_clouds):
+    """
+    Completes the results of the shards: the towers and O-Clouds split between shards, the
+    Near-RT RIC and SMO power and the network totals.
+    """
+    num_timestamps = ru_utilizations.shape[0]
+    overhead_total_power = series["overhead_total_power"]
+    if split_towers.any():
+        columns = np.flatnonzero(split_towers)
+        hosted, overhead = calculate_tower_power_batch(
+            series["ru_power"], select_aggregation(topology_index.ru_to_tower, columns))
+        series["tower_overhead_power"][:, columns] = overhead
+        series["tower_power"][:, columns] = hosted + overhead
+        overhead_total_power = overhead_total_power + overhead.sum(axis=1)
+    if split_o_clouds.any():
+        columns = np.flatnonzero(split_o_clouds)
+        hosted, overhead = calculate_o_cloud_power_batch(
+            series["du_power"], series["cu_power"], select_aggregation(topology_index.du_to_o_cloud, columns),
+            select_aggregation(topology_index.cu_to_o_cloud, columns))
+        series["o_cloud_overhead_power"][:, columns] = overhead
+        series["o_cloud_power"][:, columns] = hosted + overhead
+        overhead_total_power = overhead_total_power + overhead.sum(axis=1)
+    near_rt_ric_power = np.full((num_timestamps, len(topology_index.near_rt_ric_ids)), float(P_NEAR_RT_RIC))
+    smo_power = np.full((num_timestamps, len(topology_index.smo_ids)), float(P_SMO))
+
+    return {
+        "ru_node_ids": list(topology_index.ru_ids),
+        "du_node_ids": list(topology_index.du_ids),
+        "cu_node_ids": list(topology_index.cu_ids),
+        "ru_utilization": ru_utilizations,
+        "ru_power": series["ru_power"],
+        "ru_total_power": series["ru_total_power"],
+        "du_utilization": series["du_utilization"],
+        "du_power": series["du_power"],
+        "du_total_power": series["du_total_power"],
+        "cu_utilization": series["cu_utilization"],
+        "cu_power": series["cu_power"],
+        "cu_total_power": series["cu_total_power"],
+        "tower_ids": list(topology_index.tower_ids),
+        "tower_overhead_power": series["tower_overhead_power"],
+        "tower_power": series["tower_power"],
+        "o_cloud_ids": list(topology_index.o_cloud_ids),
+        "o_cloud_overhead_power": series["o_cloud_overhead_power"],
+        "o_cloud_power": series["o_cloud_power"],
+        "near_rt_ric_ids": list(topology_index.near_rt_ric_ids),
+        "near_rt_ric_power": near_rt_ric_power,
+        "smo_ids": list(topology_index.smo_ids),
+        "smo_power": smo_power,
+        "overhead_total_power": overhead_total_power + near_rt_ric_power.sum(axis=1) + smo_power.sum(axis=1),
+    }
@@ -0,0 +1,105 @@
+import numpy as np
+
+from .RUpowerCalculator import K1, P_0_ru
+from .DUpowerCalculator import P_0_DU, K1_DU, K2_DU, round_utilization
+from .CUpowerCalculator import K_CU, P_0_CU
+from .HierarchyPowerCalculator import aggregate_sum, evaluate_hierarchy
+from ..Instrumentation import stage
+
+def aggregate_mean(values, aggregation):
+    """
+    Averages the child columns of a (T x N_child) array for every parent in one pass.
+    Parents without any children get an average of 0.0.
+    """
+    counts = np.diff(aggregation["indptr"])
+    nonempty = counts > 0
+    sums = aggregate_sum(values, aggregation)
+
+    means = np.zeros_like(sums)
+    np.divide(sums, counts, out=means, where=nonempty)
+    return means
+
+def calculate_ru_power_batch(ru_utilizations):
+    """
+    Calculates RU power consumption for a (T x N_RU) utilization array.
+    """
+    return P_0_ru + K1 * ru_utilizations
+
+def calculate_du_utilizations_batch(ru_utilizations, ru_to_du):
+    """
+    Calculates the average utilization of every DU for a (T x N_RU) utilization array.
+    """
+    return round_utilization(aggregate_mean(ru_utilizations, ru_to_du))
+
+def calculate_du_power_batch(du_utilizations, ru_to_du):
+    """
+    Calculates DU power consumption for a (T x N_DU) utilization array.
+    """
+    return np.round(P_0_DU + K1_DU * du_utilizations + K2_DU * ru_to_du["num_supported"], 2)
+
+def calculate_cu_utilizations_batch(du_utilizations, du_to_cu):
+    """
+    Calculates the average utilization of every CU for a (T x N_DU) utilization array.
+    """
+    return round_utilization(aggregate_mean(du_utilizations, du_to_cu))
+
+def calculate_cu_power_batch(cu_utilizations):
+    """
+    Calculates CU power consumption for a (T x N_CU) utilization array.
+    """
+    return np.round(P_0_CU + K_CU * cu_utilizations, 2)
+
+def evaluate_power_model(topology_index, ru_utilization_values, power_models=None):
+    """
+    Evaluates the RU, DU and CU power models for all timestamps at once.
+
+    ru_utilization_values is a (T x N_RU) array (or nested list) whose columns follow
+    topology_index.ru_ids. power_models are per-node models compiled for topology_index
+    (PowerModelRegistry.compile); by default the calculators' constants are used.
+    Returns a dictionary of node IDs and (T x N) utilization/power arrays, including the
+    tower (site), O-Cloud, Near-RT RIC and SMO power of HierarchyPowerCalculator.
+    """
+    ru_utilizations = np.asarray(ru_utilization_values, dtype=float)
+    if ru_utilizations.ndim != 2 or ru_utilizations.shape[1] != len(topology_index.ru_ids):
+        # A (T x 0) array of a subtree without RUs cannot be reshaped with -1
+        ru_utilizations = ru_utilizations.reshape(-1, len(topology_index.ru_ids))
+
+    with stage("aggregate_utilizations", samples=ru_utilizations.size):
+        du_utilizations = calculate_du_utilizations_batch(ru_utilizations, topology_index.ru_to_du)
+        cu_utilizations = calculate_cu_utilizations_batch(du_utilizations, topology_index.du_to_cu)
+    with stage("power_model", samples=ru_utilizations.size + du_utilizations.size + cu_utilizations.size):
+        if power_models is None:
+            ru_power = calculate_ru_power_batch(ru_utilizations)
+            du_power = calculate_du_power_batch(du_utilizations, topology_index.ru_to_du)
+            cu_power = calculate_cu_power_batch(cu_utilizations)
+        else:
+            ru_power = power_models.ru(ru_utilizations)
+            du_power = power_models.du(du_utilizations, topology_index.ru_to_du["num_supported"])
+            cu_power = power_models.cu(cu_utilizations, topology_index.du_to_cu["num_supported"])
+
+    return assemble_results(topology_index, ru_utilizations, ru_power, du_utilizations, du_power, cu_utilizations,
+                            cu_power)
+
+def assemble_results(topology_index, ru_utilizations, ru_power, du_utilizations, du_power, cu_utilizations, cu_power):
+    """
+    Returns the results dictionary of evaluate_power_model for per-node (T x N) arrays
+    whose columns follow topology_index: the node IDs, the arrays, their totals and the
+    hierarchy rollup.
+    """
+    results = {
+        "ru_node_ids": list(topology_index.ru_ids),
+        "du_node_ids": list(topology_index.du_ids),
+        "cu_node_ids": list(topology_index.cu_ids),
+        "ru_utilization": ru_utilizations,
+        "ru_power": ru_power,
+        "ru_total_power": ru_power.sum(axis=1),
+        "du_utilization": du_utilizations,
+        "du_power": du_power,
+        "du_total_power": du_power.sum(axis=1),
+        "cu_utilization": cu_utilizations,
+        "cu_power": cu_power,
+        "cu_total_power": cu_power.sum(axis=1),
+    }
+    with stage("hierarchy_rollup"):
+        results.update(evaluate_hierarchy(topology_index, ru_power, du_power, cu_power))
+    return results
@@ -0,0 +1,3 @@
+"""
+Network Energy Estimator: RU, DU, CU and network power calculators.
+"""
@@ -1,86 +1,284 @@
-from collections import defaultdict
-import json
-
-def parse_oran_topology(json_file):
-    with open(json_file, 'r') as f:
-        data = json.load(f)
-
-    # Parse networks
-    networks = data.get("ietf-network:networks", {}).get("network", [])
-    if not networks:
-        raise ValueError("No networks found in the JSON file.")
-
-    # Initialize storage for RU, DU, CU nodes and relationships
-    nodes = {"RU": [], "DU": [], "CU": []}
-    network_tree = defaultdict(lambda: {"type": None, "supports": []})
-
-    # Collect nodes and links
-    for network in networks:
-        nodes_data = network.get("node", [])
-        links_data = network.get("ietf-network-topology:link", [])
-
-        # Process nodes
-        for node in nodes_data:
-            node_id = node.get("node-id", "")
-            node_type = node.get("o-ran-sc-network:type", "")
-
-            if node_id.startswith("O-RAN-RU"):
-                nodes["RU"].append(node_id)
-                network_tree[node_id]["type"] = "RU"
-            elif node_id.startswith("O-RAN-DU"):
-                nodes["DU"].append(node_id)
-                network_tree[node_id]["type"] = "DU"
-            elif node_id.startswith("O-RAN-CU"):
-                nodes["CU"].append(node_id)
-                network_tree[node_id]["type"] = "CU"
-
-        # Process links
-        for link in links_data:
-            source_node = link.get("source", {}).get("source-node", "")
-            dest_node = link.get("destination", {}).get("dest-node", "")
-
-            if not source_node or not dest_node:
-                continue  # Skip invalid links
-
-            # Determine the type of source and destination nodes
-            source_type = network_tree[source_node]["type"]
-            dest_type = network_tree[dest_node]["type"]
-
-            # Correct the relationship direction
-            if source_type == "DU" and dest_type == "RU":
-                # DU supports RU (correct direction)
-                network_tree[source_node]["supports"].append(dest_node)
-            elif source_type == "RU" and dest_type == "DU":
-                # Reverse the direction: DU should support RU
-                network_tree[dest_node]["supports"].append(source_node)
-            elif source_type == "CU" and dest_type == "DU":
-                # CU supports DU (correct direction)
-                network_tree[source_node]["supports"].append(dest_node)
-            elif source_type == "DU" and dest_type == "CU":
-                # Reverse the direction: CU should support DU
-                network_tree[dest_node]["supports"].append(source_node)
-
-    # Remove duplicates in the supports lists
-    for node_id, relationships in network_tree.items():
-        relationships["supports"] = list(set(relationships["supports"]))
-    
-    return nodes, network_tree
-
-# Example Usage
-json_file = "C:/Users/abhir/digitalTwin/generatedTopologies/o_ran_network_operational.json"
-try:
-    nodes, network_tree = parse_oran_topology(json_file)
-
-    print("Nodes:")
-    print(json.dumps(nodes, indent=2))
-
-    print("\nNetwork Tree:")
-    for node_id, details in network_tree.items():
-        if details["type"] in ["RU", "DU", "CU"]:  # Only print RU, DU, and CU nodes
-            print(f"Node ID: {node_id}")
-            print(f"  Type: {details['type']}")
-            print(f"  Supports: {details['supports']}")
-            print()
-
-except ValueError as e:
-    print(e)
+from collections import defaultdict
+import json
+import os
+import re
+import sys
+
+from .Instrumentation import stage
+
+try:
+    import ijson  # Optional, much faster event parser for streaming mode
+except ImportError:
+    ijson = None
+
+# Bump whenever the parsed tree changes, so that cached compiled topologies are rebuilt
+PARSER_VERSION = 2
+
+# Node type (o-ran-sc-network:type) -> node kind in the network tree
+NODE_TYPES = {
+    "o-ran-common-identity-refs:o-ru-function": "RU",
+    "o-ran-common-identity-refs:o-du-function": "DU",
+    "o-ran-common-identity-refs:o-cu-function": "CU",
+    "o-ran-sc-network:tower": "Tower",
+    "o-ran-sc-network:o-cloud": "O-Cloud",
+    "o-ran-sc-network:near-rt-ric": "Near-RT-RIC",
+    "o-ran-sc-network:smo": "SMO",
+}
+
+# Node ID prefix -> node kind, for topologies without node types (e.g. nt1.json)
+NODE_ID_PREFIXES = [
+    ("O-RAN-RU", "RU"),
+    ("O-RAN-DU", "DU"),
+    ("O-RAN-CU", "CU"),
+    ("O-RAN-Tower", "Tower"),
+    ("O-RAN-O-Cloud", "O-Cloud"),
+    ("O-RAN-NearRtRic", "Near-RT-RIC"),
+    ("O-RAN-SMO", "SMO"),
+]
+
+# Hosts are not linked to what they host; their IDs name it instead:
+# O-RAN-Tower-00-00-00-00 hosts O-RAN-RU-00-00-00-00-*, O-RAN-O-Cloud-DU-00-00-00 hosts O-RAN-DU-00-00-00-*
+# (host kind, host ID prefix, hosted ID prefix, hosted node kinds)
+HOSTING_RULES = [
+    ("Tower", "O-RAN-Tower-", "O-RAN-RU-", ("RU",)),
+    ("O-Cloud", "O-RAN-O-Cloud-", "O-RAN-", ("DU", "CU")),
+]
+
+# Event prefixes (ijson style) of the only fields the parser needs
+NETWORK_PREFIX = "ietf-network:networks.network.item"
+NODE_PREFIX = NETWORK_PREFIX + ".node.item"
+LINK_PREFIX = NETWORK_PREFIX + ".ietf-network-topology:link.item"
+
+# A string, a structural character, or a bare literal (number, true, false, null)
+JSON_TOKEN = re.compile(r'[ \t\n\r]*(?:"((?:[^"\\]|\\.)*)"|([{}\[\],:])|([^ \t\n\r{}\[\],:"]+))', re.S)
+
+def iter_json_events(file, chunk_size=1 << 16):
+    """
+    Incrementally parses a JSON text file and yields ijson-style (prefix, event, value) tuples.
+    Only one chunk plus the current path is held in memory at a time.
+    """
+    path = []           # Prefix components, "item" for array elements
+    containers = []     # "map" or "array" for each open container
+    expect_key = False
+    buffer = ""
+    pos = 0
+    eof = False
+
+    while True:
+        match = JSON_TOKEN.match(buffer, pos)
+        if match is None or (match.end() == len(buffer) and not eof):
+            # The token may continue in the next chunk
+            if eof:
+                if buffer[pos:].strip():
+                    raise ValueError("Invalid or truncated JSON in the topology file.")
+                return
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        pos = match.end()
+
+        text, char, literal = match.groups()
+        if char is None:
+            if literal is not None:
+                value = json.loads(literal)
+                event = "null" if value is None else "boolean" if isinstance(value, bool) else "number"
+            else:
+                value = json.loads('"' + text + '"') if "\\" in text else text
+                event = "string"
+            if expect_key:
+                path[-1] = value
+                expect_key = False
+                yield ".".join(path[:-1]), "map_key", value
+            else:
+                yield ".".join(path), event, value
+        elif char == "{":
+            yield ".".join(path), "start_map", None
+            path.append("")
+            containers.append("map")
+            expect_key = True
+        elif char == "[":
+            yield ".".join(path), "start_array", None
+            path.append("item")
+            containers.append("array")
+        elif char in "}]":
+            path.pop()
+            container = containers.pop()
+            expect_key = False
+            yield ".".join(path), "end_map" if container == "map" else "end_array", None
+        elif char == ",":
+            expect_key = containers[-1] == "map"
+
+def stream_networks(json_file):
+    """
+    Streams the topology file and returns its networks with only node-id, node type
+    and link source/destination materialized; termination points are never built.
+    """
+    networks = []
+    network = node = link = None
+
+    with open(json_file, 'rb' if ijson is not None else 'r') as f:
+        events = ijson.parse(f) if ijson is not None else iter_json_events(f)
+        for prefix, event, value in events:
+            if prefix == NETWORK_PREFIX:
+                if event == "start_map":
+                    network = {"node": [], "ietf-network-topology:link": []}
+                elif event == "end_map":
+                    networks.append(network)
+            elif prefix == NODE_PREFIX:
+                if event == "start_map":
+                    node = {}
+                elif event == "end_map":
+                    network["node"].append(node)
+            elif prefix == LINK_PREFIX:
+                if event == "start_map":
+                    link = {"source": {}, "destination": {}}
+                elif event == "end_map":
+                    network["ietf-network-topology:link"].append(link)
+            elif event == "string":
+                if prefix == NODE_PREFIX + ".node-id":
+                    node["node-id"] = value
+                elif prefix == NODE_PREFIX + ".o-ran-sc-network:type":
+                    node["o-ran-sc-network:type"] = value
+                elif prefix == LINK_PREFIX + ".source.source-node":
+                    link["source"]["source-node"] = value
+                elif prefix == LINK_PREFIX + ".destination.dest-node":
+                    link["destination"]["dest-node"] = value
+
+    return networks
+
+def parse_oran_topology(json_file, streaming=False):
+    """
+    Parses an ietf-network JSON topology into node lists and a network tree.
+
+    Nodes are classified by their o-ran-sc-network:type into RUs, DUs, CUs, towers (sites),
+    O-Clouds, Near-RT RICs and SMOs; untyped nodes by their ID prefix. DUs support RUs and
+    CUs support DUs through their links, towers and O-Clouds support (host) the nodes named
+    after them.
+    With streaming=True the file is walked incrementally instead of being loaded with
+    json.load, which keeps memory bounded for very large topologies.
+    """
+    with stage("read_topology", file=str(json_file), streaming=streaming) as s:
+        if streaming:
+            networks = stream_networks(json_file)
+        else:
+            with open(json_file, 'r') as f:
+                data = json.load(f)
+
+            # Parse networks
+            networks = data.get("ietf-network:networks", {}).get("network", [])
+        if s:
+            s.add(bytes_read=os.path.getsize(json_file), networks=len(networks))
+
+    if not networks:
+        raise ValueError("No networks found in the JSON file.")
+
+    with stage("build_network_tree") as s:
+        nodes, network_tree = build_network_tree(networks)
+        if s:
+            s.add(nodes=sum(len(ids) for ids in nodes.values()),
+                  links=sum(len(network.get("ietf-network-topology:link", [])) for network in networks))
+    return nodes, network_tree
+
+def build_network_tree(networks):
+    """
+    Builds the node lists and network tree of parse_oran_topology from the parsed networks.
+    """
+    # Initialize storage for the nodes of every kind and their relationships
+    nodes = {"RU": [], "DU": [], "CU": [], "Tower": [], "O-Cloud": [], "Near-RT-RIC": [], "SMO": []}
+    network_tree = defaultdict(lambda: {"type": None, "supports": []})
+
+    # Collect nodes and links
+    for network in networks:
+        nodes_data = network.get("node", [])
+        links_data = network.get("ietf-network-topology:link", [])
+
+        # Process nodes, classified by their type (or by their ID if they have none)
+        for node in nodes_data:
+            node_id = node.get("node-id", "")
+            node_type = node.get("o-ran-sc-network:type", "")
+
+            kind = NODE_TYPES.get(node_type) if node_type else classify_node_id(node_id)
+            if kind is not None:
+                nodes[kind].append(node_id)
+                network_tree[node_id]["type"] = kind
+
+        # Process links
+        for link in links_data:
+            source_node = link.get("source", {}).get("source-node", "")
+            dest_node = link.get("destination", {}).get("dest-node", "")
+
+            if not source_node or not dest_node:
+                continue  # Skip invalid links
+
+            # Determine the type of source and destination nodes
+            source_type = network_tree[source_node]["type"]
+            dest_type = network_tree[dest_node]["type"]
+
+            # Correct the relationship direction
+            if source_type == "DU" and dest_type == "RU":
+                # DU supports RU (correct direction)
+                network_tree[source_node]["supports"].append(dest_node)
+            elif source_type == "RU" and dest_type == "DU":
+                # Reverse the direction: DU should support RU
+                network_tree[dest_node]["supports"].append(source_node)
+            elif source_type == "CU" and dest_type == "DU":
+                # CU supports DU (correct direction)
+                network_tree[source_node]["supports"].append(dest_node)
+            elif source_type == "DU" and dest_type == "CU":
+                # Reverse the direction: CU should support DU
+                network_tree[dest_node]["supports"].append(source_node)
+
+    # Remove duplicates in the supports lists
+    for node_id, relationships in network_tree.items():
+        relationships["supports"] = list(set(relationships["supports"]))
+
+    add_hosted_nodes(nodes, network_tree)
+    
+    return nodes, network_tree
+
+def classify_node_id(node_id):
+    """
+    Returns the node kind of an untyped node from its ID prefix, or None.
+    """
+    for prefix, kind in NODE_ID_PREFIXES:
+        if node_id.startswith(prefix):
+            return kind
+    return None
+
+def add_hosted_nodes(nodes, network_tree):
+    """
+    Fills the supports lists of towers (sites) and O-Clouds with the nodes they host,
+    matched by node ID (see HOSTING_RULES). Every node gets the host with the longest
+    matching ID.
+    """
+    for host_kind, host_prefix, hosted_prefix, hosted_kinds in HOSTING_RULES:
+        hosts = {
+            hosted_prefix + host_id[len(host_prefix):]: host_id
+            for host_id in nodes[host_kind] if host_id.startswith(host_prefix)
+        }
+        if not hosts:
+            continue
+
+        for kind in hosted_kinds:
+            for node_id in nodes[kind]:
+                # Try the ID without its last 1, 2, ... "-" groups, longest first
+                key = node_id
+                while "-" in key:
+                    key = key.rsplit("-", 1)[0]
+                    if key in hosts:
+                        network_tree[hosts[key]]["supports"].append(node_id)
+                        break
+
+def main(argv=None):
+    """
+    Prints the RU/DU/CU tree of the topology file given on the command line, like
+    python -m digitalTwin topology.
+    """
+    from .__main__ import main as cli_main
+
+    return cli_main(["topology"] + list(sys.argv[1:] if argv is None else argv))
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+import re
+from datetime import timedelta
+
+import numpy as np
+
+from .csvFileGenerator import BASELINE_UTILIZATIONS, get_start_of_day
+from .TimeSeriesStore import CsvSeriesWriter, SeriesWriter
+
+# Scale of the per-sample noise (0.5 - x) * NOISE_SCALE, as in csvFileGenerator
+NOISE_SCALE = 0.7
+
+# Default weekday (Monday first) scaling of the hourly baseline for weekly scenarios
+WEEKDAY_SCALES = [1.0, 1.0, 1.0, 1.0, 1.0, 0.8, 0.7]
+
+DURATION_UNITS = {"s": 1, "min": 60, "h": 3600, "d": 86400}
+DURATION_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(s|min|h|d)?\s*$")
+
+def parse_duration(text):
+    """
+    Parses a duration such as "30s", "15min", "1h" or "2d" (plain numbers are seconds)
+    into a timedelta.
+    """
+    match = DURATION_PATTERN.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid duration: {text!r} (expected e.g. 30s, 15min, 1h or 2d)")
+    return timedelta(seconds=float(match.group(1)) * DURATION_UNITS[match.group(2) or "s"])
+
+def weekly_profile(baseline=BASELINE_UTILIZATIONS, weekday_scales=WEEKDAY_SCALES):
+    """
+    Builds a (7 x 24) weekly profile (Monday first) by scaling an hourly baseline per weekday.
+    """
+    return np.clip(np.outer(weekday_scales, baseline), 0, 1)
+
+def time_axis(start, step, num_intervals):
+    """
+    Returns num_intervals datetime64[us] timestamps from start in increments of step.
+    """
+    step = np.timedelta64(int(step / timedelta(microseconds=1)), "us")
+    return np.datetime64(start, "us") + np.arange(num_intervals) * step
+
+def baseline_at(timestamps, profile=BASELINE_UTILIZATIONS):
+    """
+    Returns the baseline utilization (U_ru,b) of every timestamp.
+
+    profile is either an hourly table (24 values, the same every day) or a weekly table
+    (7 x 24, Monday first); values are constant within each hour.
+    """
+    profile = np.asarray(profile, dtype=float)
+    hours = timestamps.astype("datetime64[h]").astype(np.int64)
+    if profile.ndim == 1:
+        return profile[hours % 24]
+    # 1970-01-01 was a Thursday (weekday 3)
+    weekdays = (hours // 24 + 3) % 7
+    return profile[weekdays, hours % 24]
+
+def generate_utilizations(timestamps, num_rus, rng, profile=BASELINE_UTILIZATIONS):
+    """
+    Generates a (T x N_RU) utilization matrix: the baseline of each timestamp plus uniform
+    noise, clamped to [0, 1] and rounded to 2 decimals like csvFileGenerator.
+    """
+    baseline = baseline_at(timestamps, profile)[:, None]
+    noise = (0.5 - rng.random((len(timestamps), num_rus))) * NOISE_SCALE
+    return np.round(np.clip(baseline + noise, 0, 1), 2)
+
+def iter_scenario_chunks(ru_node_ids, num_intervals, step=timedelta(hours=1), start=None, seed=None,
+                         profile=BASELINE_UTILIZATIONS, chunk_size=1440):
+    """
+    Yields (timestamps, utilization_values, ru_node_ids) blocks of at most chunk_size rows,
+    the format TimeSeriesStore.iter_series_chunks and run_pipeline_chunked accept.
+
+    The random numbers are drawn from one generator in order, so a seed gives the same
+    scenario for every chunk_size.
+    """
+    if start is None:
+        start = get_start_of_day()
+    rng = np.random.default_rng(seed)
+    ru_node_ids = list(ru_node_ids)
+
+    for first in range(0, num_intervals, chunk_size):
+        timestamps = time_axis(start + first * step, step, min(chunk_size, num_intervals - first))
+        yield timestamps, generate_utilizations(timestamps, len(ru_node_ids), rng, profile), ru_node_ids
+
+def generate_scenario(ru_node_ids, num_intervals, step=timedelta(hours=1), start=None, seed=None,
+                      profile=BASELINE_UTILIZATIONS, chunk_size=1440, csv_file=None, store_folder=None):
+    """
+    Generates a scenario block by block and streams it to a CSV file and/or a time series
+    store folder without holding the whole series in memory. Returns the number of rows written.
+    """
+    writers = []
+    num_rows = 0
+    try:
+        if csv_file is not None:
+            writers.append(CsvSeriesWriter(csv_file, ru_node_ids))
+        if store_folder is not None:
+            writers.append(SeriesWriter(store_folder, ru_node_ids))
+
+        for timestamps, utilization_values, _ in iter_scenario_chunks(
+                ru_node_ids, num_intervals, step, start, seed, profile, chunk_size):
+            for writer in writers:
+                writer.append(timestamps, utilization_values)
+            num_rows += len(timestamps)
+    finally:
+        for writer in writers:
+            writer.close()
+
+    return num_rows
+
+def main():
+    from .TopologyCache import load_topology_cached
+
+    json_file = input("Enter the JSON topology file path: ").strip()
+    days = int(input("Enter the number of days: ").strip())
+    step = parse_duration(input("Enter the resolution (e.g. 15min): ").strip())
+
+    _, _, topology_index = load_topology_cached(json_file)
+    num_intervals = int(timedelta(days=days) / step)
+    num_rows = generate_scenario(
+        topology_index.ru_ids, num_intervals, step, seed=0, profile=weekly_profile(),
+        csv_file="CSVfileOutputs/ru_utilization_data.csv")
+    print(f"Generated {num_rows} timestamps for {len(topology_index.ru_ids)} RUs.")
+
+if __name__ == "__main__":
+    main()
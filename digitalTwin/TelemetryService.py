@@ -0,0 +1,433 @@
+"""
+Asyncio ingestion service feeding RU utilization telemetry into an OnlinePowerEngine.
+
+Collectors send samples in a line protocol, over TCP, a Unix socket or an HTTP POST to
+/samples. Each line holds one timestamp (epoch seconds or ISO 8601) and any number of
+RU samples:
+
+    1734652800 O-RAN-RU-00-00-00-00-00=0.42 O-RAN-RU-00-00-00-00-01=0.37
+
+Utilizations are numbers in [0, 1]. A line with a malformed timestamp or sample is
+dropped as a whole and counted as invalid.
+
+Samples are coalesced into ticks of a fixed length. Every line protocol connection is a
+collector sending its ticks in order. A tick is applied to the engine once every
+connected collector has sent a tick more than `lateness` ticks newer, so one collector
+running ahead does not drop the samples of the others. A tick is also applied once no
+sample has arrived for a tick's length, or once more than max_pending ticks are waiting.
+RUs without a sample keep their previous utilization. Samples for a tick that was already
+applied are dropped and counted as late.
+
+Parsed batches pass through a bounded queue. While the queue is full, the connection
+handlers stop reading, so TCP flow control slows the collectors down instead of
+buffering without limit. The current power is served as JSON on an HTTP endpoint:
+
+    GET /power              totals of the last applied tick
+    GET /power/<node ID>    power of an RU, DU, CU, tower or O-Cloud
+    GET /nodes/<kind>       power of every RU, DU, CU, Tower or O-Cloud
+    GET /history            [timestamp, RAN total power, network total power] of the recent ticks
+    GET /stats              ingestion counters
+
+The totals are those of run_pipeline: total_power is the RAN (RU + DU + CU) power and
+network_total_power adds the tower, O-Cloud, Near-RT RIC and SMO power.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .Instrumentation import stage
+from .NEE.OnlinePowerEngine import OnlinePowerEngine
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes of the query endpoint
+HTTP_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large"}
+
+# Node kinds of GET /nodes/<kind> -> engine attribute prefix
+NODE_KINDS = {"RU": "ru", "DU": "du", "CU": "cu", "TOWER": "tower", "O-CLOUD": "o_cloud"}
+
+# Largest HTTP request body accepted by POST /samples
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+def parse_timestamp(text):
+    """
+    Parses epoch seconds or an ISO 8601 timestamp (naive timestamps are UTC) into epoch seconds.
+    """
+    try:
+        return float(text)
+    except ValueError:
+        timestamp = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.timestamp()
+
+def format_epoch(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat() if seconds is not None else None
+
+class TelemetryService:
+    """
+    Coalesces RU utilization samples from many collectors into per-tick changes, applies
+    them to an OnlinePowerEngine and answers power queries. Start listeners with
+    start_line_server / start_unix_server / start_http_server inside a running event loop,
+    and stop everything with close().
+    """
+    def __init__(self, topology_index, tick=1.0, lateness=1, queue_size=256, history=3600, max_pending=600,
+                 power_models=None):
+        self.engine = OnlinePowerEngine(topology_index, power_models=power_models)
+        self.ru_columns = dict(topology_index.ru_columns)
+        self.tick = float(tick)
+        self.lateness = int(lateness)
+        self.max_pending = max_pending
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.history = deque(maxlen=history)
+        self.pending = {}             # Tick number -> {RU column: utilization}
+        self.newest_tick = None
+        self.source_ticks = {}        # Connected collector -> newest tick it sent
+        self.applied_tick = None
+        self.timestamp_cache = {}     # The same timestamp arrives on many lines
+        self.stats = {"lines": 0, "samples": 0, "applied": 0, "late": 0, "unknown": 0, "invalid": 0, "ticks": 0,
+                      "failed_ticks": 0}
+        self.servers = []
+        self.consumer = None
+
+    def parse_lines(self, lines):
+        """
+        Parses lines of the line protocol into a batch {tick number: {RU column: utilization}}.
+        Utilizations must be numbers in [0, 1]. A line with a malformed timestamp or sample
+        is skipped as a whole and counted as invalid; samples of unknown RUs are counted and
+        skipped.
+        """
+        batch = {}
+        ru_columns, cache, tick_seconds = self.ru_columns, self.timestamp_cache, self.tick
+        stats = self.stats
+        for line in lines:
+            parts = line.split()
+            if not parts:
+                continue
+            stats["lines"] += 1
+            tick = cache.get(parts[0])
+            line_changes = {}
+            unknown = 0
+            try:
+                if tick is None:
+                    if len(cache) > 4096:
+                        cache.clear()
+                    tick = cache[parts[0]] = int(parse_timestamp(parts[0]) // tick_seconds)
+                for token in parts[1:]:
+                    ru, _, value = token.partition("=")
+                    column = ru_columns.get(ru)
+                    if column is None:
+                        unknown += 1
+                        continue
+                    value = float(value)
+                    if not 0.0 <= value <= 1.0:  # Also false for NaN
+                        raise ValueError(f"Utilization out of range: {token}")
+                    line_changes[column] = value
+            except (ValueError, OverflowError):  # int(inf) overflows
+                stats["invalid"] += 1
+                continue
+            changes = batch.get(tick)
+            if changes is None:
+                batch[tick] = line_changes
+            else:
+                changes.update(line_changes)
+            stats["unknown"] += unknown
+            stats["samples"] += len(parts) - 1
+        return batch
+
+    async def submit(self, lines, source=None):
+        """
+        Parses lines and queues the batch, waiting while the queue is full. source
+        identifies a collector connection whose ticks arrive in order (None for one-off
+        batches such as HTTP posts).
+        """
+        batch = self.parse_lines(lines)
+        if batch:
+            await self.queue.put((source, batch))
+
+    def _merge(self, source, batch):
+        if batch is None:
+            # The collector disconnected; once the last one has, nothing pending is incomplete
+            self.source_ticks.pop(source, None)
+            if not self.source_ticks and self.pending:
+                self._apply(self.newest_tick)
+            return
+        if source is not None:
+            self.source_ticks[source] = max(self.source_ticks.get(source, max(batch)), max(batch))
+        for tick, changes in batch.items():
+            if self.applied_tick is not None and tick <= self.applied_tick:
+                self.stats["late"] += len(changes)
+                continue
+            pending = self.pending.get(tick)
+            if pending is None:
+                self.pending[tick] = changes
+            else:
+                pending.update(changes)
+            if self.newest_tick is None or tick > self.newest_tick:
+                self.newest_tick = tick
+
+    def _watermark(self):
+        """
+        Returns the newest tick every connected collector has passed (by lateness ticks).
+        """
+        newest = min(self.source_ticks.values()) if self.source_ticks else self.newest_tick
+        return newest - self.lateness - 1
+
+    def _apply(self, last_tick):
+        """
+        Applies the pending ticks up to last_tick to the engine, oldest first.
+        """
+        if len(self.pending) > self.max_pending:
+            last_tick = max(last_tick, sorted(self.pending)[len(self.pending) - self.max_pending - 1])
+        for tick in sorted(t for t in self.pending if t <= last_tick):
+            changes = self.pending.pop(tick)
+            self.applied_tick = tick
+            try:
+                with stage("ingest_tick", samples=len(changes)):
+                    total_power = self.engine.update(changes, timestamp=tick * self.tick)
+            except Exception:
+                # A failed tick must not stop the consumer, or every later sample would stay queued
+                logger.exception("Skipping tick %s", format_epoch(tick * self.tick))
+                self.stats["failed_ticks"] += 1
+                self.engine.resync()
+                continue
+            self.stats["applied"] += len(changes)
+            self.stats["ticks"] += 1
+            self.history.append((tick * self.tick, total_power, self.engine.network_total_power))
+
+    async def _consume(self):
+        while True:
+            try:
+                batch = await asyncio.wait_for(self.queue.get(), timeout=self.tick)
+            except asyncio.TimeoutError:
+                # Idle for a tick: nothing newer is coming soon, so apply what is pending
+                if self.pending:
+                    self._apply(self.newest_tick)
+                continue
+            self._merge(*batch)
+            # Drain what is already queued before applying, so ticks are applied once
+            while not self.queue.empty():
+                self._merge(*self.queue.get_nowait())
+            if self.pending:
+                self._apply(self._watermark())
+
+    def _start_consumer(self):
+        if self.consumer is None:
+            self.consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    async def _handle_lines(self, reader, writer):
+        source = object()
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(1 << 16)
+                if not data:
+                    break
+                buffer += data
+                end = buffer.rfind(b"\n")
+                if end < 0:
+                    continue
+                lines, buffer = buffer[:end].decode().splitlines(), buffer[end + 1:]
+                await self.submit(lines, source)
+            if buffer.strip():
+                await self.submit([buffer.decode()], source)
+        finally:
+            await self.queue.put((source, None))
+            writer.close()
+
+    async def start_line_server(self, host="127.0.0.1", port=9200):
+        """
+        Accepts line protocol connections on TCP host:port. Returns the bound port.
+        """
+        self._start_consumer()
+        server = await asyncio.start_server(self._handle_lines, host, port)
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def start_unix_server(self, path):
+        """
+        Accepts line protocol connections on a Unix socket.
+        """
+        self._start_consumer()
+        self.servers.append(await asyncio.start_unix_server(self._handle_lines, path))
+        return path
+
+    async def start_http_server(self, host="127.0.0.1", port=9201):
+        """
+        Serves the query endpoints and POST /samples on host:port. Returns the bound port.
+        """
+        self._start_consumer()
+        server = await asyncio.start_server(self._handle_http, host, port)
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def _handle_http(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode().split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode().strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                status, body = 400, {"error": "Malformed request"}
+            elif request_line[0] == "POST":
+                length = int(headers.get("content-length", 0))
+                if request_line[1] != "/samples":
+                    status, body = 404, {"error": "Not found"}
+                elif length > MAX_BODY_BYTES:
+                    status, body = 413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"}
+                else:
+                    samples, invalid = self.stats["samples"], self.stats["invalid"]
+                    await self.submit((await reader.readexactly(length)).decode().splitlines())
+                    status, body = 202, {"samples": self.stats["samples"] - samples,
+                                         "invalid_lines": self.stats["invalid"] - invalid}
+            elif request_line[0] == "GET":
+                status, body = self.query(request_line[1])
+            else:
+                status, body = 405, {"error": "Use GET or POST"}
+
+            payload = json.dumps(body).encode()
+            writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def query(self, path):
+        """
+        Answers a query endpoint path. Returns (HTTP status, JSON-serializable body).
+        """
+        engine = self.engine
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts == ["power"]:
+            return 200, {
+                "timestamp": format_epoch(engine.timestamp),
+                "ru_total_power": engine.ru_total_power,
+                "du_total_power": engine.du_total_power,
+                "cu_total_power": engine.cu_total_power,
+                "total_power": engine.total_power,
+                "overhead_total_power": engine.overhead_total_power,
+                "network_total_power": engine.network_total_power,
+            }
+        if len(parts) == 2 and parts[0] == "power":
+            try:
+                return 200, {"node": parts[1], "timestamp": format_epoch(engine.timestamp),
+                             "power": engine.node_power(parts[1])}
+            except KeyError:
+                return 404, {"error": f"Unknown node: {parts[1]}"}
+        if len(parts) == 2 and parts[0] == "nodes" and parts[1].upper() in NODE_KINDS:
+            kind = NODE_KINDS[parts[1].upper()]
+            return 200, {"timestamp": format_epoch(engine.timestamp),
+                         "power": dict(zip(getattr(engine.topology_index, f"{kind}_ids"), getattr(engine, f"{kind}_power")))}
+        if parts == ["history"]:
+            return 200, [[format_epoch(timestamp), total_power, network_total_power]
+                         for timestamp, total_power, network_total_power in self.history]
+        if parts == ["stats"]:
+            return 200, dict(self.stats, queued=self.queue.qsize(), pending_ticks=len(self.pending),
+                             collectors=len(self.source_ticks),
+                             last_tick=format_epoch(self.applied_tick * self.tick if self.applied_tick is not None else None))
+        return 404, {"error": "Not found"}
+
+    async def close(self):
+        """
+        Stops the listeners, applies every queued and pending tick and stops the consumer.
+        """
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+        if self.consumer is not None:
+            self.consumer.cancel()
+            try:
+                await self.consumer
+            except asyncio.CancelledError:
+                pass
+            self.consumer = None
+        while not self.queue.empty():
+            self._merge(*self.queue.get_nowait())
+        if self.pending:
+            self._apply(self.newest_tick)
+
+async def serve(topology_index, host="127.0.0.1", port=9200, http_port=9201, unix_path=None, tick=1.0, lateness=1,
+                queue_size=256, max_pending=600, power_models=None):
+    """
+    Runs a TelemetryService until cancelled: line protocol on TCP port (and/or a Unix
+    socket) and the query endpoint on http_port. power_models is as in OnlinePowerEngine.
+    """
+    service = TelemetryService(topology_index, tick, lateness, queue_size, max_pending=max_pending,
+                               power_models=power_models)
+    if port is not None:
+        port = await service.start_line_server(host, port)
+        logger.info("Accepting telemetry on %s:%s", host, port)
+    if unix_path is not None:
+        await service.start_unix_server(unix_path)
+        logger.info("Accepting telemetry on %s", unix_path)
+    if http_port is not None:
+        http_port = await service.start_http_server(host, http_port)
+        logger.info("Serving power on http://%s:%s/power", host, http_port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+async def fake_collector(ru_node_ids, utilizations, start, tick, host="127.0.0.1", port=9200, unix_path=None,
+                         rus_per_line=100):
+    """
+    Sends a (T x N) utilization array for ru_node_ids over the line protocol, one tick per
+    row starting at epoch second start, as fast as the service accepts it. Returns the
+    number of samples sent.
+    """
+    if unix_path is not None:
+        _, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        _, writer = await asyncio.open_connection(host, port)
+    samples = 0
+    try:
+        for row, values in enumerate(np.asarray(utilizations).tolist()):
+            timestamp = repr(start + row * tick)
+            lines = []
+            for first in range(0, len(ru_node_ids), rus_per_line):
+                lines.append(timestamp + " " + " ".join(
+                    f"{ru}={value!r}" for ru, value in zip(ru_node_ids[first:first + rus_per_line],
+                                                          values[first:first + rus_per_line])))
+            writer.write(("\n".join(lines) + "\n").encode())
+            samples += len(values)
+            await writer.drain()  # Waits while the service applies backpressure
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return samples
+
+async def run_fake_collectors(ru_node_ids, num_ticks, tick=1.0, collectors=4, host="127.0.0.1", port=9200,
+                              unix_path=None, start=None, seed=0):
+    """
+    Load-tests a running service: collectors concurrent fake collectors each send the
+    utilizations of their share of ru_node_ids for num_ticks ticks. Returns (samples sent,
+    seconds, expected utilizations (num_ticks x N) in the columns of ru_node_ids).
+    """
+    from .ScenarioGenerator import generate_utilizations, time_axis
+    from datetime import timedelta
+
+    start = float(int(time.time() // tick * tick)) if start is None else start
+    timestamps = time_axis(datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None), timedelta(seconds=tick),
+                           num_ticks)
+    utilizations = np.round(generate_utilizations(timestamps, len(ru_node_ids), np.random.default_rng(seed)), 4)
+    shares = np.array_split(np.arange(len(ru_node_ids)), collectors)
+
+    began = time.perf_counter()
+    sent = await asyncio.gather(*(
+        fake_collector([ru_node_ids[i] for i in share.tolist()], utilizations[:, share], start, tick, host, port,
+                       unix_path)
+        for share in shares if len(share)))
+    return sum(sent), time.perf_counter() - began, utilizations
@@ -0,0 +1,368 @@
+import csv
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# A series is stored as a folder of .npy files so that each array can be memory-mapped:
+#   node_ids.npy    (N,)    node IDs of the columns
+#   timestamps.npy  (T,)    datetime64[us] in UTC
+#   values.npy      (T, N)  float64 values, one row per timestamp
+NODE_IDS_FILE = "node_ids.npy"
+TIMESTAMPS_FILE = "timestamps.npy"
+VALUES_FILE = "values.npy"
+
+# Fixed .npy header size of appendable files, so the shape can be rewritten in place
+NPY_HEADER_SIZE = 256
+
+def is_series_store(path):
+    """
+    Returns True if path is a time series store folder written by save_series.
+    """
+    return os.path.isfile(os.path.join(path, VALUES_FILE))
+
+class TimeAxis:
+    """
+    Regular time axis start, start + step, ..., start + (length - 1) * step kept as three
+    numbers instead of one timestamp per row. Indexing gives datetime64[us] values, slicing
+    gives another TimeAxis and np.asarray(axis) builds the datetime64[us] array.
+    """
+    __slots__ = ("start", "step", "length")
+
+    def __init__(self, start, step, length):
+        self.start = np.datetime64(start, "us")
+        self.step = np.timedelta64(step, "us") if isinstance(step, np.timedelta64) else \
+            np.timedelta64(int(step / timedelta(microseconds=1)), "us")
+        self.length = int(length)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            first, last, stride = index.indices(self.length)
+            return TimeAxis(self.start + first * self.step, self.step * stride, len(range(first, last, stride)))
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("time axis index out of range")
+        return self.start + index * self.step
+
+    def __array__(self, dtype=None, copy=None):
+        timestamps = self.start + np.arange(self.length) * self.step
+        return timestamps if dtype is None else timestamps.astype(dtype)
+
+    def __iter__(self):
+        return iter(np.asarray(self))
+
+    def __eq__(self, other):
+        return (isinstance(other, TimeAxis) and
+                (self.start, self.step, self.length) == (other.start, other.step, other.length))
+
+    def __repr__(self):
+        return f"TimeAxis(start={self.start}, step={self.step}, length={self.length})"
+
+    @property
+    def end(self):
+        """
+        End of the last interval (start + length * step).
+        """
+        return self.start + self.length * self.step
+
+    @property
+    def step_hours(self):
+        return float(self.step / np.timedelta64(1, "h"))
+
+    def searchsorted(self, timestamp, side="left"):
+        """
+        Returns the row where timestamp would be inserted, like np.searchsorted.
+        """
+        offset = (np.datetime64(timestamp, "us") - self.start) / self.step
+        row = np.floor(offset) + 1 if side == "right" else np.ceil(offset)
+        return int(min(max(row, 0), self.length))
+
+def compact_time_axis(timestamps):
+    """
+    Returns a TimeAxis for regularly spaced timestamps, otherwise the datetime64[us] array.
+    """
+    if isinstance(timestamps, TimeAxis):
+        return timestamps
+    timestamps = to_datetime64(timestamps)
+    if len(timestamps) < 2:
+        return timestamps
+    steps = np.diff(timestamps)
+    if steps[0] > np.timedelta64(0, "us") and (steps == steps[0]).all():
+        return TimeAxis(timestamps[0], steps[0], len(timestamps))
+    return timestamps
+
+def parse_timestamps(strings):
+    """
+    Parses ISO 8601 timestamps into a datetime64[us] UTC array without creating a datetime
+    per row. Offsets ("+01:00", "Z") are converted to UTC; naive timestamps are taken as UTC.
+    """
+    text = np.asarray(strings, dtype=str)
+    if text.size == 0:
+        return np.array([], dtype="datetime64[us]")
+
+    # The fixed-width strings as a (rows x characters) array of code points, padded with zeros
+    codes = text.view(np.uint32).reshape(len(text), -1).copy()
+    rows = np.arange(len(text))
+    lengths = np.count_nonzero(codes, axis=1)
+    character = lambda position: codes[rows, np.clip(lengths + position, 0, codes.shape[1] - 1)]
+
+    zulu = character(-1) == ord("Z")
+    has_offset = (lengths >= 22) & np.isin(character(-6), (ord("+"), ord("-"))) & (character(-3) == ord(":"))
+    digits = lambda position: character(position).astype(np.int64) - ord("0")
+    offset_minutes = np.where(has_offset, (digits(-5) * 10 + digits(-4)) * 60 + digits(-2) * 10 + digits(-1), 0)
+    offset_minutes[character(-6) == ord("-")] *= -1
+
+    cut = np.where(has_offset, lengths - 6, np.where(zulu, lengths - 1, lengths))
+    codes[np.arange(codes.shape[1]) >= cut[:, None]] = 0
+    timestamps = codes.view(text.dtype).ravel().astype("datetime64[us]")
+    return timestamps - offset_minutes.astype("timedelta64[m]")
+
+def format_timestamps(timestamps):
+    """
+    Formats timestamps as ISO 8601 UTC strings ("2024-12-20T00:00:00+00:00", with
+    microseconds only when they are not zero, like datetime.isoformat) in one array operation.
+    """
+    timestamps = to_datetime64(timestamps)
+    strings = np.datetime_as_string(timestamps, unit="s")
+    fractional = timestamps != timestamps.astype("datetime64[s]")
+    if fractional.any():
+        strings = strings.astype(object)
+        strings[fractional] = np.datetime_as_string(timestamps[fractional], unit="us")
+    return np.char.add(strings.astype(str), "+00:00").tolist()
+
+def to_datetime64(timestamps):
+    """
+    Converts datetimes (or a TimeAxis) to a datetime64[us] UTC array. Naive datetimes are
+    taken as UTC, like the CSV readers do.
+    """
+    if isinstance(timestamps, TimeAxis):
+        return np.asarray(timestamps)
+    if isinstance(timestamps, np.ndarray) and np.issubdtype(timestamps.dtype, np.datetime64):
+        return timestamps.astype("datetime64[us]")
+    return np.array([
+        timestamp if timestamp.tzinfo is None else timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        for timestamp in timestamps
+    ], dtype="datetime64[us]")
+
+def to_datetimes(timestamps):
+    """
+    Converts a datetime64 array to timezone-aware UTC datetimes.
+    """
+    return [timestamp.replace(tzinfo=timezone.utc) for timestamp in timestamps.astype("datetime64[us]").astype(datetime)]
+
+def save_series(folder, timestamps, values, node_ids):
+    """
+    Saves a (T x N) series to a store folder.
+    """
+    values = np.asarray(values, dtype=float).reshape(len(timestamps), len(node_ids))
+    os.makedirs(folder, exist_ok=True)
+    np.save(os.path.join(folder, NODE_IDS_FILE), np.asarray(node_ids, dtype=str))
+    np.save(os.path.join(folder, TIMESTAMPS_FILE), to_datetime64(timestamps))
+    np.save(os.path.join(folder, VALUES_FILE), values)
+
+def open_series(folder, mmap_mode="r"):
+    """
+    Opens a store folder and returns (timestamps, values, node_ids).
+
+    timestamps and values are memory-mapped, so opening a series is independent of its
+    length and slicing values reads only the selected rows from disk.
+    """
+    node_ids = np.load(os.path.join(folder, NODE_IDS_FILE)).tolist()
+    timestamps = np.load(os.path.join(folder, TIMESTAMPS_FILE), mmap_mode=mmap_mode)
+    values = np.load(os.path.join(folder, VALUES_FILE), mmap_mode=mmap_mode)
+    return timestamps, values, node_ids
+
+def select(series, node_ids=None, start=None, end=None):
+    """
+    Returns the (timestamps, values, node_ids) of a series restricted to the given nodes
+    and to the time window [start, end).
+
+    The time window is located by binary search on the sorted timestamps and is a view
+    of the memory-mapped data; selecting nodes copies only the selected columns.
+    """
+    timestamps, values, all_node_ids = series
+
+    first = 0 if start is None else np.searchsorted(timestamps, to_datetime64([start])[0], side="left")
+    last = len(timestamps) if end is None else np.searchsorted(timestamps, to_datetime64([end])[0], side="left")
+    timestamps = timestamps[first:last]
+    values = values[first:last]
+
+    if node_ids is not None:
+        columns = {node_id: column for column, node_id in enumerate(all_node_ids)}
+        values = values[:, [columns[node_id] for node_id in node_ids]]
+        all_node_ids = list(node_ids)
+
+    return timestamps, values, all_node_ids
+
+def read_csv_series(csv_file):
+    """
+    Reads a wide "Timestamp,<node IDs...>" CSV file and returns (timestamps, values, node_ids)
+    with a TimeAxis for regularly spaced rows (a datetime64[us] array otherwise) and a
+    (T x N) array.
+    """
+    # Two passes of NumPy's C parser (values, then the timestamp column) instead of a Python loop over the rows
+    with open(csv_file, mode='r') as file:
+        node_ids = next(csv.reader(file))[1:]
+        values = np.loadtxt(file, delimiter=",", usecols=range(1, len(node_ids) + 1), ndmin=2)
+    with open(csv_file, mode='r') as file:
+        next(file)
+        timestamps = np.loadtxt(file, delimiter=",", usecols=0, dtype=str, ndmin=1)
+
+    values = values.reshape(len(timestamps), len(node_ids))
+    return compact_time_axis(parse_timestamps(timestamps)), values, node_ids
+
+def csv_to_series(csv_file, folder):
+    """
+    Converts a wide "Timestamp,<node IDs...>" CSV file into a store folder.
+    """
+    timestamps, values, node_ids = read_csv_series(csv_file)
+    save_series(folder, timestamps, values, node_ids)
+
+def series_to_csv(folder, csv_file):
+    """
+    Exports a store folder to a wide "Timestamp,<node IDs...>" CSV file.
+    """
+    timestamps, values, node_ids = open_series(folder)
+    os.makedirs(os.path.dirname(csv_file) or ".", exist_ok=True)
+
+    with open(csv_file, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Timestamp"] + node_ids)
+        for timestamp, row in zip(format_timestamps(timestamps), values.tolist()):
+            writer.writerow([timestamp] + row)
+
+def iter_csv_chunks(csv_file, chunk_size):
+    """
+    Reads a wide "Timestamp,<node IDs...>" CSV file in blocks of chunk_size rows and yields
+    (timestamps, values, node_ids) with the timestamps as in read_csv_series and a (rows x N) array.
+    """
+    with open(csv_file, mode='r') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        node_ids = header[1:]
+
+        timestamps = []
+        rows = []
+        for row in reader:
+            timestamps.append(row[0])
+            rows.append(row[1:])
+            if len(rows) == chunk_size:
+                yield compact_time_axis(parse_timestamps(timestamps)), np.array(rows, dtype=float), node_ids
+                timestamps = []
+                rows = []
+        if rows:
+            yield compact_time_axis(parse_timestamps(timestamps)), np.array(rows, dtype=float), node_ids
+
+def iter_series_chunks(source, chunk_size):
+    """
+    Yields (timestamps, values, node_ids) blocks of at most chunk_size rows from a CSV file,
+    a store folder (read through the memory map), an in-memory (timestamps, values, node_ids)
+    tuple, or an iterable that already yields such blocks.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if not is_series_store(source):
+            yield from iter_csv_chunks(source, chunk_size)
+            return
+        timestamps, values, node_ids = open_series(source)
+        for start in range(0, len(timestamps), chunk_size):
+            yield (compact_time_axis(np.asarray(timestamps[start:start + chunk_size])),
+                   np.asarray(values[start:start + chunk_size]), node_ids)
+    elif isinstance(source, tuple):
+        timestamps, values, node_ids = source
+        for start in range(0, len(timestamps), chunk_size):
+            yield timestamps[start:start + chunk_size], values[start:start + chunk_size], node_ids
+    else:
+        yield from source
+
+class _NpyAppender:
+    """
+    Writes a .npy file whose first dimension grows with every append.
+    """
+    def __init__(self, filename, dtype, row_shape):
+        self.file = open(filename, 'wb')
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+        self._write_header()
+
+    def _write_header(self):
+        header = repr({
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (self.rows,) + self.row_shape,
+        })
+        # magic string (6) + version (2) + header length (2) + padded header ending in a newline
+        header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + "\n"
+        self.file.seek(0)
+        self.file.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+
+    def append(self, block):
+        block = np.ascontiguousarray(block, dtype=self.dtype).reshape((-1,) + self.row_shape)
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(block.tobytes())
+        self.rows += len(block)
+
+    def close(self):
+        self._write_header()
+        self.file.close()
+
+class SeriesWriter:
+    """
+    Appends (rows x N) blocks to a store folder, so a series can be written without ever
+    holding it in memory. Use as a context manager or call close() when done.
+    """
+    def __init__(self, folder, node_ids):
+        os.makedirs(folder, exist_ok=True)
+        np.save(os.path.join(folder, NODE_IDS_FILE), np.asarray(node_ids, dtype=str))
+        self.timestamps = _NpyAppender(os.path.join(folder, TIMESTAMPS_FILE), "datetime64[us]", ())
+        self.values = _NpyAppender(os.path.join(folder, VALUES_FILE), float, (len(node_ids),))
+
+    def append(self, timestamps, values):
+        self.timestamps.append(to_datetime64(timestamps))
+        self.values.append(values)
+
+    def close(self):
+        self.timestamps.close()
+        self.values.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class CsvSeriesWriter:
+    """
+    Appends (rows x N) blocks to a wide "Timestamp,<columns...>" CSV file, optionally
+    rounding the values. Use as a context manager or call close() when done.
+    """
+    def __init__(self, filename, column_names, decimals=None):
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        self.file = open(filename, mode='w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["Timestamp"] + list(column_names))
+        self.decimals = decimals
+
+    def append(self, timestamps, values):
+        if isinstance(timestamps, (np.ndarray, TimeAxis)):
+            timestamps = format_timestamps(timestamps)
+        else:
+            timestamps = [timestamp.isoformat() for timestamp in timestamps]
+        values = np.asarray(values, dtype=float).reshape(len(timestamps), -1)
+        if self.decimals is not None:
+            values = np.round(values, self.decimals)
+        self.writer.writerows([timestamp] + row for timestamp, row in zip(timestamps, values.tolist()))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from .Instrumentation import stage
+from .NetworkConfigurationLoader import PARSER_VERSION, parse_oran_topology
+from .TopologyIndex import compile_topology, index_from_arrays, index_to_arrays, network_tree_from_index
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "DIGITALTWIN_CACHE_DIR"  # Compiled topology cache folder, or "off"
+
+def default_cache_dir():
+    """
+    Returns the folder of the compiled topology artifacts: $DIGITALTWIN_CACHE_DIR if set,
+    otherwise digitalTwin in the user cache folder ($XDG_CACHE_HOME, %LOCALAPPDATA% on
+    Windows, ~/.cache). Returns None if DIGITALTWIN_CACHE_DIR is "off".
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        return None if cache_dir.lower() == "off" else cache_dir
+    user_cache_dir = os.environ.get("XDG_CACHE_HOME") or (os.environ.get("LOCALAPPDATA") if os.name == "nt" else None)
+    return os.path.join(user_cache_dir or os.path.join(os.path.expanduser("~"), ".cache"), "digitalTwin")
+
+def topology_cache_key(json_file):
+    """
+    Returns the cache key of a topology file: a hash of its content and the parser version.
+    """
+    digest = hashlib.sha256()
+    with open(json_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return f"{digest.hexdigest()}-v{PARSER_VERSION}"
+
+def save_compiled_topology(filename, topology_index):
+    """
+    Atomically writes a compiled topology to an .npz file.
+    """
+    folder = os.path.dirname(filename)
+    os.makedirs(folder, exist_ok=True)
+
+    # Write to a temporary file first so concurrent readers never see a partial artifact
+    fd, temp_filename = tempfile.mkstemp(suffix=".npz", dir=folder)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            np.savez(file, **index_to_arrays(topology_index))
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.remove(temp_filename)
+        raise
+
+def load_compiled_topology(filename):
+    """
+    Reads a compiled topology written by save_compiled_topology.
+    """
+    with np.load(filename, allow_pickle=False) as arrays:
+        return index_from_arrays(arrays)
+
+def load_topology_cached(json_file, cache_dir=None, streaming=False):
+    """
+    Returns (nodes, network_tree, topology_index) for a topology file, reusing the compiled
+    tree from cache_dir (default_cache_dir() by default) when the file content and parser
+    version are unchanged. If caching is off or the cache folder is not writable, the
+    topology is parsed and compiled without the cache.
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    cache_file = os.path.join(cache_dir, topology_cache_key(json_file) + ".npz") if cache_dir is not None else None
+
+    if cache_file is not None and os.path.exists(cache_file):
+        try:
+            with stage("load_topology_cache", file=str(json_file)) as s:
+                topology_index = load_compiled_topology(cache_file)
+                nodes, network_tree = network_tree_from_index(topology_index)
+                if s:
+                    s.add(bytes_read=os.path.getsize(cache_file), nodes=len(network_tree))
+            return nodes, network_tree, topology_index
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logger.warning("Ignoring unreadable topology cache %s: %s", cache_file, e)
+
+    nodes, network_tree = parse_oran_topology(json_file, streaming=streaming)
+    with stage("compile_topology") as s:
+        topology_index = compile_topology(network_tree)
+        if s:
+            s.add(nodes=len(network_tree))
+    if cache_file is not None:
+        try:
+            save_compiled_topology(cache_file, topology_index)
+        except OSError as e:
+            logger.warning("Not caching the compiled topology in %s: %s", cache_dir, e)
+    return nodes, network_tree, topology_index
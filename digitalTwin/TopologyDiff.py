@@ -0,0 +1,127 @@
+import json
+import os
+
+import numpy as np
+
+from .TopologyCache import load_topology_cached
+from .NetworkConfigurationLoader import parse_oran_topology
+
+# Node kind of every TopologyIndex ID field
+_KINDS = {"ru_ids": "RU", "du_ids": "DU", "cu_ids": "CU"}
+
+def _kinds(network_tree):
+    return {node_id: details["type"] for node_id, details in network_tree.items() if details["type"] is not None}
+
+def _links(network_tree, kinds):
+    return [(parent, child) for parent, details in network_tree.items() if parent in kinds
+            for child in sorted(details["supports"]) if child in kinds]
+
+def diff_topologies(old_tree, new_tree):
+    """
+    Compares two network trees (see parse_oran_topology) and returns
+        {"added_nodes": {node ID: kind}, "removed_nodes": {node ID: kind},
+         "added_links": [[parent, child], ...], "removed_links": [[parent, child], ...],
+         "moved": [[child, old parent, new parent], ...]}
+    Links are the supports relations (DU -> RU, CU -> DU, tower -> RU, O-Cloud -> DU/CU).
+    A node whose kind changed is removed and added; a child that lost a parent and gained
+    another one of the same kind (e.g. an RU re-homed to another DU) is moved.
+    """
+    old_kinds, new_kinds = _kinds(old_tree), _kinds(new_tree)
+    old_links, new_links = _links(old_tree, old_kinds), _links(new_tree, new_kinds)
+    old_link_set, new_link_set = set(old_links), set(new_links)
+
+    diff = {
+        "added_nodes": {node_id: kind for node_id, kind in new_kinds.items() if old_kinds.get(node_id) != kind},
+        "removed_nodes": {node_id: kind for node_id, kind in old_kinds.items() if new_kinds.get(node_id) != kind},
+        "added_links": [[parent, child] for parent, child in new_links if (parent, child) not in old_link_set],
+        "removed_links": [[parent, child] for parent, child in old_links if (parent, child) not in new_link_set],
+        "moved": [],
+    }
+
+    new_parents = {(child, new_kinds[parent]): parent for parent, child in diff["added_links"]}
+    for old_parent, child in diff["removed_links"]:
+        if child in diff["removed_nodes"] or child in diff["added_nodes"]:
+            continue
+        new_parent = new_parents.get((child, old_kinds[old_parent]))
+        if new_parent is not None:
+            diff["moved"].append([child, old_parent, new_parent])
+    return diff
+
+def is_empty(diff):
+    return not any(diff[key] for key in ("added_nodes", "removed_nodes", "added_links", "removed_links"))
+
+def affected_nodes(topology_index, diff):
+    """
+    Returns the columns of the nodes of a patched TopologyIndex (see patch_topology) whose
+    series a diff changes, as {"ru_columns", "du_columns", "cu_columns"} arrays:
+    DUs that were added or gained or lost RUs (also removed ones), CUs that were added,
+    gained or lost DUs or support such a DU, and DUs and RUs that were added without a
+    parent. Every node of an affected CU's subtree has to be recomputed (see
+    TopologyIndex.subtree_index), as the CU averages over all its DUs; moving a node between
+    towers or O-Clouds only changes the rollups.
+    """
+    kinds = {}
+    for field in ("ru_ids", "du_ids", "cu_ids"):
+        kinds.update({node_id: (field, column) for column, node_id in enumerate(getattr(topology_index, field))})
+
+    changed = {"ru_ids": set(), "du_ids": set(), "cu_ids": set()}
+    for node_id in diff["added_nodes"]:
+        if node_id in kinds:
+            changed[kinds[node_id][0]].add(kinds[node_id][1])
+    for parent, child in diff["added_links"]:
+        if parent in kinds and child in kinds and (kinds[parent][0], kinds[child][0]) in (("du_ids", "ru_ids"), ("cu_ids", "du_ids")):
+            changed[kinds[parent][0]].add(kinds[parent][1])
+    # A removed child is no longer in the index, so removed links go by the kinds of the old tree
+    old_kinds = {node_id: _KINDS[field] for node_id, (field, _) in kinds.items()}
+    old_kinds.update(diff["removed_nodes"])
+    for parent, child in diff["removed_links"]:
+        if parent in kinds and (old_kinds.get(parent), old_kinds.get(child)) in (("DU", "RU"), ("CU", "DU")):
+            changed[kinds[parent][0]].add(kinds[parent][1])
+
+    du_columns = np.array(sorted(changed["du_ids"]), dtype=np.intp)
+    du_parents = topology_index.du_parent[du_columns]
+    cu_columns = np.union1d(np.array(sorted(changed["cu_ids"]), dtype=np.intp), du_parents[du_parents >= 0])
+    ru_columns = np.array(sorted(changed["ru_ids"]), dtype=np.intp)
+    return {
+        "ru_columns": ru_columns[topology_index.ru_parent[ru_columns] < 0],
+        "du_columns": du_columns[du_parents < 0],
+        "cu_columns": cu_columns.astype(np.intp),
+    }
+
+def format_diff(diff):
+    """
+    Formats a diff as a short summary followed by one line per change.
+    """
+    lines = [f"{len(diff['added_nodes'])} nodes added, {len(diff['removed_nodes'])} removed, "
+             f"{len(diff['added_links'])} links added, {len(diff['removed_links'])} removed, "
+             f"{len(diff['moved'])} nodes moved"]
+    lines += [f"+ {kind} {node_id}" for node_id, kind in diff["added_nodes"].items()]
+    lines += [f"- {kind} {node_id}" for node_id, kind in diff["removed_nodes"].items()]
+    lines += [f"~ {child}: {old_parent} -> {new_parent}" for child, old_parent, new_parent in diff["moved"]]
+    return "\n".join(lines)
+
+def load_network_tree(topology, use_cache=True):
+    """
+    Returns the network tree of a JSON topology file (through the compiled topology cache,
+    so an earlier version is usually not parsed again) or of a parsed (nodes, network_tree).
+    """
+    if isinstance(topology, (str, os.PathLike)):
+        if use_cache:
+            return load_topology_cached(topology)[1]
+        return parse_oran_topology(topology)[1]
+    return topology[1]
+
+def diff_topology_files(old_topology, new_topology, use_cache=True):
+    """
+    Returns the diff of two topology versions (JSON files or parsed topologies).
+    """
+    return diff_topologies(load_network_tree(old_topology, use_cache), load_network_tree(new_topology, use_cache))
+
+def save_diff(filename, diff):
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, mode='w') as file:
+        json.dump(diff, file, indent=1)
+
+def load_diff(filename):
+    with open(filename, mode='r') as file:
+        return json.load(file)
@@ -0,0 +1,128 @@
+import json
+import os
+import uuid
+
+# Termination points of every node kind, like the files in generatedTopologies
+TERMINATION_POINTS = {
+    "o-ran-common-identity-refs:o-ru-function": ["PHY", "OFHC", "OFHU", "OFHS", "OFHM", "CELL"],
+    "o-ran-common-identity-refs:o-du-function": ["PHY", "E2", "O1", "OFHM", "OFHC", "OFHU", "OFHS"],
+    "o-ran-common-identity-refs:o-cu-function": ["PHY", "E2", "O1"],
+    "o-ran-sc-network:tower": ["PHY", "O2"],
+    "o-ran-sc-network:o-cloud": ["PHY", "O2"],
+    "o-ran-sc-network:near-rt-ric": ["PHY", "A1", "E2", "O1"],
+    "o-ran-sc-network:smo": ["PHY", "A1", "O1", "OFHM", "O2"],
+}
+
+# Link types between an RU and its DU (one link each)
+FRONTHAUL_LINKS = ["phy", "ofhm", "ofhc", "ofhu", "ofhs"]
+
+def _uuid(name):
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, name))
+
+def _node(node_id, node_type, network_id, termination_points):
+    node = {"node-id": node_id, "o-ran-sc-network:uuid": _uuid(node_id), "o-ran-sc-network:type": node_type}
+    if termination_points:
+        tps = []
+        for name in TERMINATION_POINTS[node_type]:
+            tp = {"tp-id": f"{node_id}-{name}", "o-ran-sc-network:uuid": _uuid(f"{node_id}-{name}"),
+                  "o-ran-sc-network:type": f"o-ran-sc-network:{name.lower()}"}
+            if name != "PHY":
+                tp["supporting-termination-point"] = [
+                    {"network-ref": network_id, "node-ref": node_id, "tp-ref": f"{node_id}-PHY"}]
+            tps.append(tp)
+        node["ietf-network-topology:termination-point"] = tps
+    return node
+
+def _link(link_type, source, destination):
+    tp = "PHY" if link_type == "phy" else link_type.upper()
+    return {
+        "link-id": f"{link_type}:{source}<->{destination}",
+        "source": {"source-node": source, "source-tp": f"{source}-{tp}"},
+        "destination": {"dest-node": destination, "dest-tp": f"{destination}-{tp}"},
+    }
+
+def generate_topology(filename, num_rus, rus_per_du=1, dus_per_cu=21, rus_per_tower=3, dus_per_o_cloud=21,
+                      termination_points=True):
+    """
+    Writes a synthetic ietf-network topology in the layout of generatedTopologies: num_rus
+    RUs on towers of rus_per_tower, rus_per_du RUs per DU, dus_per_cu DUs per CU, O-Clouds
+    hosting dus_per_o_cloud DUs, one Near-RT RIC and one SMO. Node IDs follow the naming
+    convention the loader derives hosting from.
+
+    The file is written node by node and link by link, so memory stays bounded for very
+    large topologies. Returns the number of nodes of every kind.
+    """
+    network_id = _uuid(f"O-RAN-Network-{num_rus}")
+    num_dus = -(-num_rus // rus_per_du)
+    num_cus = -(-num_dus // dus_per_cu)
+    counts = {"RU": num_rus, "DU": num_dus, "CU": num_cus, "Tower": 0, "O-Cloud": 0, "Near-RT-RIC": 1, "SMO": 1,
+              "links": 0}
+
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, mode='w') as file:
+        def write_items(items):
+            first = True
+            for item in items:
+                file.write(("" if first else ",\n") + json.dumps(item))
+                first = False
+
+        def nodes():
+            yield _node("O-RAN-SMO", "o-ran-sc-network:smo", network_id, termination_points)
+            yield _node("O-RAN-NearRtRic-00", "o-ran-sc-network:near-rt-ric", network_id, termination_points)
+            for cu in range(num_cus):
+                cu_id = f"O-RAN-CU-{cu:02d}"
+                yield _node(cu_id, "o-ran-common-identity-refs:o-cu-function", network_id, termination_points)
+                dus = range(cu * dus_per_cu, min(num_dus, (cu + 1) * dus_per_cu))
+                for du in dus:
+                    local = du - dus.start
+                    if local % dus_per_o_cloud == 0:
+                        counts["O-Cloud"] += 1
+                        yield _node(f"O-RAN-O-Cloud-DU-{cu:02d}-{local // dus_per_o_cloud:03d}",
+                                    "o-ran-sc-network:o-cloud", network_id, termination_points)
+                    yield _node(_du_id(cu, local, dus_per_o_cloud), "o-ran-common-identity-refs:o-du-function",
+                                network_id, termination_points)
+            for ru in range(num_rus):
+                if ru % rus_per_tower == 0:
+                    counts["Tower"] += 1
+                    yield _node(f"O-RAN-Tower-{ru // rus_per_tower:05d}", "o-ran-sc-network:tower", network_id,
+                                termination_points)
+                yield _node(_ru_id(ru, rus_per_tower), "o-ran-common-identity-refs:o-ru-function", network_id,
+                            termination_points)
+
+        def links():
+            yield _link("phy", "O-RAN-NearRtRic-00", "O-RAN-SMO")
+            for cu in range(num_cus):
+                cu_id = f"O-RAN-CU-{cu:02d}"
+                yield _link("phy", cu_id, "O-RAN-NearRtRic-00")
+                for du in range(cu * dus_per_cu, min(num_dus, (cu + 1) * dus_per_cu)):
+                    du_id = _du_id(cu, du - cu * dus_per_cu, dus_per_o_cloud)
+                    yield _link("phy", du_id, cu_id)
+                    yield _link("e2", du_id, "O-RAN-NearRtRic-00")
+                    yield _link("o1", du_id, "O-RAN-SMO")
+            for ru in range(num_rus):
+                du = ru // rus_per_du
+                du_id = _du_id(du // dus_per_cu, du % dus_per_cu, dus_per_o_cloud)
+                for link_type in FRONTHAUL_LINKS:
+                    yield _link(link_type, _ru_id(ru, rus_per_tower), du_id)
+
+        def counted(items):
+            for item in items:
+                counts["links"] += 1
+                yield item
+
+        file.write('{"ietf-network:networks": {"network": [{')
+        file.write(f'"network-id": {json.dumps(network_id)}, "o-ran-sc-network:name": "O-RAN-Network",\n"node": [\n')
+        write_items(nodes())
+        file.write('],\n"ietf-network-topology:link": [\n')
+        write_items(counted(links()))
+        file.write(']}]}}\n')
+
+    return counts
+
+def _du_id(cu, local, dus_per_o_cloud):
+    # O-RAN-O-Cloud-DU-<cu>-<o-cloud> hosts O-RAN-DU-<cu>-<o-cloud>-*
+    return f"O-RAN-DU-{cu:02d}-{local // dus_per_o_cloud:03d}-{local % dus_per_o_cloud:03d}"
+
+def _ru_id(ru, rus_per_tower):
+    # O-RAN-Tower-<site> hosts O-RAN-RU-<site>-*
+    return f"O-RAN-RU-{ru // rus_per_tower:05d}-{ru % rus_per_tower:02d}"
@@ -0,0 +1,362 @@
+from collections import defaultdict
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
+
+class TopologyIndex(NamedTuple):
+    """
+    Immutable, compiled view of the RU -> DU -> CU tree returned by parse_oran_topology,
+    with the towers (sites) hosting the RUs, the O-Clouds hosting the DUs and CUs, and the
+    Near-RT RICs and SMOs.
+
+    Node IDs are mapped to integer columns once, so the calculators can aggregate
+    children with precomputed index arrays instead of searching lists of node IDs.
+    """
+    ru_ids: tuple
+    du_ids: tuple
+    cu_ids: tuple
+    ru_columns: MappingProxyType     # RU node ID -> column
+    du_columns: MappingProxyType     # DU node ID -> column
+    cu_columns: MappingProxyType     # CU node ID -> column
+    ru_to_du: MappingProxyType       # CSR aggregation (indptr, indices, num_supported)
+    du_to_cu: MappingProxyType       # CSR aggregation (indptr, indices, num_supported)
+    du_children: tuple               # RU columns supported by each DU
+    cu_children: tuple               # DU columns supported by each CU
+    du_child_counts: np.ndarray      # Number of RUs each DU supports
+    cu_child_counts: np.ndarray      # Number of DUs each CU supports
+    ru_parent: np.ndarray            # DU column of each RU (-1 if unsupported)
+    du_parent: np.ndarray            # CU column of each DU (-1 if unsupported)
+    tower_ids: tuple                 # Sites
+    o_cloud_ids: tuple
+    near_rt_ric_ids: tuple
+    smo_ids: tuple
+    ru_to_tower: MappingProxyType    # CSR of the RU columns each tower hosts
+    du_to_o_cloud: MappingProxyType  # CSR of the DU columns each O-Cloud hosts
+    cu_to_o_cloud: MappingProxyType  # CSR of the CU columns each O-Cloud hosts
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+def _build_aggregation(network_tree, parent_ids, child_columns):
+    """
+    Builds a sparse parent x child aggregation matrix in CSR form from the supports lists.
+
+    Children that are not in child_columns are skipped for averaging but still counted
+    in num_supported, matching the per-timestamp calculators.
+    """
+    indptr = [0]
+    indices = []
+    num_supported = []
+    for parent_id in parent_ids:
+        supported = network_tree[parent_id].get("supports", [])
+        indices.extend(sorted(child_columns[child] for child in supported if child in child_columns))
+        indptr.append(len(indices))
+        num_supported.append(len(supported))
+
+    return MappingProxyType({
+        "indptr": _read_only(np.asarray(indptr, dtype=np.intp)),
+        "indices": _read_only(np.asarray(indices, dtype=np.intp)),
+        "num_supported": _read_only(np.asarray(num_supported, dtype=float)),
+    })
+
+def aggregation_from_parents(parents, num_parents, num_supported=None):
+    """
+    Builds a CSR aggregation from the parent column of every child (-1 for none), e.g. to
+    evaluate a re-homed RU -> DU assignment. num_supported counts the assigned children
+    unless it is given.
+    """
+    parents = np.asarray(parents, dtype=np.intp)
+    assigned = np.flatnonzero(parents >= 0)
+    return aggregation_from_links(parents[assigned], assigned, num_parents, num_supported)
+
+def aggregation_from_links(parents, children, num_parents, num_supported=None):
+    """
+    Builds a CSR aggregation from (parent column, child column) link arrays, where a child
+    may have several parents. num_supported counts the linked children unless it is given.
+    """
+    parents = np.asarray(parents, dtype=np.intp)
+    children = np.asarray(children, dtype=np.intp)
+    # Children of every parent in column order, as compile_topology sorts them
+    indices = children[np.lexsort((children, parents))]
+    counts = np.bincount(parents, minlength=num_parents)
+
+    return MappingProxyType({
+        "indptr": _read_only(np.concatenate([[0], np.cumsum(counts)]).astype(np.intp)),
+        "indices": _read_only(indices.astype(np.intp)),
+        "num_supported": _read_only(np.array(counts if num_supported is None else num_supported, dtype=float)),
+    })
+
+def _split_children(aggregation):
+    indptr = aggregation["indptr"]
+    indices = aggregation["indices"]
+    return tuple(indices[start:end] for start, end in zip(indptr[:-1], indptr[1:]))
+
+def _parents(aggregation, num_children):
+    parents = np.full(num_children, -1, dtype=np.intp)
+    counts = np.diff(aggregation["indptr"])
+    parents[aggregation["indices"]] = np.repeat(np.arange(len(counts), dtype=np.intp), counts)
+    return _read_only(parents)
+
+def compile_topology(network_tree, ru_node_ids=None, du_node_ids=None):
+    """
+    Compiles the network tree into a TopologyIndex.
+
+    RU and DU columns follow the network tree order unless ru_node_ids/du_node_ids are
+    given, e.g. the column order of a utilization CSV file.
+    """
+    if ru_node_ids is None:
+        ru_node_ids = [node_id for node_id, details in network_tree.items() if details["type"] == "RU"]
+    if du_node_ids is None:
+        du_node_ids = [node_id for node_id, details in network_tree.items() if details["type"] == "DU"]
+    cu_node_ids = [node_id for node_id, details in network_tree.items() if details["type"] == "CU"]
+
+    ru_columns = {node_id: column for column, node_id in enumerate(ru_node_ids)}
+    du_columns = {node_id: column for column, node_id in enumerate(du_node_ids)}
+
+    cu_columns = {node_id: column for column, node_id in enumerate(cu_node_ids)}
+
+    ru_to_du = _build_aggregation(network_tree, du_node_ids, ru_columns)
+    du_to_cu = _build_aggregation(network_tree, cu_node_ids, du_columns)
+
+    tower_ids, o_cloud_ids, near_rt_ric_ids, smo_ids = (
+        [node_id for node_id, details in network_tree.items() if details["type"] == node_type]
+        for node_type in ("Tower", "O-Cloud", "Near-RT-RIC", "SMO"))
+    hierarchy = {
+        "tower_ids": tower_ids,
+        "o_cloud_ids": o_cloud_ids,
+        "near_rt_ric_ids": near_rt_ric_ids,
+        "smo_ids": smo_ids,
+        "ru_to_tower": _build_aggregation(network_tree, tower_ids, ru_columns),
+        "du_to_o_cloud": _build_aggregation(network_tree, o_cloud_ids, du_columns),
+        "cu_to_o_cloud": _build_aggregation(network_tree, o_cloud_ids, cu_columns),
+    }
+
+    return _assemble_index(ru_node_ids, du_node_ids, cu_node_ids, ru_to_du, du_to_cu, hierarchy)
+
+# Hierarchy fields of a TopologyIndex: node ID tuples and host aggregations
+HIERARCHY_IDS = ("tower_ids", "o_cloud_ids", "near_rt_ric_ids", "smo_ids")
+HIERARCHY_AGGREGATIONS = ("ru_to_tower", "du_to_o_cloud", "cu_to_o_cloud")
+
+def _assemble_index(ru_node_ids, du_node_ids, cu_node_ids, ru_to_du, du_to_cu, hierarchy=None):
+    hierarchy = dict(hierarchy or {})
+    for name in HIERARCHY_IDS:
+        hierarchy[name] = tuple(hierarchy.get(name, ()))
+    for name in HIERARCHY_AGGREGATIONS:
+        if name not in hierarchy:
+            hierarchy[name] = _build_aggregation({}, [], {})
+
+    return TopologyIndex(
+        ru_ids=tuple(ru_node_ids),
+        du_ids=tuple(du_node_ids),
+        cu_ids=tuple(cu_node_ids),
+        ru_columns=MappingProxyType({node_id: column for column, node_id in enumerate(ru_node_ids)}),
+        du_columns=MappingProxyType({node_id: column for column, node_id in enumerate(du_node_ids)}),
+        cu_columns=MappingProxyType({node_id: column for column, node_id in enumerate(cu_node_ids)}),
+        ru_to_du=ru_to_du,
+        du_to_cu=du_to_cu,
+        du_children=_split_children(ru_to_du),
+        cu_children=_split_children(du_to_cu),
+        du_child_counts=ru_to_du["num_supported"],
+        cu_child_counts=du_to_cu["num_supported"],
+        ru_parent=_parents(ru_to_du, len(ru_node_ids)),
+        du_parent=_parents(du_to_cu, len(du_node_ids)),
+        **hierarchy,
+    )
+
+# Node kind -> node IDs field of a TopologyIndex
+KIND_FIELDS = {
+    "RU": "ru_ids", "DU": "du_ids", "CU": "cu_ids", "Tower": "tower_ids", "O-Cloud": "o_cloud_ids",
+    "Near-RT-RIC": "near_rt_ric_ids", "SMO": "smo_ids",
+}
+
+# (aggregation, parent kind, child kind) of every supports relation of a TopologyIndex
+RELATIONS = [
+    ("ru_to_du", "DU", "RU"),
+    ("du_to_cu", "CU", "DU"),
+    ("ru_to_tower", "Tower", "RU"),
+    ("du_to_o_cloud", "O-Cloud", "DU"),
+    ("cu_to_o_cloud", "O-Cloud", "CU"),
+]
+
+def patch_topology(topology_index, diff):
+    """
+    Applies a topology diff (see TopologyDiff.diff_topologies) to a compiled topology
+    without recompiling the network tree. Surviving nodes keep their columns in order, so
+    series computed for the old topology still line up; added nodes get the next columns.
+    Returns the patched TopologyIndex (the index itself is immutable).
+    """
+    removed, added = diff["removed_nodes"], diff["added_nodes"]
+    ids, old_to_new, old_kinds, new_kinds = {}, {}, {}, {}
+    for kind, field in KIND_FIELDS.items():
+        old_ids = getattr(topology_index, field)
+        ids[kind] = [node_id for node_id in old_ids if removed.get(node_id) != kind]
+        # Nodes can have columns before they join the tree, e.g. RUs of a utilization file
+        kept = set(ids[kind])
+        ids[kind] += [node_id for node_id, added_kind in added.items() if added_kind == kind and node_id not in kept]
+        columns = {node_id: column for column, node_id in enumerate(ids[kind])}
+        old_to_new[kind] = np.array([columns.get(node_id, -1) for node_id in old_ids], dtype=np.intp)
+        old_kinds.update(dict.fromkeys(old_ids, kind))
+        new_kinds.update({node_id: (kind, column) for node_id, column in columns.items()})
+
+    aggregations = {}
+    for name, parent_kind, child_kind in RELATIONS:
+        aggregation = getattr(topology_index, name)
+        parent_map, child_map = old_to_new[parent_kind], old_to_new[child_kind]
+
+        # Old links between surviving nodes, then the link changes; a child can have several
+        # parents (e.g. an RU on two towers), so links are kept as (parent, child) pairs
+        old_parents = np.repeat(np.arange(len(parent_map), dtype=np.intp), np.diff(aggregation["indptr"]))
+        old_parents, old_children = parent_map[old_parents], child_map[aggregation["indices"]]
+        kept = (old_parents >= 0) & (old_children >= 0)
+        links = dict.fromkeys(zip(old_parents[kept].tolist(), old_children[kept].tolist()))
+        num_supported = np.zeros(len(ids[parent_kind]))
+        num_supported[parent_map[parent_map >= 0]] = aggregation["num_supported"][parent_map >= 0]
+
+        # num_supported counts children of every kind, e.g. the DUs and CUs of an O-Cloud
+        for parent, child in diff["removed_links"]:
+            if old_kinds.get(parent) != parent_kind or removed.get(parent) is not None:
+                continue
+            num_supported[new_kinds[parent][1]] -= 1
+            if old_kinds.get(child) == child_kind and removed.get(child) is None:
+                links.pop((new_kinds[parent][1], new_kinds[child][1]), None)
+        for parent, child in diff["added_links"]:
+            if new_kinds.get(parent, (None,))[0] != parent_kind:
+                continue
+            num_supported[new_kinds[parent][1]] += 1
+            if new_kinds.get(child, (None,))[0] == child_kind:
+                links[new_kinds[parent][1], new_kinds[child][1]] = None
+        links = np.array(list(links), dtype=np.intp).reshape(-1, 2)
+        aggregations[name] = aggregation_from_links(links[:, 0], links[:, 1], len(ids[parent_kind]), num_supported)
+
+    hierarchy = {KIND_FIELDS[kind]: ids[kind] for kind in ("Tower", "O-Cloud", "Near-RT-RIC", "SMO")}
+    hierarchy.update({name: aggregations[name] for name in HIERARCHY_AGGREGATIONS})
+    return _assemble_index(ids["RU"], ids["DU"], ids["CU"], aggregations["ru_to_du"], aggregations["du_to_cu"], hierarchy)
+
+def select_aggregation(aggregation, parent_columns, child_columns=None, num_children=None):
+    """
+    Returns the CSR aggregation of the given parents only. With child_columns (out of
+    num_children), the children are renumbered to their position in child_columns, which
+    must hold all of them.
+    """
+    indptr = aggregation["indptr"]
+    counts = np.diff(indptr)[parent_columns]
+    indices = [aggregation["indices"][indptr[column]:indptr[column + 1]] for column in parent_columns]
+    indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.intp)
+    if child_columns is not None:
+        child_map = np.full(num_children, -1, dtype=np.intp)
+        child_map[child_columns] = np.arange(len(child_columns))
+        indices = child_map[indices]
+    return MappingProxyType({
+        "indptr": _read_only(np.concatenate([[0], np.cumsum(counts)]).astype(np.intp)),
+        "indices": _read_only(indices.astype(np.intp)),
+        "num_supported": _read_only(np.array(aggregation["num_supported"][parent_columns], dtype=float)),
+    })
+
+def subtree_index(topology_index, cu_columns, du_columns=(), ru_columns=(), tower_columns=(), o_cloud_columns=()):
+    """
+    Returns (sub_index, ru_columns, du_columns, cu_columns): the TopologyIndex of the given
+    CUs with all their DUs and RUs, of the given DUs with their RUs and of the given RUs,
+    and the columns of its RUs, DUs and CUs in topology_index. DUs and CUs keep their
+    number of supported children, so the sub index evaluates to the same series as the
+    full one for its nodes. It only has the towers and O-Clouds of tower_columns and
+    o_cloud_columns, which must host nothing outside the sub index.
+    """
+    cu_columns = np.unique(np.asarray(cu_columns, dtype=np.intp))
+    du_columns = np.unique(np.concatenate(
+        [np.asarray(du_columns, dtype=np.intp)] + [topology_index.cu_children[column] for column in cu_columns]))
+    ru_columns = np.unique(np.concatenate(
+        [np.asarray(ru_columns, dtype=np.intp)] + [topology_index.du_children[column] for column in du_columns]))
+    tower_columns = np.asarray(tower_columns, dtype=np.intp)
+    o_cloud_columns = np.asarray(o_cloud_columns, dtype=np.intp)
+
+    hierarchy = {
+        "tower_ids": [topology_index.tower_ids[column] for column in tower_columns.tolist()],
+        "o_cloud_ids": [topology_index.o_cloud_ids[column] for column in o_cloud_columns.tolist()],
+        "ru_to_tower": select_aggregation(topology_index.ru_to_tower, tower_columns, ru_columns, len(topology_index.ru_ids)),
+        "du_to_o_cloud": select_aggregation(
+            topology_index.du_to_o_cloud, o_cloud_columns, du_columns, len(topology_index.du_ids)),
+        "cu_to_o_cloud": select_aggregation(
+            topology_index.cu_to_o_cloud, o_cloud_columns, cu_columns, len(topology_index.cu_ids)),
+    }
+    sub_index = _assemble_index(
+        [topology_index.ru_ids[column] for column in ru_columns.tolist()],
+        [topology_index.du_ids[column] for column in du_columns.tolist()],
+        [topology_index.cu_ids[column] for column in cu_columns.tolist()],
+        select_aggregation(topology_index.ru_to_du, du_columns, ru_columns, len(topology_index.ru_ids)),
+        select_aggregation(topology_index.du_to_cu, cu_columns, du_columns, len(topology_index.du_ids)),
+        hierarchy)
+    return sub_index, ru_columns, du_columns, cu_columns
+
+def index_to_arrays(topology_index):
+    """
+    Flattens a TopologyIndex into plain NumPy arrays, e.g. for np.savez.
+    """
+    arrays = {
+        "ru_ids": np.asarray(topology_index.ru_ids, dtype=str),
+        "du_ids": np.asarray(topology_index.du_ids, dtype=str),
+        "cu_ids": np.asarray(topology_index.cu_ids, dtype=str),
+    }
+    for name in HIERARCHY_IDS:
+        arrays[name] = np.asarray(getattr(topology_index, name), dtype=str)
+    for name in ("ru_to_du", "du_to_cu") + HIERARCHY_AGGREGATIONS:
+        for key, array in getattr(topology_index, name).items():
+            arrays[f"{name}_{key}"] = array
+    return arrays
+
+def index_from_arrays(arrays):
+    """
+    Rebuilds a TopologyIndex from the arrays produced by index_to_arrays.
+    """
+    def aggregation(name):
+        return MappingProxyType({
+            key: _read_only(np.array(arrays[f"{name}_{key}"]))
+            for key in ("indptr", "indices", "num_supported")
+        })
+
+    hierarchy = {name: arrays[name].tolist() for name in HIERARCHY_IDS}
+    hierarchy.update({name: aggregation(name) for name in HIERARCHY_AGGREGATIONS})
+    return _assemble_index(
+        arrays["ru_ids"].tolist(), arrays["du_ids"].tolist(), arrays["cu_ids"].tolist(),
+        aggregation("ru_to_du"), aggregation("du_to_cu"), hierarchy)
+
+def network_tree_from_index(topology_index):
+    """
+    Rebuilds the (nodes, network_tree) pair of parse_oran_topology.
+    """
+    nodes = {
+        "RU": list(topology_index.ru_ids),
+        "DU": list(topology_index.du_ids),
+        "CU": list(topology_index.cu_ids),
+        "Tower": list(topology_index.tower_ids),
+        "O-Cloud": list(topology_index.o_cloud_ids),
+        "Near-RT-RIC": list(topology_index.near_rt_ric_ids),
+        "SMO": list(topology_index.smo_ids),
+    }
+    network_tree = defaultdict(lambda: {"type": None, "supports": []})
+
+    for ru_id in topology_index.ru_ids:
+        network_tree[ru_id]["type"] = "RU"
+    for du_id, children in zip(topology_index.du_ids, topology_index.du_children):
+        network_tree[du_id]["type"] = "DU"
+        network_tree[du_id]["supports"] = [topology_index.ru_ids[i] for i in children.tolist()]
+    for cu_id, children in zip(topology_index.cu_ids, topology_index.cu_children):
+        network_tree[cu_id]["type"] = "CU"
+        network_tree[cu_id]["supports"] = [topology_index.du_ids[i] for i in children.tolist()]
+
+    for tower_id, children in zip(topology_index.tower_ids, _split_children(topology_index.ru_to_tower)):
+        network_tree[tower_id]["type"] = "Tower"
+        network_tree[tower_id]["supports"] = [topology_index.ru_ids[i] for i in children.tolist()]
+    for o_cloud_id, du_children, cu_children in zip(
+            topology_index.o_cloud_ids, _split_children(topology_index.du_to_o_cloud),
+            _split_children(topology_index.cu_to_o_cloud)):
+        network_tree[o_cloud_id]["type"] = "O-Cloud"
+        network_tree[o_cloud_id]["supports"] = (
+            [topology_index.du_ids[i] for i in du_children.tolist()] + [topology_index.cu_ids[i] for i in cu_children.tolist()])
+    for node_id in topology_index.near_rt_ric_ids:
+        network_tree[node_id]["type"] = "Near-RT-RIC"
+    for node_id in topology_index.smo_ids:
+        network_tree[node_id]["type"] = "SMO"
+
+    return nodes, network_tree
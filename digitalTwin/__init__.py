@@ -0,0 +1,46 @@
+"""
+Digital twin for wireless O-RAN network energy consumption.
+
+Importing the package does no I/O and loads none of the submodules. The public names
+below are imported on first use; matplotlib is only loaded when plots are requested.
+
+    from digitalTwin import run_pipeline
+    results = run_pipeline("generatedTopologies/nt1.json", "CSVfileOutputs/ru_utilization_data.csv")
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "parse_oran_topology": "NetworkConfigurationLoader",
+    "compile_topology": "TopologyIndex",
+    "load_topology_cached": "TopologyCache",
+    "evaluate_power_model": "NEE.VectorizedPowerModel",
+    "evaluate_sharded": "NEE.ShardedEvaluator",
+    "run_pipeline": "NEE.PowerPipeline",
+    "run_pipeline_chunked": "NEE.PowerPipeline",
+    "OnlinePowerEngine": "NEE.OnlinePowerEngine",
+    "generate_scenario": "ScenarioGenerator",
+    "run_ensemble": "NEE.MonteCarloEnsemble",
+    "run_batch": "NEE.BatchRunner",
+    "simulate_policies": "NEE.EnergySavingSimulator",
+    "optimize_assignment": "NEE.AssignmentOptimizer",
+    "load_power_models": "NEE.PowerModelRegistry",
+    "load_energy_query": "NEE.EnergyQuery",
+    "energy_series": "NEE.EnergyResampler",
+    "resample": "NEE.EnergyResampler",
+    "diff_topologies": "TopologyDiff",
+    "update_pipeline": "NEE.IncrementalUpdate",
+    "TelemetryService": "TelemetryService",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,502 @@
+"""
+Command line entry point: python -m digitalTwin <command> ...
+"""
+import argparse
+import json
+import logging
+import os
+
+from . import Instrumentation
+
+def run_command(args):
+    from .NEE.PowerPipeline import load_store_outputs, plot_results, run_pipeline, run_pipeline_chunked
+
+    if args.chunk_size is not None:
+        if args.plot_output_dir is not None and args.store_output_dir is None:
+            raise ValueError("Plots of a streamed run are drawn from its store outputs; give --store-output-dir.")
+        summary = run_pipeline_chunked(
+            args.topology, args.utilization, chunk_size=args.chunk_size,
+            csv_output_dir=args.csv_output_dir, use_cache=not args.no_cache, store_output_dir=args.store_output_dir,
+            power_models=args.power_models, energy_resolution=args.energy_resolution, workers=args.workers,
+            shard_by=args.shard_by)
+        print(f"Streamed {summary['num_timestamps']} timestamps in blocks of {args.chunk_size}; "
+              f"peak total power {summary['peak_total_power']} W.")
+        if args.plot_output_dir is not None:
+            plot_results(load_store_outputs(args.store_output_dir), args.plot_output_dir, args.plot_workers)
+        return
+
+    results = run_pipeline(
+        args.topology, args.utilization,
+        csv_output_dir=args.csv_output_dir, plot_output_dir=args.plot_output_dir,
+        use_cache=not args.no_cache, store_output_dir=args.store_output_dir, power_models=args.power_models,
+        plot_workers=args.plot_workers, energy_resolution=args.energy_resolution, workers=args.workers,
+        shard_by=args.shard_by)
+    print(f"Computed power consumption for {len(results['ru_node_ids'])} RUs, "
+          f"{len(results['du_node_ids'])} DUs and {len(results['cu_node_ids'])} CUs "
+          f"over {len(results['timestamps'])} timestamps.")
+
+def print_network_tree(nodes, network_tree):
+    """
+    Prints the nodes of every kind and what each of them supports (or hosts).
+    """
+    print("Nodes:")
+    print(json.dumps(nodes, indent=2))
+
+    print("\nNetwork Tree:")
+    for node_id, details in network_tree.items():
+        if details["type"] is not None:  # Skip nodes that are only referenced by links
+            print(f"Node ID: {node_id}")
+            print(f"  Type: {details['type']}")
+            print(f"  Supports: {details['supports']}")
+            print()
+
+def topology_command(args):
+    from .NetworkConfigurationLoader import parse_oran_topology
+
+    nodes, network_tree = parse_oran_topology(args.topology, streaming=args.streaming)
+    print_network_tree(nodes, network_tree)
+
+def plot_command(args):
+    from .NEE.PowerPipeline import load_store_outputs, plot_results
+
+    plot_results(load_store_outputs(args.store_output_dir), args.plot_output_dir, args.workers)
+
+def convert_command(args):
+    from .TimeSeriesStore import csv_to_series, series_to_csv
+
+    if args.source.lower().endswith(".csv"):
+        csv_to_series(args.source, args.destination)
+    else:
+        series_to_csv(args.source, args.destination)
+    print(f"Converted {args.source} to {args.destination}")
+
+def aggregate_command(args):
+    from .ScenarioGenerator import parse_duration
+    from .NEE.NetworkpowerCalculator import aggregate_power_files
+
+    if args.names is not None and len(args.names) != len(args.files):
+        raise ValueError("Give one --names entry per file.")
+    max_gap = parse_duration(args.max_gap) if args.max_gap is not None else None
+    num_rows = aggregate_power_files(args.files, args.output, args.names, args.fill, max_gap)
+    print(f"Aggregated {len(args.files)} files into {num_rows} timestamps in {args.output}")
+
+def resample_command(args):
+    from .TimeSeriesStore import CsvSeriesWriter, is_series_store, open_series, read_csv_series, save_series
+    from .NEE.EnergyResampler import energy_series, resample
+
+    if args.csv_output is None and args.store_output is None:
+        raise ValueError("Give --csv-output and/or --store-output.")
+    timestamps, values, node_ids = open_series(args.source) if is_series_store(args.source) else read_csv_series(args.source)
+    timestamps, values = (energy_series if args.energy else resample)(timestamps, values, args.resolution)
+
+    if args.csv_output is not None:
+        # Same precision as run_pipeline's power and energy CSV files
+        with CsvSeriesWriter(args.csv_output, node_ids, decimals=6 if args.energy else 2) as writer:
+            writer.append(timestamps, values)
+    if args.store_output is not None:
+        save_series(args.store_output, timestamps, values, node_ids)
+    print(f"Resampled {args.source} to {len(timestamps)} buckets of {args.resolution}"
+          f"{' (energy in Wh)' if args.energy else ''}")
+
+def generate_command(args):
+    from datetime import datetime
+    from .TopologyCache import load_topology_cached
+    from .ScenarioGenerator import BASELINE_UTILIZATIONS, generate_scenario, parse_duration, weekly_profile
+
+    if args.csv_output is None and args.store_output is None:
+        raise ValueError("Give --csv-output and/or --store-output.")
+    _, _, topology_index = load_topology_cached(args.topology)
+    step = parse_duration(args.step)
+    num_intervals = args.intervals if args.intervals is not None else int(parse_duration(args.duration) / step)
+    start = datetime.fromisoformat(args.start) if args.start is not None else None
+
+    num_rows = generate_scenario(
+        topology_index.ru_ids, num_intervals, step, start=start, seed=args.seed,
+        profile=weekly_profile() if args.weekly else BASELINE_UTILIZATIONS, chunk_size=args.chunk_size,
+        csv_file=args.csv_output, store_folder=args.store_output)
+    print(f"Generated {num_rows} timestamps for {len(topology_index.ru_ids)} RUs.")
+
+def ensemble_command(args):
+    from .ScenarioGenerator import BASELINE_UTILIZATIONS, parse_duration, weekly_profile
+    from .NEE.MonteCarloEnsemble import run_ensemble
+
+    step = parse_duration(args.step)
+    results = run_ensemble(
+        args.topology, args.realizations, int(parse_duration(args.duration) / step), step, seed=args.seed,
+        profile=weekly_profile() if args.weekly else BASELINE_UTILIZATIONS, per_node=False,
+        batch_size=args.batch_size, workers=args.workers, use_cache=not args.no_cache,
+        csv_output_dir=args.csv_output_dir)
+    energy = results["energy_bands"]
+    print(f"Energy over {args.realizations} realizations: mean {energy['mean']:.2f} Wh, "
+          f"P5 {energy['p5']:.2f} Wh, P50 {energy['p50']:.2f} Wh, P95 {energy['p95']:.2f} Wh.")
+
+def batch_command(args):
+    from .ScenarioGenerator import BASELINE_UTILIZATIONS, parse_duration, weekly_profile
+    from .NEE.BatchRunner import default_scenario, format_comparison, run_batch
+
+    if args.utilization:
+        scenarios = [{"name": os.path.splitext(os.path.basename(os.path.normpath(source)))[0], "utilization": source}
+                     for source in args.utilization]
+    else:
+        step = parse_duration(args.step)
+        num_intervals = int(parse_duration(args.duration) / step)
+        profile = weekly_profile() if args.weekly else BASELINE_UTILIZATIONS
+        scenarios = [{**default_scenario(seed, num_intervals, step), "profile": profile} for seed in args.seeds]
+
+    rows = run_batch(
+        args.topologies, scenarios, output_dir=args.output_dir, workers=args.workers,
+        store_outputs=args.store_outputs, chunk_size=args.chunk_size, use_cache=not args.no_cache, plots=args.plots)
+    print(format_comparison(rows))
+
+def whatif_command(args):
+    from .NEE.EnergySavingSimulator import simulate_policies
+
+    policies = {"baseline": {}}
+    for threshold in args.sleep_thresholds or []:
+        policies[f"sleep <= {threshold:g}"] = {"ru_sleep_threshold": threshold, "du_sleep": args.du_sleep}
+    for max_rus in args.max_rus_per_du or []:
+        policies[f"{max_rus} RUs/DU"] = {"max_rus_per_du": max_rus}
+    for max_dus in args.max_dus_per_cu or []:
+        policies[f"{max_dus} DUs/CU"] = {"max_dus_per_cu": max_dus}
+
+    results = simulate_policies(args.topology, args.utilization, policies, use_cache=not args.no_cache)
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        print(f"{name.ljust(width)}  energy {result['energy']:.2f} Wh  saved {result['energy_saved']:.2f} Wh "
+              f"({100 * result['saving_ratio']:.1f}%)  DUs on {result['active_dus']}  CUs on {result['active_cus']}")
+
+def optimize_command(args):
+    import csv
+    from .NEE.AssignmentOptimizer import optimize_assignment
+
+    result = optimize_assignment(
+        args.topology, args.utilization, du_capacity=args.du_capacity, max_rus_per_du=args.max_rus_per_du,
+        max_dus_per_cu=args.max_dus_per_cu, reassign_cus=not args.keep_cus, use_cache=not args.no_cache)
+    print(f"Moved {result['ru_moves']} RUs and {result['du_moves']} DUs; "
+          f"{result['active_dus']} DUs and {result['active_cus']} CUs stay on.")
+    print(f"Energy {result['energy']:.2f} Wh instead of {result['baseline_energy']:.2f} Wh "
+          f"(saved {result['energy_saved']:.2f} Wh).")
+
+    if args.output is not None:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["RU", "DU", "CU"])
+            for ru_id, du_id in result["ru_to_du_ids"].items():
+                writer.writerow([ru_id, du_id, result["du_to_cu_ids"].get(du_id, "")])
+        print(f"Assignment saved to {args.output}")
+
+def query_command(args):
+    from datetime import datetime
+    from .NEE.EnergyQuery import load_energy_query
+
+    query = load_energy_query(args.topology, args.source, use_cache=not args.no_cache)
+    start = datetime.fromisoformat(args.start) if args.start is not None else None
+    end = datetime.fromisoformat(args.end) if args.end is not None else None
+    first, last = query.window(start, end)
+    print(f"{last - first} timestamps in the window.")
+
+    if args.kind is not None:
+        energies = query.energies(args.kind, start, end, subtree=not args.node_only)
+    else:
+        energies = {node_id: query.energy(node_id, start, end, subtree=not args.node_only) for node_id in args.nodes}
+    for node_id, energy in energies.items():
+        print(f"{node_id}: {energy:.2f} Wh")
+    if not energies:
+        print(f"Total: {query.total_energy(start, end):.2f} Wh "
+              f"({query.total_energy(start, end, include_overhead=True):.2f} Wh with towers, O-Clouds, RIC and SMO)")
+
+def benchmark_command(args):
+    from .Benchmark import format_run, format_scaling, run_benchmarks
+
+    run, regressions = run_benchmarks(
+        args.scales, args.timestamps, rus_per_du=args.rus_per_du, dus_per_cu=args.dus_per_cu,
+        rus_per_tower=args.rus_per_tower, dus_per_o_cloud=args.dus_per_o_cloud, repeat=args.repeat,
+        history_file=args.history, tolerance=args.tolerance, work_dir=args.work_dir)
+    print(format_run(run))
+    scaling = format_scaling(run)
+    if scaling:
+        print(scaling)
+    for case, stage, previous, seconds in regressions:
+        print(f"Regression: {case} {stage} took {seconds * 1e3:.2f} ms instead of {previous * 1e3:.2f} ms")
+    if regressions and args.fail_on_regression:
+        raise ValueError(f"{len(regressions)} stages regressed by more than {100 * args.tolerance:.0f}%.")
+
+def diff_command(args):
+    from .TopologyDiff import diff_topology_files, format_diff, save_diff
+
+    diff = diff_topology_files(args.old_topology, args.new_topology, use_cache=not args.no_cache)
+    print(format_diff(diff))
+    if args.output is not None:
+        save_diff(args.output, diff)
+        print(f"Diff saved to {args.output}")
+
+def update_command(args):
+    from .NEE.IncrementalUpdate import update_pipeline
+
+    if args.csv_output_dir is None and args.store_output_dir is None:
+        raise ValueError("Give --csv-output-dir and/or --store-output-dir.")
+    update_pipeline(args.old_topology, args.new_topology, args.utilization, args.previous_store_output_dir,
+                    csv_output_dir=args.csv_output_dir, store_output_dir=args.store_output_dir,
+                    use_cache=not args.no_cache, power_models=args.power_models)
+
+def serve_command(args):
+    import asyncio
+    from .ScenarioGenerator import parse_duration
+    from .TopologyCache import load_topology_cached
+    from .TelemetryService import serve
+
+    _, _, topology_index = load_topology_cached(args.topology)
+    try:
+        asyncio.run(serve(topology_index, args.host, None if args.no_tcp else args.port, args.http_port,
+                          args.unix_socket, parse_duration(args.tick).total_seconds(), args.lateness, args.queue_size,
+                          power_models=args.power_models))
+    except KeyboardInterrupt:
+        pass
+
+def collect_command(args):
+    import asyncio
+    from .ScenarioGenerator import parse_duration
+    from .TopologyCache import load_topology_cached
+    from .TelemetryService import run_fake_collectors
+
+    _, _, topology_index = load_topology_cached(args.topology)
+    samples, seconds, _ = asyncio.run(run_fake_collectors(
+        list(topology_index.ru_ids), args.ticks, parse_duration(args.tick).total_seconds(), args.collectors,
+        args.host, args.port, args.unix_socket, seed=args.seed))
+    print(f"Sent {samples} samples from {args.collectors} collectors in {seconds:.2f} s "
+          f"({samples / seconds:.0f} samples/s)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m digitalTwin", description="O-RAN network energy digital twin.")
+    parser.add_argument("--profile", metavar="FILE", help="Append a JSON line per timed pipeline stage to this file")
+    parser.add_argument("--profile-memory", action="store_true", help="Also record the peak allocations of every stage (slower)")
+    parser.add_argument("--profile-summary", action="store_true", help="Print the time and counters per stage after the command")
+    parser.add_argument("--metrics-port", type=int, help="Serve the per-stage totals on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--cache-dir", help="Compiled topology cache folder, or off to parse topologies every time "
+                                            "(default: $DIGITALTWIN_CACHE_DIR or the user cache folder)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Compute RU/DU/CU and aggregated power consumption in one pass.")
+    run.add_argument("topology", help="JSON topology file")
+    run.add_argument("utilization", help="RU utilization CSV file or time series store folder")
+    run.add_argument("--csv-output-dir", help="Write the CSV outputs to this folder")
+    run.add_argument("--plot-output-dir", help="Write the plots to this folder")
+    run.add_argument("--store-output-dir", help="Write the outputs as time series store folders to this folder")
+    run.add_argument("--chunk-size", type=int, help="Stream the utilization series in blocks of this many timestamps")
+    run.add_argument("--no-cache", action="store_true", help="Parse the topology instead of using the compiled topology cache")
+    run.add_argument("--power-models", help="JSON power model config assigning power models to nodes")
+    run.add_argument("--plot-workers", type=int, help="Worker processes rendering the plots (default: one per plot, up to the cores)")
+    run.add_argument("--energy-resolution", help="Also write the energy (kWh) per bucket of this size, e.g. 15min, 1h, 1d or month")
+    run.add_argument("--workers", type=int, help="Evaluate the power model over this many processes (default: 1)")
+    run.add_argument("--shard-by", choices=["cu", "o_cloud"], default="cu",
+                     help="Split the network between the workers by CU or O-Cloud subtree (default: cu)")
+    run.set_defaults(handler=run_command)
+
+    topology = subparsers.add_parser("topology", help="Print the RU/DU/CU tree of a topology file.")
+    topology.add_argument("topology", help="JSON topology file")
+    topology.add_argument("--streaming", action="store_true", help="Parse the file incrementally")
+    topology.set_defaults(handler=topology_command)
+
+    plot = subparsers.add_parser("plot", help="Render the plots of a run from its store outputs.")
+    plot.add_argument("store_output_dir", help="--store-output-dir of a run (or a batch run's store folder)")
+    plot.add_argument("plot_output_dir", help="Write the plots to this folder")
+    plot.add_argument("--workers", type=int, help="Worker processes (default: one per plot, up to the cores)")
+    plot.set_defaults(handler=plot_command)
+
+    convert = subparsers.add_parser("convert", help="Convert a CSV file to a time series store folder or back.")
+    convert.add_argument("source", help="CSV file (.csv) or time series store folder")
+    convert.add_argument("destination", help="Time series store folder or CSV file")
+    convert.set_defaults(handler=convert_command)
+
+    aggregate = subparsers.add_parser("aggregate", help="Sum power CSV files matched by timestamp (any rates and gaps).")
+    aggregate.add_argument("files", nargs="+", help="Wide power CSV files (e.g. RU, DU and CU power)")
+    aggregate.add_argument("--output", required=True, help="Output CSV file")
+    aggregate.add_argument("--names", nargs="+", help="Column name per file (default: the file names)")
+    aggregate.add_argument("--fill", choices=["previous", "interpolate", "zero", "none"], default="previous",
+                           help="Value of a file without a sample at a timestamp (default: previous)")
+    aggregate.add_argument("--max-gap", help="Do not fill across gaps longer than this, e.g. 15min")
+    aggregate.set_defaults(handler=aggregate_command)
+
+    resample = subparsers.add_parser("resample", help="Resample a series (time-weighted means) or integrate power to energy.")
+    resample.add_argument("source", help="CSV file or time series store folder")
+    resample.add_argument("resolution", help="Bucket size, e.g. 5min, 15min, 1h, 1d or month")
+    resample.add_argument("--energy", action="store_true", help="Integrate a power series (W) to energy per bucket (Wh)")
+    resample.add_argument("--csv-output", help="Write the result to this CSV file")
+    resample.add_argument("--store-output", help="Write the result to this time series store folder")
+    resample.set_defaults(handler=resample_command)
+
+    generate = subparsers.add_parser("generate", help="Generate a synthetic RU utilization scenario.")
+    generate.add_argument("topology", help="JSON topology file")
+    generate.add_argument("--csv-output", help="Write the scenario to this CSV file")
+    generate.add_argument("--store-output", help="Write the scenario to this time series store folder")
+    generate.add_argument("--step", default="1h", help="Resolution, e.g. 30s, 15min or 1h (default: 1h)")
+    length = generate.add_mutually_exclusive_group()
+    length.add_argument("--duration", default="1d", help="Length of the scenario, e.g. 7d (default: 1d)")
+    length.add_argument("--intervals", type=int, help="Number of timestamps instead of --duration")
+    generate.add_argument("--start", help="First timestamp in ISO format (default: today's midnight)")
+    generate.add_argument("--seed", type=int, help="Seed of the random number generator")
+    generate.add_argument("--weekly", action="store_true", help="Use the weekly profile (quieter weekends)")
+    generate.add_argument("--chunk-size", type=int, default=1440, help="Timestamps generated per block (default: 1440)")
+    generate.set_defaults(handler=generate_command)
+
+    ensemble = subparsers.add_parser("ensemble", help="Run many random utilization scenarios and report power/energy bands.")
+    ensemble.add_argument("topology", help="JSON topology file")
+    ensemble.add_argument("--realizations", type=int, default=1000, help="Number of realizations (default: 1000)")
+    ensemble.add_argument("--step", default="1h", help="Resolution, e.g. 15min or 1h (default: 1h)")
+    ensemble.add_argument("--duration", default="1d", help="Length of every realization, e.g. 7d (default: 1d)")
+    ensemble.add_argument("--seed", type=int, help="Seed of the ensemble")
+    ensemble.add_argument("--weekly", action="store_true", help="Use the weekly profile (quieter weekends)")
+    ensemble.add_argument("--batch-size", type=int, default=100, help="Realizations evaluated per array (default: 100)")
+    ensemble.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    ensemble.add_argument("--csv-output-dir", help="Write the total power bands to this folder")
+    ensemble.add_argument("--no-cache", action="store_true", help="Parse the topology instead of using the compiled topology cache")
+    ensemble.set_defaults(handler=ensemble_command)
+
+    batch = subparsers.add_parser("batch", help="Run several topologies and scenarios in parallel and compare their energy.")
+    batch.add_argument("topologies", nargs="+", help="JSON topology files or glob patterns (e.g. 'generatedTopologies/*.json')")
+    batch.add_argument("--utilization", nargs="+", help="RU utilization CSV files or store folders to use as scenarios")
+    batch.add_argument("--seeds", nargs="+", type=int, default=[0], help="Seeds of the generated scenarios (default: 0)")
+    batch.add_argument("--step", default="1h", help="Resolution of the generated scenarios (default: 1h)")
+    batch.add_argument("--duration", default="1d", help="Length of the generated scenarios (default: 1d)")
+    batch.add_argument("--weekly", action="store_true", help="Use the weekly profile (quieter weekends)")
+    batch.add_argument("--output-dir", help="Write every run's outputs to <output dir>/<topology>/<scenario>/")
+    batch.add_argument("--store-outputs", action="store_true", help="Also write time series store outputs")
+    batch.add_argument("--plots", action="store_true", help="Render every run's plots to <output dir>/<topology>/<scenario>/plotOutputs")
+    batch.add_argument("--workers", type=int, help="Number of worker processes (default: all cores)")
+    batch.add_argument("--chunk-size", type=int, default=1440, help="Timestamps evaluated per block (default: 1440)")
+    batch.add_argument("--no-cache", action="store_true", help="Parse the topologies instead of using the compiled topology cache")
+    batch.set_defaults(handler=batch_command)
+
+    whatif = subparsers.add_parser("whatif", help="Estimate the energy saved by sleep and consolidation policies.")
+    whatif.add_argument("topology", help="JSON topology file")
+    whatif.add_argument("utilization", help="RU utilization CSV file or time series store folder")
+    whatif.add_argument("--sleep-thresholds", nargs="+", type=float, help="RU sleep thresholds to evaluate (e.g. 0 0.05 0.1)")
+    whatif.add_argument("--du-sleep", action="store_true", help="Let DUs sleep when all their RUs sleep")
+    whatif.add_argument("--max-rus-per-du", nargs="+", type=int, help="Consolidate RUs onto fewer DUs with these limits")
+    whatif.add_argument("--max-dus-per-cu", nargs="+", type=int, help="Pool DUs onto fewer CUs with these limits")
+    whatif.add_argument("--no-cache", action="store_true", help="Parse the topology instead of using the compiled topology cache")
+    whatif.set_defaults(handler=whatif_command)
+
+    optimize = subparsers.add_parser("optimize", help="Search RU -> DU and DU -> CU assignments that minimize energy.")
+    optimize.add_argument("topology", help="JSON topology file")
+    optimize.add_argument("utilization", help="RU utilization CSV file or time series store folder")
+    optimize.add_argument("--du-capacity", type=float, help="Peak summed RU utilization a DU may carry")
+    optimize.add_argument("--max-rus-per-du", type=int, help="Number of RUs a DU may support")
+    optimize.add_argument("--max-dus-per-cu", type=int, help="Number of DUs a CU may support")
+    optimize.add_argument("--keep-cus", action="store_true", help="Only reassign RUs, keep every DU on its CU")
+    optimize.add_argument("--output", help="Write the RU, DU and CU of every RU to this CSV file")
+    optimize.add_argument("--no-cache", action="store_true", help="Parse the topology instead of using the compiled topology cache")
+    optimize.set_defaults(handler=optimize_command)
+
+    query = subparsers.add_parser("query", help="Energy of nodes, subtrees and sites over a time window.")
+    query.add_argument("topology", help="JSON topology file")
+    query.add_argument("source", help="RU utilization CSV file or store folder, or a --store-output-dir of the run command")
+    query.add_argument("--nodes", nargs="+", default=[], help="Node IDs to report (default: the network total)")
+    query.add_argument("--kind", help="Report every node of this kind instead (RU, DU, CU, Tower, O-Cloud)")
+    query.add_argument("--start", help="Window start (ISO 8601, inclusive)")
+    query.add_argument("--end", help="Window end (ISO 8601, exclusive)")
+    query.add_argument("--node-only", action="store_true", help="Exclude the nodes' subtrees")
+    query.add_argument("--no-cache", action="store_true", help="Parse the topology instead of using the compiled topology cache")
+    query.set_defaults(handler=query_command)
+
+    benchmark = subparsers.add_parser("benchmark", help="Time every pipeline stage on synthetic topologies of growing size.")
+    benchmark.add_argument("--scales", nargs="+", type=float, default=[1, 10, 100],
+                           help="Topology sizes as multiples of the 21 RUs of o_ran_network_operational.json (default: 1 10 100)")
+    benchmark.add_argument("--timestamps", type=int, default=96, help="Length of the utilization series (default: 96)")
+    benchmark.add_argument("--rus-per-du", type=int, default=1, help="RUs per DU (default: 1)")
+    benchmark.add_argument("--dus-per-cu", type=int, default=147, help="DUs per CU (default: 147)")
+    benchmark.add_argument("--rus-per-tower", type=int, default=3, help="RUs per tower (default: 3)")
+    benchmark.add_argument("--dus-per-o-cloud", type=int, default=21, help="DUs per O-Cloud (default: 21)")
+    benchmark.add_argument("--repeat", type=int, default=3, help="Timed runs per stage, the best counts (default: 3)")
+    benchmark.add_argument("--history", default="benchmarkHistory.json", help="JSON history file (default: benchmarkHistory.json)")
+    benchmark.add_argument("--tolerance", type=float, default=0.2, help="Slowdown reported as a regression (default: 0.2)")
+    benchmark.add_argument("--fail-on-regression", action="store_true", help="Exit with an error if a stage regressed")
+    benchmark.add_argument("--work-dir", help="Folder for the generated topologies and outputs (default: system temp)")
+    benchmark.set_defaults(handler=benchmark_command)
+
+    diff = subparsers.add_parser("diff", help="Compare two topology versions: added, removed and moved nodes and links.")
+    diff.add_argument("old_topology", help="JSON topology file of the earlier version")
+    diff.add_argument("new_topology", help="JSON topology file of the later version")
+    diff.add_argument("--output", help="Save the diff to this JSON file")
+    diff.add_argument("--no-cache", action="store_true", help="Parse the topologies instead of using the compiled topology cache")
+    diff.set_defaults(handler=diff_command)
+
+    update = subparsers.add_parser("update", help="Recompute a run for a changed topology, only for the affected DU/CU subtrees.")
+    update.add_argument("old_topology", help="JSON topology file of the previous run")
+    update.add_argument("new_topology", help="JSON topology file of the changed network")
+    update.add_argument("utilization", help="RU utilization CSV file or time series store folder of the previous run")
+    update.add_argument("previous_store_output_dir", help="--store-output-dir of the previous run")
+    update.add_argument("--csv-output-dir", help="Write the CSV outputs to this folder")
+    update.add_argument("--store-output-dir", help="Write the outputs as time series store folders to this folder")
+    update.add_argument("--no-cache", action="store_true", help="Parse the topologies instead of using the compiled topology cache")
+    update.add_argument("--power-models", help="JSON power model config assigning power models to nodes")
+    update.set_defaults(handler=update_command)
+
+    serve = subparsers.add_parser("serve", help="Ingest RU utilization telemetry and serve the current power.")
+    serve.add_argument("topology", help="JSON topology file")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=9200, help="Line protocol TCP port (default: 9200)")
+    serve.add_argument("--no-tcp", action="store_true", help="Only accept line protocol on --unix-socket")
+    serve.add_argument("--unix-socket", help="Also accept line protocol on this Unix socket")
+    serve.add_argument("--http-port", type=int, default=9201, help="Query endpoint and POST /samples port (default: 9201)")
+    serve.add_argument("--tick", default="1s", help="Length of a tick samples are coalesced into (default: 1s)")
+    serve.add_argument("--lateness", type=int, default=1, help="Ticks a tick waits for late collectors (default: 1)")
+    serve.add_argument("--queue-size", type=int, default=256, help="Parsed batches queued before collectors are slowed down (default: 256)")
+    serve.add_argument("--power-models", help="JSON power model config assigning power models to nodes")
+    serve.set_defaults(handler=serve_command)
+
+    collect = subparsers.add_parser("collect", help="Send a generated utilization scenario to a running serve command.")
+    collect.add_argument("topology", help="JSON topology file")
+    collect.add_argument("--ticks", type=int, default=60, help="Ticks to send (default: 60)")
+    collect.add_argument("--tick", default="1s", help="Tick length (default: 1s)")
+    collect.add_argument("--collectors", type=int, default=4, help="Concurrent collectors sharing the RUs (default: 4)")
+    collect.add_argument("--host", default="127.0.0.1", help="Address of the service (default: 127.0.0.1)")
+    collect.add_argument("--port", type=int, default=9200, help="Line protocol port of the service (default: 9200)")
+    collect.add_argument("--unix-socket", help="Connect to this Unix socket instead")
+    collect.add_argument("--seed", type=int, default=0, help="Random seed of the scenario (default: 0)")
+    collect.set_defaults(handler=collect_command)
+
+    return parser
+
+def enable_profiling(args):
+    """
+    Enables the instrumentation sinks requested by the global options and the environment.
+    Returns the StageTotals to print after the command, if any.
+    """
+    Instrumentation.enable_from_environment()
+    if args.profile is not None:
+        Instrumentation.enable(Instrumentation.JsonLinesSink(args.profile), args.profile_memory)
+    if args.metrics_port is not None:
+        endpoint = Instrumentation.enable(Instrumentation.MetricsEndpoint(args.metrics_port), args.profile_memory)
+        print(f"Serving stage metrics on http://127.0.0.1:{endpoint.port}/metrics")
+    if args.profile_summary or (args.profile_memory and not Instrumentation.enabled()):
+        return Instrumentation.enable(Instrumentation.StageTotals(), args.profile_memory)
+    return None
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # The library reports the files it writes and its fallbacks through logging
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.cache_dir is not None:
+        from .TopologyCache import CACHE_DIR_ENV
+
+        # Through the environment, so worker processes use the same cache
+        os.environ[CACHE_DIR_ENV] = args.cache_dir
+    totals = enable_profiling(args)
+    try:
+        args.handler(args)
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
+        return 1
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        if totals is not None:
+            print(totals.format())
+        Instrumentation.disable()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ..NEE.PowerPipeline import run_pipeline
+from ..NetworkConfigurationLoader import parse_oran_topology
+from ..ScenarioGenerator import generate_utilizations, time_axis
+from ..TopologyCache import CACHE_DIR_ENV
+from ..TopologyGenerator import generate_topology
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Keeps the compiled topologies of every test in its own cache folder.
+    """
+    folder = tmp_path / "cache"
+    monkeypatch.setenv(CACHE_DIR_ENV, str(folder))
+    return str(folder)
+
+@pytest.fixture
+def topology_file(tmp_path):
+    """
+    A generated topology of 60 RUs (3 per DU, 4 DUs per CU) with towers and O-Clouds.
+    """
+    filename = tmp_path / "topology.json"
+    generate_topology(str(filename), 60, rus_per_du=3, dus_per_cu=4, rus_per_tower=4, dus_per_o_cloud=3)
+    return str(filename)
+
+@pytest.fixture
+def topology(topology_file):
+    return parse_oran_topology(topology_file)
+
+@pytest.fixture
+def source(topology):
+    """
+    30 hourly generated utilizations of every RU of the topology fixture.
+    """
+    return utilization_source(node_ids(topology[1], "RU"), num_timestamps=30)
+
+@pytest.fixture
+def batch_results(topology_file, source, tmp_path):
+    """
+    The in-memory run_pipeline results for source, with its CSV outputs in tmp_path/batch.
+    """
+    return run_pipeline(topology_file, source, csv_output_dir=str(tmp_path / "batch"))
+
+def node_ids(network_tree, kind):
+    return [node_id for node_id, details in network_tree.items() if details["type"] == kind]
+
+def utilization_source(ru_node_ids, num_timestamps=24, seed=1):
+    """
+    Returns an in-memory (timestamps, utilizations, RU IDs) source of hourly generated utilizations.
+    """
+    timestamps = time_axis(datetime(2024, 12, 20), timedelta(hours=1), num_timestamps)
+    return timestamps, generate_utilizations(timestamps, len(ru_node_ids), np.random.default_rng(seed)), list(ru_node_ids)
+
+def assert_same_results(results, expected):
+    """
+    Asserts that two results dictionaries have the same series for every node (in any column
+    order) and the same totals up to float rounding.
+    """
+    for name, ids_key in [("ru_power", "ru_node_ids"), ("du_utilization", "du_node_ids"), ("du_power", "du_node_ids"),
+                          ("cu_utilization", "cu_node_ids"), ("cu_power", "cu_node_ids"), ("tower_power", "tower_ids"),
+                          ("o_cloud_power", "o_cloud_ids")]:
+        series = dict(zip(results[ids_key], np.asarray(results[name]).T))
+        expected_series = dict(zip(expected[ids_key], np.asarray(expected[name]).T))
+        assert series.keys() == expected_series.keys(), name
+        for node_id, values in expected_series.items():
+            np.testing.assert_array_equal(series[node_id], values, err_msg=f"{name} {node_id}")
+    for name in ("ru_total_power", "du_total_power", "cu_total_power", "total_power", "network_total_power"):
+        np.testing.assert_allclose(results[name], expected[name], rtol=1e-12, err_msg=name)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from ..NEE.AssignmentOptimizer import AssignmentOptimizer, optimize_assignment
+from ..TopologyIndex import compile_topology
+from .conftest import node_ids, utilization_source
+
+def _tight_topology():
+    # Two DUs of capacity 1.0 hold 0.4 + 0.3 + 0.3 each; first-fit decreasing puts both 0.4 RUs on one DU
+    network_tree = {"CU": {"type": "CU", "supports": ["DU-A", "DU-B"]},
+                    "DU-A": {"type": "DU", "supports": ["RU-0", "RU-2", "RU-3"]},
+                    "DU-B": {"type": "DU", "supports": ["RU-1", "RU-4", "RU-5"]}}
+    network_tree.update({f"RU-{i}": {"type": "RU", "supports": []} for i in range(6)})
+    return compile_topology(network_tree, [f"RU-{i}" for i in range(6)]), np.tile([0.4, 0.4, 0.3, 0.3, 0.3, 0.3], (4, 1))
+
+def test_greedy_failure_keeps_feasible_assignment():
+    topology_index, ru_utilizations = _tight_topology()
+    optimizer = AssignmentOptimizer(topology_index, ru_utilizations, du_capacity=1.0)
+    with pytest.raises(ValueError):
+        optimizer.greedy()
+
+    optimizer = AssignmentOptimizer(topology_index, ru_utilizations, du_capacity=1.0)
+    result = optimizer.optimize()
+
+    assert optimizer.is_feasible()
+    np.testing.assert_array_equal(result["ru_to_du"], topology_index.ru_parent)
+
+def test_infeasible_capacities_raise():
+    topology_index, ru_utilizations = _tight_topology()
+    with pytest.raises(ValueError):
+        AssignmentOptimizer(topology_index, ru_utilizations, du_capacity=0.8).optimize()
+
+def test_optimized_assignment_is_feasible_and_saves_energy(topology):
+    source = utilization_source(node_ids(topology[1], "RU"))
+    result = optimize_assignment(topology, source, du_capacity=3.0, max_rus_per_du=6, max_dus_per_cu=8,
+                                 use_cache=False)
+
+    ru_to_du = result["ru_to_du"]
+    du_loads = np.zeros((len(source[0]), len(result["du_to_cu"])))
+    np.add.at(du_loads.T, ru_to_du[ru_to_du >= 0], source[1].T[ru_to_du >= 0])
+    assert du_loads.max() <= 3.0 + 1e-9
+    assert np.bincount(ru_to_du[ru_to_du >= 0]).max() <= 6
+    active_dus = np.flatnonzero(np.bincount(ru_to_du[ru_to_du >= 0], minlength=len(result["du_to_cu"])))
+    assert np.bincount(result["du_to_cu"][active_dus]).max() <= 8
+    assert result["energy"] <= result["baseline_energy"]
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from ..NEE.BatchRunner import run_batch
+from ..TimeSeriesStore import CsvSeriesWriter
+
+def test_pooled_batch_matches_serial_batch(topology_file, source, batch_results, tmp_path):
+    utilization_file = str(tmp_path / "utilization.csv")
+    with CsvSeriesWriter(utilization_file, source[2]) as writer:
+        writer.append(source[0], source[1])
+    scenarios = [{"name": "file", "utilization": utilization_file},
+                 {"name": "generated", "seed": 4, "num_intervals": 12, "start": datetime(2024, 12, 20)}]
+
+    pooled = run_batch([topology_file], scenarios, output_dir=str(tmp_path / "pooled"), workers=2, chunk_size=5)
+    serial = run_batch([topology_file], scenarios, workers=1, chunk_size=100)
+
+    assert pooled == serial
+    assert [row["error"] for row in pooled] == [None, None]
+    assert pooled[0]["num_timestamps"] == 30
+    assert pooled[0]["mean_power"] == round(batch_results["total_power"].mean(), 2)
+    assert pooled[0]["peak_power"] == batch_results["total_power"].max()
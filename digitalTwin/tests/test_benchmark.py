@@ -0,0 +1,61 @@
+import json
+from collections import Counter
+
+import pytest
+
+from ..Benchmark import find_regressions, format_run, format_scaling, load_history, run_benchmarks
+from ..NetworkConfigurationLoader import parse_oran_topology
+from ..TopologyGenerator import generate_topology
+from ..TopologyIndex import compile_topology
+
+@pytest.mark.parametrize("termination_points", [True, False])
+def test_generated_topology_has_the_requested_fan_outs(tmp_path, termination_points):
+    filename = str(tmp_path / "topology.json")
+    counts = generate_topology(filename, 50, rus_per_du=4, dus_per_cu=5, rus_per_tower=3, dus_per_o_cloud=2,
+                               termination_points=termination_points)
+    _, network_tree = parse_oran_topology(filename)
+    index = compile_topology(network_tree)
+
+    assert counts == {"RU": 50, "DU": 13, "CU": 3, "Tower": 17, "O-Cloud": 8, "Near-RT-RIC": 1, "SMO": 1,
+                      "links": 1 + 3 + 13 * 3 + 50 * 5}
+    kinds = Counter(details["type"] for details in network_tree.values())
+    assert {kind: kinds[kind] for kind in ("RU", "DU", "CU", "Tower", "O-Cloud", "Near-RT-RIC", "SMO")} == \
+        {kind: count for kind, count in counts.items() if kind != "links"}
+    assert (index.ru_parent >= 0).all() and (index.du_parent >= 0).all()
+    assert index.du_child_counts.tolist() == [4] * 12 + [2]
+    assert index.cu_child_counts.tolist() == [5, 5, 3]
+    assert index.ru_to_tower["num_supported"].tolist() == [3] * 16 + [2]
+    assert index.du_to_o_cloud["num_supported"].tolist() == [2, 2, 1, 2, 2, 1, 2, 1]
+
+def _run(seconds):
+    return {"cases": {"21ru": {"nodes": {"RU": 21}, "stages": {
+        stage: {"seconds": value, "throughput": 1 / value, "unit": "rows/s", "peak_memory_mb": 1.0}
+        for stage, value in seconds.items()}}}}
+
+def test_regressions_compare_with_the_latest_run_of_each_stage():
+    history = [_run({"parse": 1.0, "compile": 1.0}), _run({"parse": 2.0})]
+
+    assert find_regressions(_run({"parse": 2.3, "compile": 1.3, "evaluate": 5.0}), history) == [
+        ("21ru", "compile", 1.0, 1.3)]
+    assert find_regressions(_run({"parse": 2.5}), history) == [("21ru", "parse", 2.0, 2.5)]
+    # Slowdowns below MIN_REGRESSION_SECONDS are timer noise
+    assert find_regressions(_run({"parse": 0.0005}), [_run({"parse": 0.0001})]) == []
+
+def test_benchmark_runs_are_recorded(tmp_path):
+    history_file = str(tmp_path / "history.json")
+    run, regressions = run_benchmarks((1, 2), num_timestamps=8, dus_per_cu=4, repeat=1, history_file=history_file,
+                                      work_dir=str(tmp_path))
+
+    assert regressions == []
+    assert [case["nodes"]["RU"] for case in run["cases"].values()] == [21, 42]
+    for case in run["cases"].values():
+        assert {"parse", "compile", "evaluate", "csv_sink", "store_sink"} <= case["stages"].keys()
+        assert all(stage["seconds"] >= 0 and stage["peak_memory_mb"] >= 0 for stage in case["stages"].values())
+    assert "21ru-1ru/du-4du/cu-8t" in format_run(run)
+    assert format_scaling(run).startswith("Time per RU relative to 21 RUs:")
+
+    run_benchmarks((1,), num_timestamps=8, dus_per_cu=4, repeat=1, history_file=history_file, work_dir=str(tmp_path))
+    history = load_history(history_file)
+    assert len(history) == 2 and list(history[1]["cases"]) == ["21ru-1ru/du-4du/cu-8t"]
+    with open(history_file) as file:
+        assert json.load(file) == history
@@ -0,0 +1,19 @@
+import filecmp
+import os
+
+import pytest
+
+from ..NEE.PowerPipeline import load_store_outputs, run_pipeline_chunked
+from .conftest import assert_same_results
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 30, 100])
+def test_chunked_run_matches_batch_run(topology_file, source, batch_results, tmp_path, chunk_size):
+    summary = run_pipeline_chunked(topology_file, source, chunk_size=chunk_size, csv_output_dir=str(tmp_path / "chunked"),
+                                   store_output_dir=str(tmp_path / "store"))
+
+    assert_same_results(load_store_outputs(str(tmp_path / "store")), batch_results)
+    for filename in os.listdir(tmp_path / "batch"):
+        assert filecmp.cmp(tmp_path / "batch" / filename, tmp_path / "chunked" / filename, shallow=False), filename
+    assert summary["num_timestamps"] == 30
+    assert summary["total_power_sum"] == pytest.approx(batch_results["total_power"].sum(), rel=1e-12)
+    assert summary["peak_total_power"] == batch_results["total_power"].max()
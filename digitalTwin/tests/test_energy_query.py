@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ..NEE.EnergyQuery import EnergyQuery, load_energy_query
+from ..NEE.EnergyResampler import energy_series
+from ..TopologyIndex import compile_topology
+
+@pytest.fixture
+def irregular_results(batch_results):
+    # 30 samples 5 min to 3 h apart
+    spacing = np.random.default_rng(3).choice([5, 15, 60, 180], size=len(batch_results["timestamps"]))
+    timestamps = [datetime(2024, 12, 20) + timedelta(minutes=int(minutes)) for minutes in np.cumsum(spacing) - spacing[0]]
+    return dict(batch_results, timestamps=timestamps)
+
+def _direct_energy(results, power_key, first, last):
+    # Energy of rows [first, last) with every sample held until the next one, the last for the median spacing
+    timestamps = np.array(results["timestamps"], dtype="datetime64[us]")
+    hours = np.diff(timestamps).astype(np.int64) / 3.6e9
+    hours = np.append(hours, np.median(hours))
+    power = np.asarray(results[power_key])[first:last]
+    return (power * hours[first:last].reshape((-1,) + (1,) * (power.ndim - 1))).sum(axis=0)
+
+def test_window_energy_equals_direct_sums(topology, irregular_results):
+    results = irregular_results
+    topology_index = compile_topology(topology[1], results["ru_node_ids"], results["du_node_ids"])
+    query = EnergyQuery(topology_index, results)
+    timestamps = results["timestamps"]
+
+    rng = np.random.default_rng(0)
+    for first, last in [(0, len(timestamps))] + [tuple(sorted(rng.integers(0, len(timestamps), 2))) for _ in range(20)]:
+        start = timestamps[first]
+        end = timestamps[last] if last < len(timestamps) else None
+        assert query.window(start, end) == (first, last)
+        for kind, ids_key, power_key in [("RU", "ru_node_ids", "ru_power"), ("Tower", "tower_ids", "tower_power")]:
+            expected = dict(zip(results[ids_key], _direct_energy(results, power_key, first, last).tolist()))
+            assert query.energies(kind, start, end) == pytest.approx(expected, rel=1e-12)
+        du = results["du_node_ids"][0]
+        assert query.energy(du, start, end, subtree=False) == pytest.approx(
+            _direct_energy(results, "du_power", first, last)[0], rel=1e-12)
+        network = _direct_energy(results, "network_total_power", first, last)
+        assert query.total_energy(start, end, include_overhead=True) == pytest.approx(network, rel=1e-12)
+
+def test_subtree_energy_adds_up(topology, batch_results):
+    topology_index = compile_topology(topology[1], batch_results["ru_node_ids"], batch_results["du_node_ids"])
+    query = EnergyQuery(topology_index, batch_results)
+    ru_energy = query.energies("RU")
+    du_energy = query.energies("DU", subtree=False)
+
+    for du, children in zip(topology_index.du_ids, topology_index.du_children):
+        expected = du_energy[du] + sum(ru_energy[topology_index.ru_ids[ru]] for ru in children)
+        assert query.energy(du) == pytest.approx(expected, rel=1e-12)
+    cu = topology_index.cu_ids[0]
+    expected = query.energy(cu, subtree=False) + sum(
+        query.energy(topology_index.du_ids[du]) for du in topology_index.cu_children[0])
+    assert query.energy(cu) == pytest.approx(expected, rel=1e-12)
+    assert query.total_energy() == pytest.approx(sum(query.energy(cu) for cu in topology_index.cu_ids), rel=1e-12)
+
+def test_total_energy_matches_energy_series(topology_file, irregular_results):
+    query = load_energy_query(topology_file, irregular_results)
+    _, energy = energy_series(irregular_results["timestamps"], irregular_results["network_total_power"], "1d")
+
+    assert query.total_energy(include_overhead=True) == pytest.approx(energy.sum(), rel=1e-12)
+    hours = query.elapsed_hours[-1]
+    assert query.mean_power(irregular_results["ru_node_ids"][0]) == pytest.approx(
+        query.energy(irregular_results["ru_node_ids"][0]) / hours, rel=1e-12)
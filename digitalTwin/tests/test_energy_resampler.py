@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ..NEE.EnergyResampler import EnergyAccumulator, energy_series, energy_totals, integrate, resample
+from ..NEE.PowerPipeline import run_pipeline, run_pipeline_chunked
+from ..ScenarioGenerator import generate_utilizations, time_axis
+from ..TimeSeriesStore import TimeAxis, compact_time_axis, open_series, read_csv_series, save_series, series_to_csv, \
+    to_datetimes
+from .conftest import node_ids
+
+@pytest.fixture
+def quarter_hour_power():
+    # 97 samples every 15 minutes: one day and the first sample of the next
+    timestamps = time_axis(datetime(2024, 12, 20), timedelta(minutes=15), 97)
+    return timestamps, 200 + 100 * np.random.default_rng(0).random((97, 3))
+
+@pytest.fixture
+def irregular_power():
+    # Samples 1 min to 6 h apart over about two months
+    rng = np.random.default_rng(1)
+    minutes = np.cumsum(rng.choice([1, 15, 60, 360], size=400)) * 60_000_000
+    timestamps = np.datetime64("2024-11-20T00:00", "us") + minutes.astype("timedelta64[us]")
+    return timestamps, 100 + 50 * rng.random((400, 2))
+
+@pytest.mark.parametrize("resolution", ["1min", "15min", "1h", "1d", "month"])
+def test_resampled_means_keep_the_integrated_energy(irregular_power, resolution):
+    timestamps, power = irregular_power
+    hours = np.append(np.diff(timestamps).astype(np.int64), 0) / 3.6e9
+    hours[-1] = np.median(hours[:-1])
+    expected = (power * hours[:, None]).sum(axis=0)
+
+    bucket_starts, integrals, covered = integrate(timestamps, power, resolution)
+    np.testing.assert_allclose(integrals.sum(axis=0), expected, rtol=1e-12)
+    assert covered.sum() == pytest.approx(hours.sum(), rel=1e-12)
+
+    bucket_timestamps, means = resample(timestamps, power, resolution)
+    np.testing.assert_array_equal(np.asarray(bucket_timestamps), bucket_starts)
+    np.testing.assert_allclose(np.nansum(means * covered[:, None], axis=0), expected, rtol=1e-12)
+    np.testing.assert_allclose(energy_series(timestamps, power, resolution)[1], integrals, rtol=0)
+
+def test_upsampling_holds_and_downsampling_averages(quarter_hour_power):
+    timestamps, power = quarter_hour_power
+    hourly_timestamps, hourly = resample(timestamps[:96], power[:96], "1h")
+
+    assert hourly_timestamps == TimeAxis(timestamps[0], timedelta(hours=1), 24)
+    np.testing.assert_allclose(hourly, power[:96].reshape(24, 4, 3).mean(axis=1), rtol=1e-12)
+    _, upsampled = resample(hourly_timestamps, hourly, "15min")
+    np.testing.assert_allclose(upsampled, np.repeat(hourly, 4, axis=0), rtol=1e-12)
+
+def test_series_store_round_trip(quarter_hour_power, tmp_path):
+    timestamps, power = quarter_hour_power
+    save_series(str(tmp_path / "store"), timestamps, power, ["a", "b", "c"])
+    series_to_csv(str(tmp_path / "store"), str(tmp_path / "series.csv"))
+
+    for stored_timestamps, values, node_ids in (open_series(str(tmp_path / "store")),
+                                                read_csv_series(str(tmp_path / "series.csv"))):
+        assert node_ids == ["a", "b", "c"]
+        assert compact_time_axis(stored_timestamps) == TimeAxis(timestamps[0], timedelta(minutes=15), 97)
+        np.testing.assert_allclose(values, power, rtol=1e-12)
+
+def test_time_axis_behaves_like_its_array(quarter_hour_power):
+    timestamps = quarter_hour_power[0]
+    axis = compact_time_axis(timestamps)
+    array = np.asarray(axis)
+
+    np.testing.assert_array_equal(array, timestamps)
+    np.testing.assert_array_equal(np.asarray(axis[5:60:7]), array[5:60:7])
+    assert axis[-1] == array[-1] and axis.end == array[-1] + np.timedelta64(15, "m")
+    for timestamp in [array[0] - np.timedelta64(1, "h"), array[10], array[10] + np.timedelta64(1, "m"), axis.end]:
+        for side in ("left", "right"):
+            assert axis.searchsorted(timestamp, side) == np.searchsorted(array, timestamp, side)
+    assert isinstance(compact_time_axis(np.delete(timestamps, 3)), np.ndarray)
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 96, 97])
+@pytest.mark.parametrize("resolution", ["1h", "1d"])
+def test_accumulated_energy_matches_energy_series(quarter_hour_power, chunk_size, resolution):
+    timestamps, power = quarter_hour_power
+    expected_timestamps, expected = energy_series(timestamps, power, resolution)
+
+    for blocks in (timestamps, to_datetimes(timestamps)):
+        accumulator = EnergyAccumulator(resolution, ["a", "b", "c"])
+        for start in range(0, len(timestamps), chunk_size):
+            accumulator.append(blocks[start:start + chunk_size], power[start:start + chunk_size])
+        bucket_timestamps, energy = accumulator.result()
+
+        np.testing.assert_array_equal(np.asarray(bucket_timestamps), np.asarray(expected_timestamps))
+        np.testing.assert_allclose(energy, expected, rtol=1e-12)
+
+def test_accumulated_energy_across_a_gap():
+    # The last sample before a gap lasts until the next block, as in energy_series
+    timestamps = np.array(["2024-12-20T00:00", "2024-12-20T01:00", "2024-12-20T05:00", "2024-12-20T06:00"],
+                          dtype="datetime64[us]")
+    power = np.array([[100.0], [200.0], [300.0], [400.0]])
+    accumulator = EnergyAccumulator("1h", ["a"])
+    accumulator.append(timestamps[:2], power[:2])
+    accumulator.append(timestamps[2:], power[2:])
+
+    np.testing.assert_allclose(accumulator.result()[1], energy_series(timestamps, power, "1h")[1])
+    np.testing.assert_allclose(accumulator.result()[1][:, 0], [100, 200, 200, 200, 200, 300, 400])
+
+@pytest.mark.parametrize("chunk_size", [1, 96, 97])
+def test_chunked_energy_matches_in_memory_energy(topology, topology_file, tmp_path, chunk_size):
+    ru_node_ids = node_ids(topology[1], "RU")
+    timestamps = time_axis(datetime(2024, 12, 20), timedelta(minutes=15), 97)
+    source = timestamps, generate_utilizations(timestamps, len(ru_node_ids), np.random.default_rng(2)), ru_node_ids
+
+    bucket_timestamps, expected = energy_totals(run_pipeline(topology_file, source), "1d")
+    run_pipeline_chunked(topology_file, source, chunk_size=chunk_size, store_output_dir=str(tmp_path),
+                         energy_resolution="1d")
+    chunked_timestamps, energy, _ = open_series(str(tmp_path / "energy_1d"))
+
+    np.testing.assert_array_equal(np.asarray(chunked_timestamps), np.asarray(bucket_timestamps))
+    np.testing.assert_allclose(energy, expected, rtol=1e-12)
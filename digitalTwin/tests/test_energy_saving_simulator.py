@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from ..NEE.EnergySavingSimulator import PolicySimulator, simulate_policies
+from ..TopologyIndex import compile_topology
+from .conftest import node_ids, utilization_source
+
+POLICIES = {
+    "sleep": {"ru_sleep_threshold": 0.1},
+    "sleep_du": {"ru_sleep_threshold": 0.3, "du_sleep": True},
+    "consolidate": {"max_rus_per_du": 6},
+    "pool": {"max_dus_per_cu": 8},
+    "all": {"ru_sleep_threshold": 0.2, "du_sleep": True, "max_rus_per_du": 12, "max_dus_per_cu": 20},
+}
+
+@pytest.fixture
+def simulator(topology, source):
+    _, ru_utilizations, ru_node_ids = source
+    return PolicySimulator(compile_topology(topology[1], ru_node_ids), ru_utilizations)
+
+def test_policies_save_energy(topology_file, source):
+    results = simulate_policies(topology_file, source, dict(POLICIES, baseline={}))
+
+    assert results["baseline"]["energy_saved"] == 0.0
+    for name in POLICIES:
+        assert results[name]["energy_saved"] > 0, name
+        assert results[name]["energy"] == pytest.approx(
+            results["baseline"]["energy"] - results[name]["energy_saved"], rel=1e-12)
+    assert results["consolidate"]["active_dus"] == 10 and results["pool"]["active_cus"] == 3
+
+def test_sleep_savings_match_evaluate(simulator):
+    thresholds = [0.0, 0.05, 0.1, 0.25, 1.0]
+    for du_sleep in (False, True):
+        expected = [simulator.evaluate({"ru_sleep_threshold": threshold, "du_sleep": du_sleep})["energy_saved"]
+                    for threshold in thresholds]
+        np.testing.assert_allclose(simulator.sleep_savings(thresholds, du_sleep), expected, rtol=1e-9)
+
+def test_empty_dus_and_cus_are_not_counted_as_savings(topology):
+    network_tree = dict(topology[1])
+    network_tree["O-RAN-DU-EMPTY"] = {"type": "DU", "supports": []}
+    network_tree["O-RAN-CU-EMPTY"] = {"type": "CU", "supports": []}
+    _, ru_utilizations, ru_node_ids = utilization_source(node_ids(network_tree, "RU"))
+    simulator = PolicySimulator(compile_topology(network_tree, ru_node_ids), ru_utilizations)
+
+    # 3 RUs per DU and 4 DUs per CU is the generated layout, so nothing is switched off
+    result = simulator.evaluate({"max_rus_per_du": 3, "max_dus_per_cu": 4})
+    assert result["energy_saved"] == pytest.approx(0.0, abs=1e-6)
+    assert result["active_dus"] == len(simulator.topology_index.du_ids)
+    assert result["active_cus"] == len(simulator.topology_index.cu_ids)
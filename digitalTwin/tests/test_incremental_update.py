@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pytest
+
+from ..NEE.IncrementalUpdate import update_pipeline
+from ..NEE.PowerPipeline import run_pipeline
+from ..TopologyDiff import diff_topologies
+from ..TopologyIndex import RELATIONS, compile_topology, patch_topology
+from .conftest import assert_same_results, node_ids, utilization_source
+
+def _copy(network_tree):
+    return {node_id: {**details, "supports": list(details["supports"])} for node_id, details in network_tree.items()}
+
+def _remove(network_tree, node_id):
+    del network_tree[node_id]
+    for details in network_tree.values():
+        if node_id in details["supports"]:
+            details["supports"].remove(node_id)
+
+def _remove_du(network_tree):
+    _remove(network_tree, node_ids(network_tree, "DU")[0])
+
+def _remove_ru(network_tree):
+    _remove(network_tree, node_ids(network_tree, "RU")[5])
+
+def _remove_rus_of_du(network_tree):
+    for ru in [child for child in network_tree[node_ids(network_tree, "DU")[2]]["supports"]
+               if network_tree[child]["type"] == "RU"]:
+        _remove(network_tree, ru)
+
+def _rehome_ru(network_tree):
+    dus = node_ids(network_tree, "DU")
+    ru = next(child for child in network_tree[dus[0]]["supports"] if network_tree[child]["type"] == "RU")
+    network_tree[dus[0]]["supports"].remove(ru)
+    network_tree[dus[7]]["supports"].append(ru)
+
+def _add_ru(network_tree):
+    network_tree["O-RAN-RU-NEW"] = {"type": "RU", "supports": []}
+    network_tree[node_ids(network_tree, "DU")[4]]["supports"].append("O-RAN-RU-NEW")
+
+def _share_nodes(network_tree):
+    # An RU on two towers and a DU on two O-Clouds
+    towers, o_clouds = node_ids(network_tree, "Tower"), node_ids(network_tree, "O-Cloud")
+    network_tree[towers[1]]["supports"].append(network_tree[towers[0]]["supports"][0])
+    network_tree[o_clouds[1]]["supports"].append(network_tree[o_clouds[0]]["supports"][0])
+
+def _unshare_nodes(network_tree):
+    towers, o_clouds = node_ids(network_tree, "Tower"), node_ids(network_tree, "O-Cloud")
+    network_tree[towers[0]]["supports"].pop(0)
+    network_tree[o_clouds[1]]["supports"].pop()
+    network_tree[towers[2]]["supports"].append(network_tree[towers[3]]["supports"][1])
+
+def _shared(topology):
+    nodes, network_tree = topology
+    network_tree = _copy(network_tree)
+    _share_nodes(network_tree)
+    return nodes, network_tree
+
+@pytest.mark.parametrize("change", [_remove_du, _remove_ru, _remove_rus_of_du, _rehome_ru, _add_ru, _share_nodes])
+def test_update_matches_full_run(topology, change):
+    nodes, old_tree = topology
+    new_tree = _copy(old_tree)
+    change(new_tree)
+    source = utilization_source(node_ids(old_tree, "RU") + ["O-RAN-RU-NEW"])
+    previous = run_pipeline(topology, source, use_cache=False)
+
+    results, diff = update_pipeline(topology, (nodes, new_tree), source, previous, use_cache=False)
+
+    assert diff == diff_topologies(old_tree, new_tree)
+    assert_same_results(results, run_pipeline((nodes, new_tree), source, use_cache=False))
+
+def test_update_without_changes_writes_outputs(topology, tmp_path):
+    source = utilization_source(node_ids(topology[1], "RU"))
+    previous = run_pipeline(topology, source, use_cache=False, store_output_dir=str(tmp_path / "previous"))
+
+    results, _ = update_pipeline(topology, topology, source, str(tmp_path / "previous"),
+                                 csv_output_dir=str(tmp_path / "csv"), store_output_dir=str(tmp_path / "store"),
+                                 use_cache=False)
+
+    assert_same_results(results, previous)
+    assert os.path.isfile(tmp_path / "csv" / "ru_power_consumption.csv")
+    assert os.path.isdir(tmp_path / "store" / "ru_power")
+
+@pytest.mark.parametrize("change", [_unshare_nodes, _remove_ru, _remove_du])
+def test_patched_index_keeps_every_parent(topology, change):
+    nodes, old_tree = _shared(topology)
+    new_tree = _copy(old_tree)
+    change(new_tree)
+
+    patched = patch_topology(compile_topology(old_tree), diff_topologies(old_tree, new_tree))
+    compiled = compile_topology(new_tree)
+    for name, _, _ in RELATIONS:
+        for key, array in getattr(compiled, name).items():
+            np.testing.assert_array_equal(getattr(patched, name)[key], array, err_msg=f"{name} {key}")
+
+    source = utilization_source(node_ids(old_tree, "RU"))
+    previous = run_pipeline((nodes, old_tree), source, use_cache=False)
+    results, _ = update_pipeline((nodes, old_tree), (nodes, new_tree), source, previous, use_cache=False)
+    assert_same_results(results, run_pipeline((nodes, new_tree), source, use_cache=False))
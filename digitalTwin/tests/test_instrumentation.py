@@ -0,0 +1,71 @@
+import json
+import os
+import urllib.request
+
+import pytest
+
+from .. import Instrumentation
+from ..Instrumentation import JsonLinesSink, MetricsEndpoint, StageTotals, stage
+from ..NEE.PowerPipeline import run_pipeline
+
+@pytest.fixture
+def events():
+    events = []
+    Instrumentation.enable(events.append)
+    yield events
+    Instrumentation.disable()
+
+def test_disabled_stages_are_no_ops():
+    assert not Instrumentation.enabled()
+    with stage("idle", rows=1) as s:
+        s.add(rows=2)
+    assert not s
+
+def test_nested_stages_emit_records(events):
+    with stage("outer", file="a.json") as outer:
+        outer.add(rows=2)
+        with stage("inner"):
+            pass
+        outer.add(rows=3, output="b.csv")
+    with pytest.raises(ValueError), stage("failing"):
+        raise ValueError
+
+    inner, outer, failing = events
+    assert (inner["stage"], inner["parent"]) == ("inner", "outer")
+    assert (outer["stage"], outer["parent"], outer["rows"], outer["file"], outer["output"]) == \
+        ("outer", None, 5, "a.json", "b.csv")
+    assert outer["duration_s"] >= inner["duration_s"] >= 0
+    assert failing["error"] == "ValueError"
+
+def test_pipeline_stages_are_recorded(events, topology_file, source, tmp_path):
+    run_pipeline(topology_file, source, csv_output_dir=str(tmp_path / "csv"), store_output_dir=str(tmp_path / "store"))
+
+    parents = {event["stage"]: event["parent"] for event in events}
+    assert {"read_topology", "compile_topology", "evaluate", "write_csv", "write_store"} <= parents.keys()
+    assert parents["run_pipeline"] is None and parents["evaluate"] == "run_pipeline"
+    assert parents["power_model"] == "evaluate"
+    written = {event["output"]: event for event in events if event["stage"] == "write_csv"}
+    assert written["ru_power_consumption.csv"]["rows"] == len(source[0])
+    assert written["ru_power_consumption.csv"]["bytes_written"] == os.path.getsize(
+        tmp_path / "csv" / "ru_power_consumption.csv")
+
+def test_sinks_receive_the_events(tmp_path):
+    profile = str(tmp_path / "profile.jsonl")
+    totals = Instrumentation.enable(StageTotals())
+    Instrumentation.enable(JsonLinesSink(profile))
+    endpoint = Instrumentation.enable(MetricsEndpoint(port=0))
+    try:
+        for rows in (2, 3):
+            with stage("write_csv", rows=rows):
+                pass
+        with urllib.request.urlopen(f"http://127.0.0.1:{endpoint.port}/metrics") as response:
+            metrics = response.read().decode()
+    finally:
+        Instrumentation.disable()
+
+    assert totals.snapshot()["write_csv"]["calls"] == 2 and totals.snapshot()["write_csv"]["rows"] == 5
+    assert 'digitaltwin_stage_calls_total{stage="write_csv"} 2' in metrics
+    assert 'digitaltwin_stage_rows_total{stage="write_csv"} 5' in metrics
+    with open(profile) as file:
+        assert [json.loads(line)["rows"] for line in file] == [2, 3]
+    assert not Instrumentation.enabled()
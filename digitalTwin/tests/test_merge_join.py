@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from ..NEE.NetworkpowerCalculator import merge_join
+
+# A 1-minute series and a 2-minute series with a gap of 6 minutes, joined on minutes
+FAST = [(0, 1.0), (1, 2.0), (2, 3.0), (3, 4.0), (4, 5.0)]
+SLOW = [(1, 10.0), (3, 30.0), (9, 90.0)]
+
+def _joined(fill, max_gap=None, series=(FAST, SLOW)):
+    # NaN (no value) as None, so rows compare with ==
+    return [(timestamp, [None if math.isnan(value) else value for value in values])
+            for timestamp, values in merge_join(series, fill, max_gap)]
+
+def test_union_of_timestamps():
+    assert [timestamp for timestamp, _ in merge_join([FAST, SLOW])] == [0, 1, 2, 3, 4, 9]
+
+def test_fill_previous():
+    assert _joined("previous") == [(0, [1.0, None]), (1, [2.0, 10.0]), (2, [3.0, 10.0]), (3, [4.0, 30.0]),
+                                   (4, [5.0, 30.0]), (9, [None, 90.0])]
+
+def test_fill_interpolate():
+    assert _joined("interpolate") == [(0, [1.0, None]), (1, [2.0, 10.0]), (2, [3.0, 20.0]), (3, [4.0, 30.0]),
+                                      (4, [5.0, 40.0]), (9, [None, 90.0])]
+
+def test_fill_zero_and_none():
+    assert _joined("zero") == [(0, [1.0, 0.0]), (1, [2.0, 10.0]), (2, [3.0, 0.0]), (3, [4.0, 30.0]),
+                               (4, [5.0, 0.0]), (9, [0.0, 90.0])]
+    assert _joined("none") == [(0, [1.0, None]), (1, [2.0, 10.0]), (2, [3.0, None]), (3, [4.0, 30.0]),
+                               (4, [5.0, None]), (9, [None, 90.0])]
+
+def test_max_gap():
+    # The 3 -> 9 gap of the slow series is longer than max_gap, the 1 -> 3 gap is not
+    assert _joined("previous", max_gap=2) == [(0, [1.0, None]), (1, [2.0, 10.0]), (2, [3.0, 10.0]),
+                                              (3, [4.0, 30.0]), (4, [5.0, None]), (9, [None, 90.0])]
+
+def test_repeated_timestamp_keeps_last_value():
+    assert _joined("previous", series=[[(0, 1.0), (1, 2.0), (1, 3.0)], [(1, 5.0)]]) == [(0, [1.0, None]),
+                                                                                      (1, [3.0, 5.0])]
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        list(merge_join([FAST], fill="nearest"))
+    with pytest.raises(ValueError):
+        list(merge_join([[(1, 1.0), (0, 2.0)]]))
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+import numpy as np
+
+from ..NEE.MonteCarloEnsemble import run_ensemble
+
+def test_pooled_ensemble_matches_serial_ensemble(topology_file):
+    def ensemble(batch_size, workers):
+        return run_ensemble(topology_file, 8, num_intervals=6, start=datetime(2024, 12, 20), seed=5, per_node=True,
+                            batch_size=batch_size, workers=workers)
+
+    pooled, serial = ensemble(3, 2), ensemble(8, 1)
+    for name in ("ru_power", "du_power", "cu_power", "total_power", "energy_bands"):
+        assert pooled[name].keys() == serial[name].keys()
+        for band, values in serial[name].items():
+            np.testing.assert_array_equal(pooled[name][band], values, err_msg=f"{name} {band}")
+    np.testing.assert_array_equal(pooled["energy"], serial["energy"])
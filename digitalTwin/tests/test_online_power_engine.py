@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from ..NEE.OnlinePowerEngine import OnlinePowerEngine
+from ..NEE.PowerModelRegistry import load_power_models
+from ..NEE.VectorizedPowerModel import evaluate_power_model
+from ..TopologyIndex import compile_topology
+
+NUM_TICKS = 2000
+
+@pytest.fixture
+def topology_index(topology):
+    return compile_topology(topology[1])
+
+@pytest.fixture(params=["constants", "power_models"])
+def power_models(request, tmp_path):
+    if request.param == "constants":
+        return None
+    config = tmp_path / "models.json"
+    config.write_text('{"models": {"ru-gen2": {"kind": "piecewise", "points": [[0.0, 120], [0.5, 230], [1.0, 330]]},'
+                      ' "du-pooled": {"kind": "linear", "p0": 150, "k": 90, "k_children": 5}},'
+                      ' "defaults": {"DU": "du-pooled"},'
+                      ' "assignments": [{"nodes": ["O-RAN-RU-00000-*"], "model": "ru-gen2"}]}')
+    return load_power_models(config)
+
+def _random_ticks(num_rus, seed=7):
+    # Ticks change a few RUs each, mostly to two-decimal values so DU and CU averages hit rounding ties
+    rng = np.random.default_rng(seed)
+    initial = np.round(rng.random(num_rus), 2)
+    utilizations = initial.copy()
+    rows, ticks = [], []
+    for _ in range(NUM_TICKS):
+        columns = rng.choice(num_rus, size=rng.integers(1, 6), replace=False)
+        values = rng.random(len(columns))
+        values = np.where(rng.random(len(columns)) < 0.8, np.round(values, 2), values)
+        utilizations[columns] = values
+        ticks.append(dict(zip(columns.tolist(), values.tolist())))
+        rows.append(utilizations.copy())
+    return initial, ticks, np.array(rows)
+
+def test_ticks_match_the_vectorized_model(topology_index, power_models):
+    initial, ticks, rows = _random_ticks(len(topology_index.ru_ids))
+    compiled = power_models.compile(topology_index) if power_models is not None else None
+    expected = evaluate_power_model(topology_index, rows, compiled)
+    expected["total_power"] = expected["ru_total_power"] + expected["du_total_power"] + expected["cu_total_power"]
+    expected["network_total_power"] = expected["total_power"] + expected["overhead_total_power"]
+    engine = OnlinePowerEngine(topology_index, initial, power_models=power_models)
+
+    for tick, changes in enumerate(ticks):
+        engine.update(changes)
+        for name in ("ru_power", "du_utilization", "du_power", "cu_utilization", "cu_power"):
+            assert getattr(engine, name) == expected[name][tick].tolist(), (tick, name)
+        for name in ("ru_total_power", "du_total_power", "cu_total_power", "total_power", "overhead_total_power",
+                     "network_total_power"):
+            assert getattr(engine, name) == pytest.approx(expected[name][tick], rel=1e-9), (tick, name)
+
+    np.testing.assert_allclose(engine.tower_power, expected["tower_power"][-1], rtol=1e-9)
+    np.testing.assert_allclose(engine.o_cloud_power, expected["o_cloud_power"][-1], rtol=1e-9)
+    for column, tower in enumerate(topology_index.tower_ids):
+        assert engine.node_power(tower) == engine.tower_power[column]
+    for column, o_cloud in enumerate(topology_index.o_cloud_ids):
+        assert engine.node_power(o_cloud) == engine.o_cloud_power[column]
+    with pytest.raises(KeyError):
+        engine.node_power("unknown")
@@ -0,0 +1,61 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ..NEE.PlotRenderer import FIGURES, decimate_mean, decimate_minmax, prepare_figure, render_figures, result_figures
+from ..ScenarioGenerator import time_axis
+
+pytest.importorskip("matplotlib")
+
+@pytest.fixture
+def series():
+    timestamps = time_axis(datetime(2024, 12, 20), timedelta(minutes=1), 5000)
+    return timestamps, np.random.default_rng(2).normal(size=(5000, 30)).cumsum(axis=0)
+
+def test_minmax_decimation_keeps_the_extremes(series):
+    timestamps, values = series
+    decimated_timestamps, decimated = decimate_minmax(timestamps, values, max_points=200)
+
+    assert len(decimated_timestamps) == len(decimated) <= 200
+    assert (np.diff(decimated_timestamps) >= np.timedelta64(0)).all()
+    np.testing.assert_array_equal(decimated.min(axis=0), values.min(axis=0))
+    np.testing.assert_array_equal(decimated.max(axis=0), values.max(axis=0))
+    np.testing.assert_array_equal(decimate_minmax(timestamps[:100], values[:100], max_points=200)[1], values[:100])
+
+def test_mean_decimation_keeps_the_mean(series):
+    timestamps, values = series
+    decimated_timestamps, decimated = decimate_mean(timestamps, values, max_points=500)
+
+    assert len(decimated_timestamps) == len(decimated) == 500
+    # 5000 rows split evenly into buckets of 10
+    np.testing.assert_allclose(decimated, values.reshape(500, 10, -1).mean(axis=1))
+
+def test_many_nodes_are_drawn_as_ordered_bands(series):
+    timestamps, values = series
+    spec = {"filename": "plot.png", "title": "Power", "ylabel": "W", "timestamps": timestamps, "values": values,
+            "labels": [f"RU {column}" for column in range(values.shape[1])]}
+
+    assert prepare_figure(spec, max_points=200, max_lines=30)["view"] == "lines"
+    figure = prepare_figure(spec, max_points=200, max_lines=20)
+    assert figure["view"] == "bands" and figure["num_nodes"] == 30
+    bands = list(figure["bands"].values())
+    assert all(len(band) == 200 for band in bands)
+    for lower, upper in zip(bands[:-1], bands[1:]):
+        assert (lower <= upper).all()
+    assert bands[0].min() == values.min() and bands[-1].max() == values.max()
+    assert figure["heatmap"].shape == (200, 30)
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_result_plots_are_written(batch_results, tmp_path, workers):
+    specs = result_figures(batch_results, str(tmp_path / "plots"))
+    assert {os.path.basename(spec["filename"]) for spec in specs} <= {figure[2] for figure in FIGURES}
+    assert any(spec["values"].shape[1] > 20 for spec in specs)
+
+    files = render_figures(specs, workers=workers, max_lines=20)
+
+    assert files == [spec["filename"] for spec in specs]
+    for filename in files:
+        with open(filename, "rb") as file:
+            assert file.read(8) == b"\x89PNG\r\n\x1a\n"
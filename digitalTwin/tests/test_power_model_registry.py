@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from ..NEE.PowerModelRegistry import (
+    MODEL_KINDS, PowerModel, create_model, default_power_models, load_power_models, register_model_kind)
+from ..NEE.VectorizedPowerModel import evaluate_power_model
+from ..TopologyIndex import compile_topology
+from .conftest import node_ids, utilization_source
+
+class _NoCurvePowerModel(PowerModel):
+    def __init__(self, p0, k_children=0, decimals=None):
+        super().__init__(k_children, decimals)
+        self.p0 = p0
+
+class _ConstantPowerModel(_NoCurvePowerModel):
+    def curve(self, utilizations):
+        return np.full(np.shape(utilizations), float(self.p0))
+
+@pytest.fixture
+def model_kinds(monkeypatch):
+    monkeypatch.setattr("digitalTwin.NEE.PowerModelRegistry.MODEL_KINDS", dict(MODEL_KINDS))
+
+def test_model_without_curve_cannot_be_created():
+    with pytest.raises(TypeError):
+        _NoCurvePowerModel(100)
+
+def test_model_kind_without_curve_is_rejected(model_kinds):
+    with pytest.raises(ValueError, match="curve"):
+        register_model_kind("no_curve", _NoCurvePowerModel)
+    with pytest.raises(ValueError, match="Unknown power model kind"):
+        create_model({"kind": "no_curve", "p0": 100})
+
+def test_registered_model_kind_is_created(model_kinds):
+    register_model_kind("constant", _ConstantPowerModel)
+    model = create_model({"kind": "constant", "p0": 100, "k_children": 20})
+
+    np.testing.assert_array_equal(model(np.zeros((2, 3)), np.array([0, 1, 2])), [[100, 120, 140]] * 2)
+
+def test_default_registry_matches_constants(topology):
+    network_tree = topology[1]
+    _, ru_utilizations, ru_node_ids = utilization_source(node_ids(network_tree, "RU"))
+    topology_index = compile_topology(network_tree, ru_node_ids)
+
+    results = evaluate_power_model(topology_index, ru_utilizations)
+    compiled = evaluate_power_model(topology_index, ru_utilizations, default_power_models().compile(topology_index))
+    for name in ("ru_power", "du_power", "cu_power", "overhead_total_power"):
+        np.testing.assert_array_equal(compiled[name], results[name], err_msg=name)
+
+def test_mixed_power_models_match_per_node_models(topology, tmp_path):
+    network_tree = topology[1]
+    _, ru_utilizations, ru_node_ids = utilization_source(node_ids(network_tree, "RU"))
+    topology_index = compile_topology(network_tree, ru_node_ids)
+    config = tmp_path / "models.json"
+    config.write_text('{"models": {"ru-gen2": {"kind": "piecewise", "points": [[0.0, 120], [0.5, 230], [1.0, 330]]},'
+                      ' "cu-pooled": {"kind": "polynomial", "coefficients": [180, 60, 40], "decimals": 2}},'
+                      ' "defaults": {"CU": "cu-pooled"},'
+                      ' "assignments": [{"nodes": ["O-RAN-RU-00000-*"], "model": "ru-gen2"}]}')
+    registry = load_power_models(config)
+
+    results = evaluate_power_model(topology_index, ru_utilizations, registry.compile(topology_index))
+    for column, model in enumerate(registry.models_for("RU", topology_index.ru_ids)):
+        np.testing.assert_array_equal(results["ru_power"][:, column], model(ru_utilizations[:, [column]])[:, 0])
+    num_supported = topology_index.du_to_cu["num_supported"]
+    for column, model in enumerate(registry.models_for("CU", topology_index.cu_ids)):
+        np.testing.assert_array_equal(results["cu_power"][:, column],
+                                      model(results["cu_utilization"][:, [column]], num_supported[[column]])[:, 0])
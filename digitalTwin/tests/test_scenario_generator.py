@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ..ScenarioGenerator import (
+    NOISE_SCALE, baseline_at, generate_scenario, iter_scenario_chunks, parse_duration, time_axis, weekly_profile)
+from ..TimeSeriesStore import open_series, read_csv_series, to_datetime64
+
+RU_NODE_IDS = [f"O-RAN-RU-{ru:05d}-00" for ru in range(7)]
+START = datetime(2024, 12, 16)  # A Monday
+
+def _scenario(chunk_size, seed=5, num_intervals=200):
+    chunks = list(iter_scenario_chunks(RU_NODE_IDS, num_intervals, timedelta(minutes=15), START, seed,
+                                       weekly_profile(), chunk_size))
+    assert all(len(timestamps) <= chunk_size for timestamps, _, _ in chunks)
+    return np.concatenate([timestamps for timestamps, _, _ in chunks]), np.concatenate([values for _, values, _ in chunks])
+
+def test_seeded_scenario_is_reproducible_for_any_chunk_size():
+    timestamps, values = _scenario(200)
+
+    for chunk_size in (1, 7, 64):
+        chunked_timestamps, chunked_values = _scenario(chunk_size)
+        np.testing.assert_array_equal(chunked_timestamps, timestamps)
+        np.testing.assert_array_equal(chunked_values, values)
+    np.testing.assert_array_equal(_scenario(200)[1], values)
+    assert not np.array_equal(_scenario(200, seed=6)[1], values)
+
+def test_utilizations_follow_the_weekly_profile():
+    timestamps, values = _scenario(200, num_intervals=7 * 96)
+    baseline = baseline_at(timestamps, weekly_profile())[:, None]
+
+    assert values.shape == (7 * 96, len(RU_NODE_IDS))
+    assert ((values >= 0) & (values <= 1)).all()
+    np.testing.assert_array_equal(values, np.round(values, 2))
+    assert (np.abs(values - baseline) <= NOISE_SCALE / 2 + 0.005).all()
+    # Saturday 13:00 is scaled by 0.8, Monday 13:00 is not
+    assert baseline_at(to_datetime64([datetime(2024, 12, 21, 13, 30)]), weekly_profile())[0] == pytest.approx(0.8 * 0.87)
+    assert baseline_at(to_datetime64([datetime(2024, 12, 16, 13, 30)]), weekly_profile())[0] == pytest.approx(0.87)
+
+def test_generated_files_hold_the_scenario(tmp_path):
+    csv_file, store_folder = str(tmp_path / "scenario.csv"), str(tmp_path / "store")
+    num_rows = generate_scenario(RU_NODE_IDS, 200, timedelta(minutes=15), START, 5, weekly_profile(), chunk_size=64,
+                                 csv_file=csv_file, store_folder=store_folder)
+    timestamps, values = _scenario(200)
+
+    assert num_rows == 200
+    for file_timestamps, file_values, node_ids in (read_csv_series(csv_file), open_series(store_folder)):
+        assert list(node_ids) == RU_NODE_IDS
+        np.testing.assert_array_equal(to_datetime64(file_timestamps), timestamps)
+        np.testing.assert_array_equal(file_values, values)
+
+def test_durations():
+    assert parse_duration("15min") == timedelta(minutes=15)
+    assert parse_duration("1.5h") == timedelta(minutes=90)
+    assert parse_duration("30") == timedelta(seconds=30)
+    with pytest.raises(ValueError):
+        parse_duration("1 week")
+    np.testing.assert_array_equal(time_axis(START, timedelta(days=1), 3)[-1], np.datetime64("2024-12-18T00:00"))
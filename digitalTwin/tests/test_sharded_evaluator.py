@@ -0,0 +1,12 @@
+import pytest
+
+from ..NEE.PowerPipeline import load_store_outputs, run_pipeline, run_pipeline_chunked
+from .conftest import assert_same_results
+
+@pytest.mark.parametrize("shard_by", ["cu", "o_cloud"])
+def test_sharded_run_matches_batch_run(topology_file, source, batch_results, shard_by):
+    assert_same_results(run_pipeline(topology_file, source, workers=2, shard_by=shard_by), batch_results)
+
+def test_sharded_chunked_run_matches_batch_run(topology_file, source, batch_results, tmp_path):
+    run_pipeline_chunked(topology_file, source, chunk_size=7, store_output_dir=str(tmp_path / "store"), workers=3)
+    assert_same_results(load_store_outputs(str(tmp_path / "store")), batch_results)
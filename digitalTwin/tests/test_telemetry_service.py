@@ -0,0 +1,183 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from ..NEE.VectorizedPowerModel import evaluate_power_model
+from ..TelemetryService import TelemetryService
+from ..TopologyIndex import compile_topology
+
+# Long ticks, so the idle timeout never applies a tick while a test runs
+TICK = 60.0
+
+@pytest.fixture
+def topology_index(topology):
+    return compile_topology(topology[1])
+
+async def _until(condition, timeout=5.0):
+    # Waits for the consumer (and the sockets) to catch up
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            raise AssertionError("Timed out")
+        await asyncio.sleep(0.01)
+
+async def _http(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+def _line(tick, samples):
+    return f"{tick * TICK:.0f} " + " ".join(f"{ru}={value}" for ru, value in samples.items())
+
+def test_samples_of_a_tick_are_coalesced(topology_index):
+    ru = topology_index.ru_ids
+
+    async def run():
+        service = TelemetryService(topology_index, tick=TICK, lateness=0)
+        service._start_consumer()
+        # Two lines of tick 0 (the second 30 s later) and one of tick 1, which makes tick 0 complete
+        await service.submit([_line(0, {ru[0]: 0.1}), f"30 {ru[1]}=0.2 {ru[0]}=0.15", _line(1, {ru[0]: 0.3})])
+        await _until(lambda: service.stats["ticks"] == 1)
+        assert service.engine.ru_utilization[:2] == [0.15, 0.2]
+        assert list(service.pending) == [1]
+        await service.close()
+        return service
+
+    service = asyncio.run(run())
+    assert service.engine.ru_utilization[:2] == [0.3, 0.2]
+    assert service.stats["ticks"] == 2 and service.stats["applied"] == 3 and service.stats["samples"] == 4
+
+def test_watermark_waits_for_every_collector_and_drops_late_samples(topology_index):
+    ru = topology_index.ru_ids
+
+    async def run():
+        service = TelemetryService(topology_index, tick=TICK, lateness=1)
+        port = await service.start_line_server(port=0)
+        _, fast = await asyncio.open_connection("127.0.0.1", port)
+        _, slow = await asyncio.open_connection("127.0.0.1", port)
+
+        fast.write(("\n".join(_line(tick, {ru[0]: tick / 10}) for tick in range(4)) + "\n").encode())
+        slow.write((_line(0, {ru[1]: 0.5}) + "\n").encode())
+        await _until(lambda: service.stats["samples"] == 5)
+        await asyncio.sleep(0.05)
+        # The slow collector is at tick 0, so nothing is complete yet
+        assert service.stats["ticks"] == 0
+
+        slow.write((_line(3, {ru[1]: 0.6}) + "\n").encode())
+        # Both collectors passed tick 1 by more than the lateness: ticks 0 and 1 are applied
+        await _until(lambda: service.stats["ticks"] == 2)
+        assert service.applied_tick == 1
+        assert service.engine.ru_utilization[:2] == [0.1, 0.5]
+
+        slow.write((_line(1, {ru[1]: 0.9}) + "\n").encode())
+        await _until(lambda: service.stats["late"] == 1)
+        for writer in (fast, slow):
+            writer.close()
+        await _until(lambda: service.stats["ticks"] == 4)
+        await service.close()
+        return service
+
+    service = asyncio.run(run())
+    assert service.engine.ru_utilization[:2] == [0.3, 0.6]
+
+def test_full_queue_blocks_submitters(topology_index):
+    ru = topology_index.ru_ids
+
+    async def run():
+        service = TelemetryService(topology_index, tick=TICK, lateness=0, queue_size=1)
+        await service.submit([_line(0, {ru[0]: 0.1})])
+        blocked = asyncio.ensure_future(service.submit([_line(1, {ru[0]: 0.2})]))
+        await asyncio.sleep(0.05)
+        assert not blocked.done() and service.queue.full()
+
+        service._start_consumer()
+        await asyncio.wait_for(blocked, 5)
+        await _until(lambda: service.stats["ticks"] == 1)
+        await service.close()
+        return service
+
+    assert asyncio.run(run()).engine.ru_utilization[0] == 0.2
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-0.1", "1.5", "high", ""])
+def test_invalid_lines_are_dropped_whole(topology_index, value):
+    ru = topology_index.ru_ids
+
+    async def run():
+        service = TelemetryService(topology_index, tick=TICK)
+        batch = service.parse_lines([f"0 {ru[0]}=0.4 {ru[1]}={value}", f"0 {ru[2]}=0.7 unknown-RU=0.1",
+                                     f"nan {ru[3]}=0.2", f"inf {ru[3]}=0.2"])
+        return service, batch
+
+    service, batch = asyncio.run(run())
+    assert batch == {0: {2: 0.7}}
+    assert service.stats["invalid"] == 3 and service.stats["unknown"] == 1 and service.stats["samples"] == 2
+
+def test_failed_tick_does_not_stop_the_service(topology_index, monkeypatch):
+    ru = topology_index.ru_ids
+
+    async def run():
+        service = TelemetryService(topology_index, tick=TICK, lateness=0)
+        port = await service.start_http_server(port=0)
+        update = service.engine.update
+
+        def fail_once(changes, timestamp=None):
+            monkeypatch.setattr(service.engine, "update", update)
+            raise ValueError("broken tick")
+
+        monkeypatch.setattr(service.engine, "update", fail_once)
+        status, body = await _http(port, "POST", "/samples", (f"0 {ru[0]}=nan\n" + _line(0, {ru[1]: 0.3}) + "\n"
+                                                              + _line(1, {ru[1]: 0.4})).encode())
+        assert (status, body) == (202, {"samples": 2, "invalid_lines": 1})
+        await _until(lambda: service.stats["failed_ticks"] == 1)
+
+        await _http(port, "POST", "/samples", _line(2, {ru[1]: 0.5}).encode())
+        await _until(lambda: service.stats["ticks"] == 1)
+        assert not service.consumer.done()
+        assert service.engine.ru_utilization[1] == 0.4
+        await service.close()
+
+    asyncio.run(run())
+
+def test_http_endpoints(topology_index):
+    ru = topology_index.ru_ids
+    utilizations = np.round(np.random.default_rng(0).random(len(ru)), 2)
+
+    async def run():
+        service = TelemetryService(topology_index, tick=TICK, lateness=0)
+        port = await service.start_http_server(port=0)
+        body = _line(0, dict(zip(ru, utilizations.tolist()))).encode()
+
+        assert await _http(port, "POST", "/wrong", body) == (404, {"error": "Not found"})
+        await asyncio.sleep(0.05)
+        assert service.stats["samples"] == 0 and not service.pending
+
+        assert await _http(port, "POST", "/samples", body) == (202, {"samples": len(ru), "invalid_lines": 0})
+        await _http(port, "POST", "/samples", _line(1, {}).encode())
+        await _until(lambda: service.stats["ticks"] == 1)
+        responses = {path: await _http(port, "GET", path) for path in (
+            "/power", f"/power/{ru[0]}", "/power/unknown", "/nodes/du", "/history", "/stats")}
+        await service.close()
+        return responses
+
+    responses = asyncio.run(run())
+    expected = evaluate_power_model(topology_index, utilizations[None, :])
+
+    status, power = responses["/power"]
+    assert status == 200 and power["timestamp"] == "1970-01-01T00:00:00+00:00"
+    for name in ("ru_total_power", "du_total_power", "cu_total_power", "overhead_total_power"):
+        assert power[name] == pytest.approx(expected[name][0], rel=1e-12), name
+    assert power["network_total_power"] == pytest.approx(
+        power["total_power"] + expected["overhead_total_power"][0], rel=1e-12)
+    assert responses[f"/power/{ru[0]}"] == (200, {"node": ru[0], "timestamp": power["timestamp"],
+                                                   "power": expected["ru_power"][0, 0]})
+    assert responses["/power/unknown"][0] == 404
+    assert responses["/nodes/du"][1]["power"] == dict(zip(topology_index.du_ids, expected["du_power"][0].tolist()))
+    assert responses["/history"] == (200, [[power["timestamp"], power["total_power"], power["network_total_power"]]])
+    assert responses["/stats"][1]["ticks"] == 1
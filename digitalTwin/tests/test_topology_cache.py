@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+from ..NetworkConfigurationLoader import parse_oran_topology
+from ..TopologyCache import CACHE_DIR_ENV, load_topology_cached, topology_cache_key
+from ..TopologyGenerator import generate_topology
+from ..TopologyIndex import compile_topology, index_to_arrays
+
+def assert_same_index(topology_index, expected):
+    arrays, expected_arrays = index_to_arrays(topology_index), index_to_arrays(expected)
+    assert arrays.keys() == expected_arrays.keys()
+    for name, values in expected_arrays.items():
+        np.testing.assert_array_equal(arrays[name], values, err_msg=name)
+
+def normalized(network_tree):
+    # The cached tree lists the supported nodes in column order instead of link order
+    return {node_id: {**details, "supports": sorted(details["supports"])} for node_id, details in network_tree.items()}
+
+def test_cache_round_trip(topology_file, topology, cache_dir):
+    parsed = load_topology_cached(topology_file)
+    cache_file = os.path.join(cache_dir, topology_cache_key(topology_file) + ".npz")
+    assert os.path.exists(cache_file)
+
+    cached = load_topology_cached(topology_file)
+    assert parsed[:2] == topology
+    assert cached[0] == topology[0]
+    assert normalized(cached[1]) == normalized(topology[1])
+    assert_same_index(cached[2], compile_topology(topology[1]))
+
+def test_changed_topology_is_parsed_again(topology_file, cache_dir):
+    load_topology_cached(topology_file)
+    old_key = topology_cache_key(topology_file)
+
+    generate_topology(topology_file, 24, rus_per_du=2, dus_per_cu=3)
+    assert topology_cache_key(topology_file) != old_key
+    nodes, network_tree, topology_index = load_topology_cached(topology_file)
+
+    assert (nodes, network_tree) == parse_oran_topology(topology_file)
+    assert len(topology_index.ru_ids) == 24
+    assert len(os.listdir(cache_dir)) == 2
+
+def test_unreadable_cache_file_is_ignored(topology_file, topology, cache_dir, caplog):
+    load_topology_cached(topology_file)
+    with open(os.path.join(cache_dir, topology_cache_key(topology_file) + ".npz"), 'wb') as f:
+        f.write(b"not an npz file")
+
+    assert load_topology_cached(topology_file)[:2] == topology
+    assert "Ignoring unreadable topology cache" in caplog.text
+
+def test_unwritable_cache_falls_back_to_parsing(topology_file, topology, tmp_path, caplog):
+    # A regular file in the cache path makes creating the folder fail
+    (tmp_path / "file").write_text("")
+    assert load_topology_cached(topology_file, cache_dir=str(tmp_path / "file" / "cache"))[:2] == topology
+    assert "Not caching the compiled topology" in caplog.text
+
+def test_cache_off(topology_file, topology, cache_dir, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, "off")
+    assert load_topology_cached(topology_file)[:2] == topology
+    assert not os.path.exists(cache_dir)
@@ -0,0 +1,37 @@
+import io
+import json
+import os
+
+import pytest
+
+from ..NetworkConfigurationLoader import NODE_PREFIX, iter_json_events, parse_oran_topology
+
+TOPOLOGY_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "generatedTopologies")
+
+@pytest.mark.parametrize("name", sorted(os.listdir(TOPOLOGY_DIR)))
+def test_streaming_parse_matches_json_load(name):
+    filename = os.path.join(TOPOLOGY_DIR, name)
+    assert parse_oran_topology(filename, streaming=True) == parse_oran_topology(filename)
+
+def test_streaming_parse_of_generated_topology(topology_file, topology):
+    assert parse_oran_topology(topology_file, streaming=True) == topology
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_json_events_across_chunk_boundaries(topology_file, chunk_size):
+    # Chunks split tokens and escape sequences anywhere; the events must not depend on them
+    with open(topology_file) as f:
+        node_ids = [value for prefix, event, value in iter_json_events(f, chunk_size)
+                    if prefix == NODE_PREFIX + ".node-id"]
+    with open(topology_file) as f:
+        networks = json.load(f)["ietf-network:networks"]["network"]
+
+    assert node_ids == [node["node-id"] for network in networks for node in network["node"]]
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+def test_json_events_decode_values(chunk_size):
+    text = '{"a": ["x\\"y\\u00e9", 1.5, true, null, {"b": -2}]}'
+    values = [event for event in iter_json_events(io.StringIO(text), chunk_size)
+              if event[1] in ("string", "number", "boolean", "null")]
+
+    assert values == [("a.item", "string", 'x"y\u00e9'), ("a.item", "number", 1.5), ("a.item", "boolean", True),
+                      ("a.item", "null", None), ("a.item.b", "number", -2)]
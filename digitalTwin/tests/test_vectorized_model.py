@@ -0,0 +1,60 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from ..NEE.CUpowerCalculator import calculate_cu_power, calculate_cu_utilizations
+from ..NEE.DUpowerCalculator import calculate_du_power, calculate_du_utilizations, round_utilization
+from ..NEE.RUpowerCalculator import calculate_power_consumption
+from ..NEE.VectorizedPowerModel import evaluate_power_model
+from ..TopologyIndex import compile_topology
+from .conftest import node_ids, utilization_source
+
+def _scalar_results(network_tree, ru_utilizations, ru_node_ids, topology_index=None):
+    """
+    Evaluates every timestamp with the per-node calculators, as the original scripts did.
+    """
+    du_node_ids = node_ids(network_tree, "DU")
+    rows = {"ru_power": calculate_power_consumption(ru_utilizations.tolist()), "du_utilization": [],
+            "du_power": [], "cu_utilization": [], "cu_power": []}
+    for row in ru_utilizations.tolist():
+        du_utilizations = calculate_du_utilizations(network_tree, row, ru_node_ids, topology_index)
+        cu_utilizations = calculate_cu_utilizations(network_tree, list(du_utilizations.values()), du_node_ids,
+                                                    topology_index)
+        rows["du_utilization"].append(du_utilizations)
+        rows["du_power"].append(calculate_du_power(du_utilizations, network_tree))
+        rows["cu_utilization"].append(cu_utilizations)
+        rows["cu_power"].append(calculate_cu_power(cu_utilizations))
+    return rows
+
+def _column(rows, node_id):
+    return [row[node_id] for row in rows]
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_vectorized_model_matches_calculators(topology, compiled):
+    # 4 DUs per CU: many CU averages of two-decimal DU utilizations are exact ties (x.xx5)
+    network_tree = topology[1]
+    _, ru_utilizations, ru_node_ids = utilization_source(node_ids(network_tree, "RU"), num_timestamps=96)
+    topology_index = compile_topology(network_tree, ru_node_ids, node_ids(network_tree, "DU"))
+
+    results = evaluate_power_model(topology_index, ru_utilizations)
+    expected = _scalar_results(network_tree, ru_utilizations, ru_node_ids, topology_index if compiled else None)
+
+    np.testing.assert_array_equal(results["ru_power"], expected["ru_power"])
+    for name, ids_key in [("du_utilization", "du_node_ids"), ("du_power", "du_node_ids"),
+                          ("cu_utilization", "cu_node_ids"), ("cu_power", "cu_node_ids")]:
+        for column, node_id in enumerate(results[ids_key]):
+            np.testing.assert_array_equal(results[name][:, column], _column(expected[name], node_id),
+                                          err_msg=f"{name} {node_id}")
+    np.testing.assert_allclose(results["ru_total_power"] + results["du_total_power"] + results["cu_total_power"],
+                               [sum(power) + sum(du.values()) + sum(cu.values()) for power, du, cu in
+                                zip(expected["ru_power"], expected["du_power"], expected["cu_power"])], rtol=1e-12)
+
+def test_ties_round_the_same_in_any_summation_order():
+    # The mean 0.455 is a tie; depending on the summation order it comes out a bit below or above it
+    values = [0.74, 0.27, 0.64, 0.17]
+    means = [sum(order) / len(order) for order in itertools.permutations(values)]
+    assert len(set(means)) > 1
+
+    assert {float(round_utilization(mean)) for mean in means} == {0.46}
+    np.testing.assert_array_equal(round_utilization(np.array(means)), 0.46)